@@ -0,0 +1,17 @@
+"""
+Landmark Conversion Benchmark
+قياس سرعة تحويل معالم الوجه إلى مصفوفات مقارنة بقراءة protobuf مباشرة
+
+Usage: python benchmark_landmarks.py [--repeats 2000]
+"""
+
+import argparse
+
+from utils.landmarks import benchmark
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time face landmark conversion and geometry per frame")
+    parser.add_argument("--repeats", type=int, default=2000, help="timing runs per measurement")
+    args = parser.parse_args()
+
+    benchmark(args.repeats)
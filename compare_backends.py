@@ -0,0 +1,47 @@
+"""
+YOLO Backend Comparison
+مقارنة دقة وسرعة واجهات تشغيل YOLO على نفس الإطارات
+
+Usage: python compare_backends.py recording.mp4 [--backends torch onnx onnx:int8 openvino] [--frames 100]
+"""
+
+import argparse
+import itertools
+
+from config import Config
+from core.replay import iter_frames
+from detectors.yolo_backends import compare_backends
+from utils.frame_packet import FramePacket
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare YOLO inference backends on recorded frames")
+    parser.add_argument("source", help="video file, image directory or glob pattern")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx:int8", "openvino"],
+                        help="backends to compare; the first one is the accuracy reference")
+    parser.add_argument("--frames", type=int, default=100, help="number of frames to use")
+    parser.add_argument("--imgsz", type=int, default=480, help="YOLO input size")
+    args = parser.parse_args()
+
+    images = [
+        FramePacket(frame, 0).letterbox(args.imgsz)[0]
+        for frame in itertools.islice(iter_frames(args.source), args.frames)
+    ]
+    report = compare_backends(
+        args.backends, images, Config.YOLO_MODEL_PATH,
+        img_size=args.imgsz,
+        conf=Config.YOLO_CONFIDENCE_THRESHOLD,
+        calibration_dir=Config.YOLO_CALIBRATION_DIR,
+        cache_dir=Config.YOLO_CACHE_DIR
+    )
+
+    print("=" * 60)
+    print(f"🏁 YOLO backends on {len(images)} frames (reference: {args.backends[0]})")
+    print("=" * 60)
+    print(f"   {'backend':<16} {'mean':>8} {'p50':>8} {'p95':>8} {'dets':>6} {'prec':>6} {'recall':>6}")
+    for spec, entry in report.items():
+        if 'error' in entry:
+            print(f"   {spec:<16} unavailable: {entry['error']}")
+            continue
+        print(f"   {spec:<16} {entry['mean_ms']:>8.1f} {entry['p50_ms']:>8.1f} {entry['p95_ms']:>8.1f} "
+              f"{entry['detections']:>6} {entry.get('precision', 1.0):>6.2f} {entry.get('recall', 1.0):>6.2f}")
+    print("=" * 60)
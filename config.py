@@ -19,16 +19,61 @@ class Config:
     FRAME_WIDTH = int(os.getenv("FRAME_WIDTH", "1280"))
     FRAME_HEIGHT = int(os.getenv("FRAME_HEIGHT", "720"))
     FPS = int(os.getenv("FPS", "30"))
+    CAPTURE_BUFFER_SIZE = int(os.getenv("CAPTURE_BUFFER_SIZE", "2"))  # frames kept by capture thread
+    HEADLESS = os.getenv("HEADLESS", "False").lower() == "true"  # analyze only, no drawing/window
+    OVERLAY_DETAIL = os.getenv("OVERLAY_DETAIL", "full")  # none, minimal or full
+    
+    # Frame Gating (skip detectors on static, duplicate or unusable frames)
+    FRAME_GATING = os.getenv("FRAME_GATING", "True").lower() == "true"
+    GATE_MOTION_THRESHOLD = float(os.getenv("GATE_MOTION_THRESHOLD", "2.0"))  # mean abs diff, 0-255
+    GATE_DARK_THRESHOLD = float(os.getenv("GATE_DARK_THRESHOLD", "20.0"))  # mean brightness, 0-255
+    GATE_BLUR_THRESHOLD = float(os.getenv("GATE_BLUR_THRESHOLD", "10.0"))  # Laplacian variance
+    GATE_MAX_REUSE = float(os.getenv("GATE_MAX_REUSE", "0.5"))  # seconds a static frame may reuse results
     
     # AI Model Configuration
     YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", "yolov8n.pt")
     YOLO_CONFIDENCE_THRESHOLD = float(os.getenv("YOLO_CONFIDENCE_THRESHOLD", "0.5"))
+    YOLO_WORKER_PROCESS = os.getenv("YOLO_WORKER_PROCESS", "False").lower() == "true"
+    YOLO_WORKER_SLOTS = int(os.getenv("YOLO_WORKER_SLOTS", "2"))  # shared-memory frame buffers
+    YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))  # frames per batched YOLO call
+    YOLO_ASYNC = os.getenv("YOLO_ASYNC", "False").lower() == "true"  # run YOLO on a background thread
+    # Adaptive input size trades YOLO accuracy for frame time. It only applies when YOLO runs
+    # on the frame path: with YOLO_ASYNC or YOLO_WORKER_PROCESS inference does not add to the
+    # frame time, so the size stays fixed (a startup warning says so), and the multi-stream
+    # server and replay keep a fixed size as well
+    YOLO_ADAPTIVE_IMGSZ = os.getenv("YOLO_ADAPTIVE_IMGSZ", "False").lower() == "true"  # hold the frame budget
+    YOLO_IMGSZ_STEPS = os.getenv("YOLO_IMGSZ_STEPS", "320,416,480,640")  # allowed input sizes (multiples of 32)
+    YOLO_BACKEND = os.getenv("YOLO_BACKEND", "torch")  # torch, onnx, openvino (append ':int8' to quantize)
+    YOLO_CALIBRATION_DIR = os.getenv("YOLO_CALIBRATION_DIR", "")  # images for INT8 calibration
+    YOLO_CACHE_DIR = os.getenv("YOLO_CACHE_DIR", "models")  # exported/quantized model artifacts
+    
+    # Object Tracking (keeps ids and boxes between YOLO runs)
+    TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+    TRACK_MIN_HITS = int(os.getenv("TRACK_MIN_HITS", "2"))  # detections before a track is reported
+    TRACK_MAX_AGE = float(os.getenv("TRACK_MAX_AGE", "1.5"))  # seconds a track survives without a match
+    
+    # Object Evidence (confidence-weighted votes before an object alert fires)
+    OBJECT_EVIDENCE_WINDOW = int(os.getenv("OBJECT_EVIDENCE_WINDOW", "5"))  # detection runs
+    OBJECT_EVIDENCE_ON = float(os.getenv("OBJECT_EVIDENCE_ON", "0.4"))  # confirm at this mean confidence
+    OBJECT_EVIDENCE_OFF = float(os.getenv("OBJECT_EVIDENCE_OFF", "0.1"))  # release at this mean confidence
+    YOLO_PERSON_ROI = os.getenv("YOLO_PERSON_ROI", "False").lower() == "true"  # detect on a crop around the student
+    YOLO_ROI_MARGIN = float(os.getenv("YOLO_ROI_MARGIN", "0.25"))  # crop margin, fraction of the body box
+    
+    # People counting (multiple-people alerts) from YOLO person boxes and face counts
+    PERSON_DETECTION = os.getenv("PERSON_DETECTION", "True").lower() == "true"  # keep YOLO 'person' boxes
+    PERSON_CONFIDENCE = float(os.getenv("PERSON_CONFIDENCE", "0.5"))
+    PERSON_SCAN_INTERVAL = float(os.getenv("PERSON_SCAN_INTERVAL", "2.0"))  # full-frame YOLO run in person-ROI mode, seconds
+    FACE_COUNT_INTERVAL = float(os.getenv("FACE_COUNT_INTERVAL", "0"))  # extra FaceDetection face count while the mesh tracks, seconds (0 = off)
+    PEOPLE_COUNT_MAX_AGE = float(os.getenv("PEOPLE_COUNT_MAX_AGE", "3.0"))  # seconds a count stays valid
     
     # MediaPipe Configuration
     MEDIAPIPE_FACE_DETECTION_CONFIDENCE = float(os.getenv("FACE_DETECTION_CONFIDENCE", "0.5"))
     MEDIAPIPE_FACE_MESH_CONFIDENCE = float(os.getenv("FACE_MESH_CONFIDENCE", "0.5"))
     MEDIAPIPE_POSE_CONFIDENCE = float(os.getenv("POSE_CONFIDENCE", "0.5"))
     MEDIAPIPE_TRACKING_CONFIDENCE = float(os.getenv("TRACKING_CONFIDENCE", "0.5"))
+    ANALYSIS_WIDTH = int(os.getenv("ANALYSIS_WIDTH", "640"))  # MediaPipe input width in pixels (0 = capture size)
+    POSE_RATE = float(os.getenv("POSE_RATE", "10"))  # Pose runs per second, extrapolated in between (0 = every frame)
+    POSE_MODEL_COMPLEXITY = int(os.getenv("POSE_MODEL_COMPLEXITY", "0"))  # 0 = lite, 1 = full, 2 = heavy
     
     # Face Movement Tracking Configuration
     FACE_MOVEMENT_THRESHOLD = float(os.getenv("FACE_MOVEMENT_THRESHOLD", "3.0"))  # seconds
@@ -66,7 +111,8 @@ class Config:
         'face_away': float(os.getenv("FACE_AWAY_THRESHOLD", "5.0")),
         'person_absent': float(os.getenv("PERSON_ABSENT_THRESHOLD", "3.0")),
         'talking': float(os.getenv("TALKING_THRESHOLD", "2.0")),
-        'face_movement': float(os.getenv("FACE_MOVEMENT_THRESHOLD", "3.0"))
+        'face_movement': float(os.getenv("FACE_MOVEMENT_THRESHOLD", "3.0")),
+        'multiple_people': float(os.getenv("MULTIPLE_PEOPLE_THRESHOLD", "2.0"))
     }
     
     # Score Penalties
@@ -86,6 +132,14 @@ class Config:
         'paper', 'notebook', 'calculator', 'watch', 'glasses_case'
     ]
     
+    # Per-class YOLO confidence overrides, e.g. "cell phone:0.35,book:0.6"
+    CLASS_CONFIDENCE_THRESHOLDS = {
+        name.strip(): float(value)
+        for name, value in (
+            entry.rsplit(":", 1) for entry in os.getenv("CLASS_CONFIDENCE_THRESHOLDS", "").split(",") if ":" in entry
+        )
+    }
+    
     # Logging Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "cheating_log.txt")
@@ -106,6 +160,25 @@ class Config:
     FRAME_PROCESSING_INTERVAL = float(os.getenv("FRAME_PROCESSING_INTERVAL", "0.033"))  # 30 FPS
     AUDIO_PROCESSING_INTERVAL = float(os.getenv("AUDIO_PROCESSING_INTERVAL", "0.1"))  # 10 Hz
     
+    # Detector Scheduling (rates in runs per second)
+    SHOW_LATENCY_PANEL = os.getenv("SHOW_LATENCY_PANEL", "False").lower() == "true"
+    FRAME_TIME_BUDGET_MS = float(os.getenv("FRAME_TIME_BUDGET_MS", "33"))
+    DETECTOR_SCHEDULE = {
+        'hands': {
+            'rate': float(os.getenv("HANDS_RATE", "15")),
+            'priority': int(os.getenv("HANDS_PRIORITY", "2"))
+        },
+        'objects': {
+            'rate': float(os.getenv("OBJECTS_RATE", "5")),  # tracker fills the frames in between
+            'priority': int(os.getenv("OBJECTS_PRIORITY", "3")),
+            'min_rate': float(os.getenv("OBJECTS_MIN_RATE", "1"))
+        },
+        'emotion': {
+            'rate': float(os.getenv("EMOTION_RATE", "10")),
+            'priority': int(os.getenv("EMOTION_PRIORITY", "1"))
+        }
+    }
+    
     # Security Configuration
     ENABLE_ENCRYPTION = os.getenv("ENABLE_ENCRYPTION", "False").lower() == "true"
     ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY", "default-key-change-in-production")
@@ -144,10 +217,14 @@ class Config:
         return {
             'yolo_model_path': cls.YOLO_MODEL_PATH,
             'yolo_confidence': cls.YOLO_CONFIDENCE_THRESHOLD,
+            'yolo_worker_process': cls.YOLO_WORKER_PROCESS,
+            'yolo_backend': cls.YOLO_BACKEND,
             'face_detection_confidence': cls.MEDIAPIPE_FACE_DETECTION_CONFIDENCE,
             'face_mesh_confidence': cls.MEDIAPIPE_FACE_MESH_CONFIDENCE,
             'pose_confidence': cls.MEDIAPIPE_POSE_CONFIDENCE,
-            'tracking_confidence': cls.MEDIAPIPE_TRACKING_CONFIDENCE
+            'tracking_confidence': cls.MEDIAPIPE_TRACKING_CONFIDENCE,
+            'pose_rate': cls.POSE_RATE,
+            'pose_model_complexity': cls.POSE_MODEL_COMPLEXITY
         }
     
     @classmethod
@@ -160,11 +237,26 @@ class Config:
         """Get score penalty configuration"""
         return cls.SCORE_PENALTIES.copy()
     
+    @classmethod
+    def get_detector_schedule(cls) -> Dict:
+        """Get detector scheduling configuration"""
+        return {name: entry.copy() for name, entry in cls.DETECTOR_SCHEDULE.items()}
+    
     @classmethod
     def get_forbidden_objects(cls) -> List[str]:
         """Get list of forbidden objects"""
         return cls.FORBIDDEN_OBJECTS.copy()
     
+    @classmethod
+    def get_imgsz_steps(cls) -> List[int]:
+        """Get allowed adaptive YOLO input sizes"""
+        return [int(step) for step in cls.YOLO_IMGSZ_STEPS.split(",") if step.strip()]
+    
+    @classmethod
+    def get_class_confidence_thresholds(cls) -> Dict:
+        """Get per-class confidence overrides"""
+        return cls.CLASS_CONFIDENCE_THRESHOLDS.copy()
+    
     @classmethod
     def validate_config(cls) -> Tuple[bool, List[str]]:
         """Validate configuration values"""
@@ -177,6 +269,51 @@ class Config:
         if cls.FPS <= 0:
             errors.append("FPS must be positive")
             
+        if cls.CAPTURE_BUFFER_SIZE <= 0:
+            errors.append("Capture buffer size must be positive")
+            
+        if cls.FRAME_TIME_BUDGET_MS <= 0:
+            errors.append("Frame time budget must be positive")
+            
+        if cls.GATE_MAX_REUSE < 0:
+            errors.append("Gate max reuse time must not be negative")
+            
+        if cls.YOLO_BACKEND.partition(":")[0] not in ("torch", "onnx", "openvino"):
+            errors.append(f"Unknown YOLO backend: {cls.YOLO_BACKEND}")
+            
+        if not 0 <= cls.OBJECT_EVIDENCE_OFF < cls.OBJECT_EVIDENCE_ON <= 1:
+            errors.append("Object evidence thresholds must satisfy 0 <= off < on <= 1")
+            
+        if cls.TRACK_MIN_HITS < 1:
+            errors.append("Track min hits must be at least 1")
+            
+        if any(step <= 0 or step % 32 for step in cls.get_imgsz_steps()):
+            errors.append("YOLO input size steps must be positive multiples of 32")
+            
+        if cls.YOLO_BATCH_SIZE <= 0:
+            errors.append("YOLO batch size must be positive")
+            
+        if not 0 <= cls.PERSON_CONFIDENCE <= 1:
+            errors.append("Person confidence must be between 0 and 1")
+            
+        if cls.PERSON_SCAN_INTERVAL <= 0 or cls.FACE_COUNT_INTERVAL < 0:
+            errors.append("Person scan interval must be positive and face count interval not negative")
+            
+        if cls.ANALYSIS_WIDTH < 0:
+            errors.append("Analysis width must not be negative")
+            
+        if cls.POSE_RATE < 0:
+            errors.append("Pose rate must not be negative")
+            
+        if cls.POSE_MODEL_COMPLEXITY not in (0, 1, 2):
+            errors.append("Pose model complexity must be 0, 1 or 2")
+            
+        if cls.YOLO_ROI_MARGIN < 0:
+            errors.append("YOLO ROI margin must not be negative")
+            
+        if cls.OVERLAY_DETAIL not in ("none", "minimal", "full"):
+            errors.append("Overlay detail must be none, minimal or full")
+            
         if cls.FACE_MOVEMENT_THRESHOLD <= 0:
             errors.append("Face movement threshold must be positive")
             
@@ -209,11 +346,25 @@ class Config:
         print(f"  Camera Index: {cls.CAMERA_INDEX}")
         print(f"  Frame Size: {cls.FRAME_WIDTH}x{cls.FRAME_HEIGHT}")
         print(f"  FPS: {cls.FPS}")
+        print(f"  Capture Buffer: {cls.CAPTURE_BUFFER_SIZE} frames")
+        print(f"  Headless: {cls.HEADLESS}")
+        print(f"  Overlay Detail: {cls.OVERLAY_DETAIL}")
+        print(f"  Frame Gating: {cls.FRAME_GATING}")
         
         print(f"\n🤖 AI Model Configuration:")
         print(f"  YOLO Model: {cls.YOLO_MODEL_PATH}")
+        print(f"  YOLO Worker Process: {cls.YOLO_WORKER_PROCESS}")
+        print(f"  YOLO Batch Size: {cls.YOLO_BATCH_SIZE}")
+        print(f"  YOLO Backend: {cls.YOLO_BACKEND}")
+        print(f"  YOLO Async: {cls.YOLO_ASYNC}")
+        print(f"  YOLO Adaptive Input Size: {cls.YOLO_ADAPTIVE_IMGSZ} ({cls.YOLO_IMGSZ_STEPS})")
+        print(f"  YOLO Person ROI: {cls.YOLO_PERSON_ROI}")
+        face_count = f"every {cls.FACE_COUNT_INTERVAL}s" if cls.FACE_COUNT_INTERVAL else "on mesh recovery only"
+        print(f"  Person Detection: {cls.PERSON_DETECTION} (face count {face_count})")
         print(f"  Face Detection Confidence: {cls.MEDIAPIPE_FACE_DETECTION_CONFIDENCE}")
         print(f"  Face Mesh Confidence: {cls.MEDIAPIPE_FACE_MESH_CONFIDENCE}")
+        print(f"  MediaPipe Analysis Width: {cls.ANALYSIS_WIDTH or cls.FRAME_WIDTH}px")
+        print(f"  Pose: {cls.POSE_RATE} Hz, model complexity {cls.POSE_MODEL_COMPLEXITY}")
         
         print(f"\n👁️ Face Movement Configuration:")
         print(f"  Movement Threshold: {cls.FACE_MOVEMENT_THRESHOLD}s")
@@ -245,6 +396,9 @@ class Config:
         print(f"\n⚙️ Performance Configuration:")
         print(f"  Frame Processing Interval: {cls.FRAME_PROCESSING_INTERVAL}s")
         print(f"  Audio Processing Interval: {cls.AUDIO_PROCESSING_INTERVAL}s")
+        print(f"  Frame Time Budget: {cls.FRAME_TIME_BUDGET_MS}ms")
+        for name, entry in cls.DETECTOR_SCHEDULE.items():
+            print(f"  {name.title()}: {entry['rate']}/s (priority {entry['priority']})")
         
         print(f"\n🔒 Security Configuration:")
         print(f"  Encryption Enabled: {cls.ENABLE_ENCRYPTION}")
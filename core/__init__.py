@@ -4,6 +4,11 @@ Core monitoring system
 """
 
 from .monitor import ExamMonitor
+from .capture import FrameGrabber
+from .scheduler import DetectorScheduler
+from .server import MonitoringServer
+from .replay import ReplayRunner
+from .renderer import OverlayRenderer
 
-__all__ = ['ExamMonitor']
+__all__ = ['ExamMonitor', 'FrameGrabber', 'DetectorScheduler', 'MonitoringServer', 'ReplayRunner', 'OverlayRenderer']
 
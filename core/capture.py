@@ -0,0 +1,109 @@
+"""
+Threaded Frame Capture
+التقاط الإطارات في خيط منفصل
+"""
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameGrabber:
+    """Capture frames on a background thread, keeping only the newest ones"""
+
+    def __init__(self, capture, buffer_size=2):
+        """Initialize grabber around an opened cv2.VideoCapture"""
+        self.capture = capture
+
+        # Ring buffer: old frames fall off the left when a new one arrives
+        self.buffer = deque(maxlen=max(1, buffer_size))
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+
+        # Counters
+        self.frame_id = 0
+        self.last_read_id = 0
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+        self.running = False
+        self.failed = False
+        self.thread = None
+
+    def start(self):
+        """Start the capture thread"""
+        if self.running:
+            return self
+
+        # Keep OpenCV's own queue as short as the backend allows
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.running = True
+        self.failed = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the capture thread"""
+        self.running = False
+        with self.lock:
+            self.new_frame.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def _capture_loop(self):
+        """Capture loop"""
+        while self.running:
+            ret, frame = self.capture.read()
+
+            with self.lock:
+                if not ret:
+                    self.failed = True
+                    self.running = False
+                    self.new_frame.notify_all()
+                    break
+
+                # A full buffer means the oldest unread frame is discarded
+                if len(self.buffer) == self.buffer.maxlen and self.buffer[0][0] > self.last_read_id:
+                    self.frames_dropped += 1
+
+                self.frame_id += 1
+                self.frames_captured += 1
+                self.buffer.append((self.frame_id, time.time(), frame))
+                self.new_frame.notify_all()
+
+    def read(self, timeout=1.0):
+        """Return (ok, frame, timestamp) for the freshest frame not read yet"""
+        with self.lock:
+            if not self.new_frame.wait_for(
+                lambda: self.frame_id > self.last_read_id or not self.running,
+                timeout=timeout
+            ):
+                return False, None, None
+
+            if self.frame_id <= self.last_read_id:
+                return False, None, None
+
+            frame_id, timestamp, frame = self.buffer[-1]
+
+            # Every unread frame older than the newest one is skipped
+            skipped = sum(1 for fid, _, _ in self.buffer if self.last_read_id < fid < frame_id)
+            self.frames_dropped += skipped
+
+            self.last_read_id = frame_id
+            self.buffer.clear()
+            return True, frame, timestamp
+
+    def get_stats(self):
+        """Get capture statistics"""
+        with self.lock:
+            return {
+                'captured': self.frames_captured,
+                'dropped': self.frames_dropped,
+                'drop_rate': self.frames_dropped / self.frames_captured if self.frames_captured else 0.0,
+                'failed': self.failed  # the source stopped delivering (camera lost or end of video)
+            }
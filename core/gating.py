@@ -0,0 +1,113 @@
+"""
+Frame Gating
+تخطي الإطارات الثابتة أو المكررة أو غير الصالحة قبل التحليل
+"""
+
+import hashlib
+
+import cv2
+import numpy as np
+
+# Gate actions
+PROCESS = 'process'
+DUPLICATE = 'duplicate'
+STATIC = 'static'
+DARK = 'dark'
+BLURRY = 'blurry'
+
+ACTIONS = (PROCESS, DUPLICATE, STATIC, DARK, BLURRY)
+
+
+class FrameGate:
+    """Cheap pre-check that decides whether a frame needs the expensive detectors
+
+    duplicate: same buffer as the previous frame (sparse hash)
+    static:    motion energy on a tiny grayscale copy below threshold
+    dark:      mean brightness too low (covered or dead camera)
+    blurry:    Laplacian variance too low (detectors unreliable)
+    Duplicate and static frames are still processed every max_reuse
+    seconds so duration-based alerts keep advancing.
+    """
+
+    def __init__(self, config=None):
+        """Initialize gate"""
+        self.motion_threshold = config.GATE_MOTION_THRESHOLD if config else 2.0
+        self.dark_threshold = config.GATE_DARK_THRESHOLD if config else 20.0
+        self.blur_threshold = config.GATE_BLUR_THRESHOLD if config else 10.0
+        self.max_reuse = config.GATE_MAX_REUSE if config else 0.5
+
+        self.last_hash = None
+        self.reference = None  # Tiny view of the last processed frame
+        self.last_processed_time = None
+        self.unusable_since = None
+
+        self.counts = dict.fromkeys(ACTIONS, 0)
+        self.last_decision = None
+
+    def check(self, packet, force=False):
+        """Classify a FramePacket; returns a decision dict with the measured values
+
+        force: always return 'process' (e.g. detections were computed elsewhere),
+               while still updating the reference and statistics
+        """
+        frame_hash = hashlib.blake2b(packet.bgr[::8, ::8].tobytes(), digest_size=8).digest()
+        duplicate = frame_hash == self.last_hash
+        self.last_hash = frame_hash
+
+        tiny = packet.tiny
+        brightness = float(tiny.mean())
+        sharpness = float(cv2.Laplacian(packet.gray, cv2.CV_16S).var())
+        motion = None
+        if self.reference is not None and self.reference.shape == tiny.shape:
+            motion = float(np.abs(tiny.astype(np.int16) - self.reference).mean())
+
+        if duplicate:
+            action = DUPLICATE
+        elif brightness < self.dark_threshold:
+            action = DARK
+        elif sharpness < self.blur_threshold:
+            action = BLURRY
+        elif motion is not None and motion < self.motion_threshold:
+            action = STATIC
+        else:
+            action = PROCESS
+
+        # Unusable streak, so a covered camera can still raise an alert
+        if action in (DARK, BLURRY):
+            if self.unusable_since is None:
+                self.unusable_since = packet.timestamp
+        elif action != DUPLICATE:
+            self.unusable_since = None
+
+        # Unchanged frames are re-analyzed now and then so timers keep running
+        if (action in (DUPLICATE, STATIC) and self.last_processed_time is not None
+                and packet.timestamp - self.last_processed_time >= self.max_reuse):
+            action = PROCESS
+
+        if force or self.last_processed_time is None:
+            action = PROCESS
+        if action == PROCESS:
+            self.reference = tiny.astype(np.int16)
+            self.last_processed_time = packet.timestamp
+
+        self.counts[action] += 1
+        self.last_decision = {
+            'action': action,
+            'motion': motion,
+            'brightness': brightness,
+            'sharpness': sharpness
+        }
+        return self.last_decision
+
+    def unusable_duration(self, now):
+        """Seconds the camera image has been dark or blurred (0 if usable)"""
+        return now - self.unusable_since if self.unusable_since is not None else 0.0
+
+    def get_stats(self):
+        """Gating decision counts and skip rate"""
+        total = sum(self.counts.values())
+        return {
+            'frames': total,
+            'counts': dict(self.counts),
+            'skip_rate': (total - self.counts[PROCESS]) / total if total else 0.0
+        }
@@ -7,6 +7,7 @@ import cv2
 import numpy as np
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import modules
@@ -15,11 +16,13 @@ try:
 except ImportError:
     Config = None
 
-from detectors import (
-    FaceDetector, ObjectDetector, AudioDetector,
-    HandDetector, EyeTracker, PostureDetector, BehaviorAnalyzer
-)
-from utils import setup_logger, AlertManager
+import detectors
+from utils import setup_logger, AlertManager, FramePacket, LatencyTracker, clock, landmarks
+from .capture import FrameGrabber
+from .scheduler import DetectorScheduler
+from .renderer import OverlayRenderer
+from .gating import FrameGate
+from .resolution import ResolutionController
 
 # Optional modules
 try:
@@ -33,116 +36,317 @@ except ImportError:
 class ExamMonitor:
     """Optimized exam monitoring system"""
     
-    def __init__(self):
-        """Initialize monitoring system"""
+    def __init__(self, source=None, object_detector=None, notification_system=None,
+                 open_capture=True, name=None, headless=None, enable_notifications=True):
+        """Initialize monitoring system
+        
+        source: camera index or video path (defaults to Config.CAMERA_INDEX)
+        object_detector / notification_system: shared instances (multi-stream server)
+        open_capture: open the video source here; otherwise frames are fed to process_frame
+        name: stream name used in reports
+        headless: analyze only, no drawing and no window (defaults to Config.HEADLESS)
+        enable_notifications: False disables the notification system (offline replay)
+        """
         self.config = Config if Config else None
         self.logger = setup_logger()
-        
-        # Initialize detectors
-        self.face_detector = FaceDetector(self.config)
-        self.object_detector = ObjectDetector(self.config)
-        self.audio_detector = AudioDetector(self.config)
-        self.hand_detector = HandDetector(self.config)
-        self.eye_tracker = EyeTracker(self.config)
-        self.posture_detector = PostureDetector(self.config)
-        self.behavior_analyzer = BehaviorAnalyzer(self.config)
+        self.name = name
+        if headless is None:
+            headless = self.config.HEADLESS if self.config else False
+        self.headless = headless
+        self.last_result = None
+        
+        # Initialize detectors (heavy models load in parallel, each with a warm-up)
+        startup_start = time.perf_counter()
+        self.startup_times = {}
+        self.latency = LatencyTracker()
+        self._load_models(object_detector, load_audio=open_capture)
+        self.eye_tracker = detectors.EyeTracker(self.config)
+        self.posture_detector = detectors.PostureDetector(self.config)
+        self.behavior_analyzer = detectors.BehaviorAnalyzer(self.config)
         
         # Initialize alert manager
         self.alert_manager = AlertManager(self.config)
         
         # Optional modules
         if NEW_MODULES_AVAILABLE:
-            self.emotion_detector = EmotionDetector()
-            self.notification_system = NotificationSystem()
+            self.emotion_detector = EmotionDetector(self.landmark_service)
+            if notification_system is None and enable_notifications:
+                notification_system = NotificationSystem()
+            self.notification_system = notification_system
         else:
             self.emotion_detector = None
-            self.notification_system = None
+            self.notification_system = notification_system
         
         # Initialize camera
-        camera_idx = self.config.CAMERA_INDEX if self.config else 0
-        self.cap = cv2.VideoCapture(camera_idx)
-        if not self.cap.isOpened():
-            self.logger.error("Could not open webcam")
-            exit(1)
-        
-        frame_width = self.config.FRAME_WIDTH if self.config else 1280
-        frame_height = self.config.FRAME_HEIGHT if self.config else 720
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
-        print(f"📹 Camera: {frame_width}x{frame_height}")
+        self.cap = None
+        self.grabber = None
+        if open_capture:
+            if source is None:
+                source = self.config.CAMERA_INDEX if self.config else 0
+            self.cap = cv2.VideoCapture(source)
+            if not self.cap.isOpened():
+                self.logger.error("Could not open webcam")
+                exit(1)
+            
+            frame_width = self.config.FRAME_WIDTH if self.config else 1280
+            frame_height = self.config.FRAME_HEIGHT if self.config else 720
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+            print(f"📹 Camera: {frame_width}x{frame_height}")
+            
+            # Capture runs on its own thread so analysis always gets the newest frame
+            buffer_size = self.config.CAPTURE_BUFFER_SIZE if self.config else 2
+            self.grabber = FrameGrabber(self.cap, buffer_size)
         
         # Session tracking
-        self.session_start_time = time.time()
+        self.session_start_time = clock.now()
+        self.terminated = False
         
         # Frame processing optimization
         self.frame_skip_count = 0
-        self.frame_skip = 1  # Process every frame
+        self.last_objects = []  # Per-stream, the object detector may be shared
+        self.object_tracker = detectors.ObjectTracker(self.config)  # Keeps object ids between YOLO runs
+        self.async_objects = self.object_detector.async_mode  # submit()/poll() instead of detect()
+        self.person_roi = None  # Crop for object detection, from the last pose
+        self.person_scan_interval = self.config.PERSON_SCAN_INTERVAL if self.config else 2.0
+        self.last_person_scan = None  # Last full-frame YOLO run while the person ROI is in use
+        
+        # Detector cadence: face/pose every frame, the rest as the budget allows
+        budget_ms = self.config.FRAME_TIME_BUDGET_MS if self.config else 33.0
+        self.scheduler = DetectorScheduler(budget_ms, latency_tracker=self.latency)
+        self.scheduler.register('face', required=True, initial_cost_ms=15.0)
+        schedule = self.config.get_detector_schedule() if self.config else {
+            'hands': {'rate': 15.0, 'priority': 2},
+            'objects': {'rate': 5.0, 'priority': 3, 'min_rate': 1.0},
+            'emotion': {'rate': 10.0, 'priority': 1}
+        }
+        for name, entry in schedule.items():
+            if name == 'emotion' and not self.emotion_detector:
+                continue
+            self.scheduler.register(name, **entry)
+        
+        # Adaptive YOLO input size, only when this monitor owns the detector and
+        # YOLO runs on the frame path (async/worker inference does not add to frame time)
+        self.resolution = None
+        adaptive = self.config.YOLO_ADAPTIVE_IMGSZ if self.config else False
+        if adaptive and object_detector is None and not self.async_objects:
+            self.resolution = ResolutionController(
+                self.config.get_imgsz_steps(), self.object_detector.img_size, budget_ms
+            )
+            self.object_detector.set_img_size(self.resolution.img_size)
+        elif adaptive and object_detector is None:
+            print(f"⚠️ YOLO_ADAPTIVE_IMGSZ ignored: YOLO runs off the frame path "
+                  f"({'worker process' if self.object_detector.worker else 'async'}), "
+                  f"input size stays {self.object_detector.img_size}")
+        
+        # Frame gating: static, duplicate or unusable frames reuse the last result
+        gating = self.config.FRAME_GATING if self.config else True
+        self.frame_gate = FrameGate(self.config) if gating else None
+        
+        # Overlay drawing (level of detail, cached static layers), built on the first
+        # rendered frame so headless monitors never allocate its layers
+        self.overlay_detail = self.config.OVERLAY_DETAIL if self.config else 'full'
+        self.renderer = None
         
         # Performance tracking
+        self.show_latency_panel = self.config.SHOW_LATENCY_PANEL if self.config else False
+        self.latency_panel_summary = {}
+        self.latency_panel_time = 0
+        self.frames_processed = 0
+        self.processing_time = 0.0
         self.fps_counter = 0
         self.fps_start_time = time.time()
         self.current_fps = 0
+        
+        self.startup_times['total'] = time.perf_counter() - startup_start
+        self._print_startup_times()
+    
+    def _load_models(self, object_detector=None, load_audio=True):
+        """Build the model-backed detectors, on a thread pool when YOLO is loaded here
+        
+        Each job imports its own dependencies and runs one warm-up inference
+        on a blank frame, so graph initialization is paid here and not on the
+        first real frame. Audio is only loaded for a live capture.
+        """
+        frame_width = self.config.FRAME_WIDTH if self.config else 1280
+        frame_height = self.config.FRAME_HEIGHT if self.config else 720
+        blank = np.zeros((frame_height, frame_width, 3), dtype=np.uint8)
+        
+        def timed(name, build):
+            start = time.perf_counter()
+            result = build()
+            self.startup_times[name] = time.perf_counter() - start
+            return result
+        
+        def load_face():
+            # One FaceMesh pass per frame feeds face presence, movement, gaze and emotion
+            landmark_service = detectors.FaceLandmarkService(self.config)
+            face_detector = detectors.FaceDetector(self.config, landmark_service)
+            face_detector.process(FramePacket(blank, 0))
+            face_detector.reset()
+            face_detector.latency = self.latency  # Pose and recovery are timed from the first real frame on
+            return landmark_service, face_detector
+        
+        def load_hands():
+            hand_detector = detectors.HandDetector(self.config)
+            hand_detector.process(FramePacket(blank, 0))
+            return hand_detector
+        
+        def load_objects():
+            detector = detectors.ObjectDetector(self.config)
+            detector.warm_up()
+            return detector
+        
+        jobs = {'face_mesh+pose': load_face, 'hands': load_hands}
+        if object_detector is None:
+            jobs['yolo'] = load_objects
+        if load_audio:
+            jobs['audio'] = lambda: detectors.AudioDetector(self.config)
+        
+        if object_detector is None:
+            with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='startup') as pool:
+                futures = {name: pool.submit(timed, name, build) for name, build in jobs.items()}
+                models = {name: future.result() for name, future in futures.items()}
+        else:
+            # Streams sharing a loaded YOLO only build two MediaPipe graphs: no pool needed
+            models = {name: timed(name, build) for name, build in jobs.items()}
+        
+        self.landmark_service, self.face_detector = models['face_mesh+pose']
+        self.hand_detector = models['hands']
+        self.object_detector = models.get('yolo', object_detector)
+        self.audio_detector = models.get('audio')
+    
+    def _print_startup_times(self):
+        """Print how long each model took to load (jobs overlap, total is wall time)"""
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.startup_times.items() if name != 'total']
+        print(f"⏱️ Startup: {' | '.join(parts)} | total {self.startup_times['total']:.2f}s")
+    
+    def process_frame(self, frame, timestamp=None, objects=None, objects_time=None):
+        """Process frame with optimized detection and new features
+        
+        Returns the annotated frame; in headless mode nothing is drawn and
+        the structured result is available as self.last_result.
+        """
+        start = time.perf_counter()
+        if not isinstance(frame, FramePacket):
+            frame = FramePacket(frame, timestamp, self.frame_skip_count + 1)
+        
+        # Cheap gate first; detections computed elsewhere are always used
+        gate = None
+        if self.frame_gate:
+            with self.latency.stage('gate'):
+                gate = self.frame_gate.check(frame, force=objects is not None)
+        
+        if gate and gate['action'] != 'process' and self.last_result:
+            result = self._reuse_result(frame, gate)
+        else:
+            result = self.analyze_frame(frame, objects=objects, objects_time=objects_time)
+            result['gate'] = 'process'
+        frame = frame.bgr
+        
+        if not self.headless:
+            with self.latency.stage('render'):
+                self.render(frame, result)
+        
+        elapsed = time.perf_counter() - start
+        self.latency.record('frame', elapsed)
+        self.frames_processed += 1
+        self.processing_time += elapsed
+        
+        if self.resolution:
+            self._adapt_resolution(elapsed, result)
+        
+        # Update termination
+        if self.alert_manager.update_exam_termination():
+            if self.alert_manager.should_terminate():
+                self._terminate_exam()
+        
+        return frame
     
-    def process_frame(self, frame):
-        """Process frame with optimized detection and new features"""
+    def analyze_frame(self, frame, timestamp=None, objects=None, objects_time=None):
+        """Run all detectors on a frame and return structured results (no drawing)
+        
+        frame: BGR ndarray or FramePacket
+        objects: detections computed elsewhere (batched server inference);
+                 when given, the object detector is not run for this frame
+        objects_time: timestamp of the frame objects were detected on (default: this frame)
+        """
         self.frame_skip_count += 1
         
         # Update FPS
         self._update_fps()
         
-        # Process face detection (always needed)
-        detection_results = self.face_detector.process(frame)
-        
-        # Prepare detection data for behavior analysis
-        detection_data = {}
+        # Shared views (RGB, downscaled, letterboxed) are built once for all detectors
+        if isinstance(frame, FramePacket):
+            packet = frame
+            frame = packet.bgr
+        else:
+            packet = FramePacket(frame, timestamp, self.frame_skip_count)
         
-        # === BASIC DETECTIONS ===
-        # Face detection checks
-        if self.face_detector.detect_face_away(detection_results['face']):
-            self.alert_manager.add_alert("Student looking away", "face_away", self.notification_system)
-            detection_data['looking_away'] = True
+        # Decide which detectors fit in this frame's time budget
+        self.scheduler.plan(packet.timestamp)
         
-        if self.face_detector.detect_person_absence(detection_results['pose']):
-            self.alert_manager.add_alert("Student not present", "person_absent", self.notification_system)
+        # Process face detection (always needed)
+        # FaceMesh is cached per packet, so the face detector only adds the
+        # rate-limited Pose and, when the mesh is lost, FaceDetection recovery.
+        # Each part is its own latency stage; 'face' is only the scheduler's cost
+        with self.scheduler.measure('face', latency=False):
+            with self.latency.stage('face_mesh'):
+                self.landmark_service.process(packet)
+            detection_results = self.face_detector.process(packet)
         
-        if self.face_detector.detect_multiple_people(detection_results['pose']):
-            self.alert_manager.add_alert("Multiple people detected", "multiple_people", self.notification_system)
+        if self.object_detector.use_person_roi:
+            self.person_roi = self.object_detector.person_roi(detection_results['pose'], packet.shape)
         
-        # === ADVANCED DETECTIONS ===
-        face_landmarks = None
-        if detection_results['face_mesh'].multi_face_landmarks:
-            face_landmarks = detection_results['face_mesh'].multi_face_landmarks[0]
-            
-            # Face movement
-            direction = self.face_detector.detect_face_movement(face_landmarks, frame)
-            if direction:
-                self.alert_manager.add_alert(
-                    f"Face looking {direction} for {self.face_detector.face_movement_threshold}s",
-                    "face_movement",
-                    self.notification_system
-                )
-                detection_data['rapid_movement'] = True
-            
-            # Eye gaze tracking (NEW)
-            gaze_data = self.eye_tracker.track_gaze(face_landmarks, frame.shape)
-            if gaze_data:
-                if self.eye_tracker.detect_prolonged_looking_away(gaze_data):
+        # Prepare detection data for behavior analysis
+        detection_data = {}
+        alerts_before = len(self.alert_manager.alert_log)
+        direction = gaze_data = posture_data = emotion_results = None
+        
+        with self.latency.stage('face_analysis'):
+            # === BASIC DETECTIONS ===
+            # Face detection checks
+            if self.face_detector.detect_face_away(detection_results['face_present']):
+                self.alert_manager.add_alert("Student looking away", "face_away", self.notification_system)
+                detection_data['looking_away'] = True
+        
+            if self.face_detector.detect_person_absence(detection_results['pose']):
+                self.alert_manager.add_alert("Student not present", "person_absent", self.notification_system)
+        
+            # === ADVANCED DETECTIONS ===
+            # Landmarks are converted to numpy arrays once and shared by every detector
+            face_landmarks = self.landmark_service.get_face_points(packet)
+            if face_landmarks is not None:
+                # Face movement
+                direction = self.face_detector.detect_face_movement(face_landmarks, packet)
+                if direction:
                     self.alert_manager.add_alert(
-                        "Prolonged looking away from screen",
-                        "face_away",
+                        f"Face looking {direction} for {self.face_detector.face_movement_threshold}s",
+                        "face_movement",
                         self.notification_system
                     )
-                    detection_data['looking_away'] = True
+                    detection_data['rapid_movement'] = True
             
-            # Draw face mesh
-            self.face_detector.draw_landmarks(frame, detection_results['face_mesh'], detection_results['pose'])
+                # Eye gaze tracking (NEW)
+                gaze_data = self.eye_tracker.track_gaze(face_landmarks, packet.shape)
+                if gaze_data:
+                    if self.eye_tracker.detect_prolonged_looking_away(gaze_data):
+                        self.alert_manager.add_alert(
+                            "Prolonged looking away from screen",
+                            "face_away",
+                            self.notification_system
+                        )
+                        detection_data['looking_away'] = True
         
         # Hand detection (NEW)
-        if self.frame_skip_count % 2 == 0:  # Every 2nd frame
-            hand_results = self.hand_detector.process(frame)
-            if hand_results.multi_hand_landmarks:
+        hand_results = None
+        if self.scheduler.should_run('hands'):
+            with self.scheduler.measure('hands'):
+                hand_results = self.hand_detector.process(packet)
+            hand_points = landmarks.hand_arrays(hand_results)
+            if len(hand_points):
                 # Detect suspicious hand movements
-                if self.hand_detector.detect_suspicious_hand_movements(hand_results, face_landmarks):
+                if self.hand_detector.detect_suspicious_hand_movements(hand_points, face_landmarks):
                     self.alert_manager.add_alert(
                         "Suspicious hand movement detected (possible phone usage)",
                         "suspicious_behavior",
@@ -151,42 +355,64 @@ class ExamMonitor:
                     detection_data['hand_near_face'] = True
                 
                 # Detect typing pattern
-                if self.hand_detector.detect_typing_pattern(hand_results):
+                if self.hand_detector.detect_typing_pattern(hand_points):
                     self.alert_manager.add_alert(
                         "Typing pattern detected (possible phone/device usage)",
                         "suspicious_behavior",
                         self.notification_system
                     )
-                
-                # Draw hands
-                self.hand_detector.draw_hands(frame, hand_results)
         
         # Posture detection (NEW)
-        if detection_results['pose'].pose_landmarks:
-            posture_data = self.posture_detector.detect_posture(
-                detection_results['pose'].pose_landmarks,
-                frame.shape
-            )
-            if posture_data and posture_data.get('suspicious'):
-                self.alert_manager.add_alert(
-                    "Suspicious posture detected",
-                    "suspicious_behavior",
-                    self.notification_system
+        with self.latency.stage('posture'):
+            if detection_results['pose_points'] is not None:
+                posture_data = self.posture_detector.detect_posture(
+                    detection_results['pose_points'],
+                    packet.shape
                 )
-                detection_data['posture_change'] = True
-        
-        # Object detection (with frame skipping)
-        if self.frame_skip_count % self.frame_skip == 0:
-            objects_detected = self.object_detector.detect(frame)
-            if objects_detected:
-                self.object_detector.draw_detections(frame, objects_detected)
-                self.alert_manager.add_object_alert(objects_detected, self.notification_system)
-                detection_data['object_detected'] = True
+                if posture_data and posture_data.get('suspicious'):
+                    self.alert_manager.add_alert(
+                        "Suspicious posture detected",
+                        "suspicious_behavior",
+                        self.notification_system
+                    )
+                    detection_data['posture_change'] = True
+        
+        # Object detection (scheduled; tracks are extrapolated in between)
+        fresh_objects = objects is not None or self.scheduler.should_run('objects')
+        detection_time = packet.timestamp if objects_time is None else objects_time
+        if objects is None and fresh_objects:
+            with self.scheduler.measure('objects'):
+                if self.async_objects:
+                    # Never blocks: results arrive on a later frame through poll()
+                    scan_time = self.last_person_scan
+                    if not self.object_detector.submit(packet, self.yolo_roi(packet.timestamp)):
+                        self.last_person_scan = scan_time  # Refused: the full-frame scan is still due
+                    fresh_objects = False
+                else:
+                    objects = self.object_detector.detect(packet, self.yolo_roi(packet.timestamp))
+        if self.async_objects and self.object_detector.has_pending():
+            completed = self._poll_objects(packet)
+            if completed:
+                objects, detection_time = completed
+                fresh_objects = True
+        with self.latency.stage('tracking'):
+            if fresh_objects:
+                self.object_tracker.update(objects, detection_time, packet.shape, self.object_detector.img_size)
+            objects_detected = self.object_tracker.predict(packet.timestamp, packet.shape)
+        self.last_objects = objects_detected
+        
+        if fresh_objects:
+            self._take_objects(objects, detection_time)
+        if self.face_detector.detect_multiple_people(packet.timestamp):
+            self.alert_manager.add_alert("Multiple people detected", "multiple_people", self.notification_system)
+        if fresh_objects and self.alert_manager.object_evidence.get_active():
+            detection_data['object_detected'] = True
         
         # Emotion detection (optional, heavier)
-        if self.emotion_detector and face_landmarks and self.frame_skip_count % 3 == 0:
+        if self.emotion_detector and face_landmarks is not None and self.scheduler.should_run('emotion'):
             try:
-                emotion_results = self.emotion_detector.detect_emotion(frame, face_landmarks)
+                with self.scheduler.measure('emotion'):
+                    emotion_results = self.emotion_detector.detect_emotion(packet, face_landmarks)
                 if emotion_results and emotion_results.get('suspicious', False):
                     if emotion_results.get('suspicious_score', 0) > 0.7:
                         self.alert_manager.add_alert(
@@ -198,25 +424,142 @@ class ExamMonitor:
                 pass
         
         # === BEHAVIOR ANALYSIS (NEW) ===
-        behavior_analysis = self.behavior_analyzer.analyze_pattern(detection_data)
-        if behavior_analysis['risk_level'] == 'high':
-            risk_summary = self.behavior_analyzer.get_risk_summary()
-            if risk_summary:
-                self.alert_manager.add_alert(
-                    f"High risk behavior detected (Risk Score: {risk_summary['current_risk']})",
-                    "high_risk_behavior",
-                    self.notification_system
-                )
+        with self.latency.stage('behavior'):
+            behavior_analysis = self.behavior_analyzer.analyze_pattern(detection_data)
+            if behavior_analysis['risk_level'] == 'high':
+                risk_summary = self.behavior_analyzer.get_risk_summary()
+                if risk_summary:
+                    self.alert_manager.add_alert(
+                        f"High risk behavior detected (Risk Score: {risk_summary['current_risk']})",
+                        "high_risk_behavior",
+                        self.notification_system
+                    )
         
-        # Draw overlays
-        self._draw_overlays(frame, behavior_analysis)
+        self.last_result = {
+            'frame_id': packet.frame_id,
+            'timestamp': packet.timestamp,
+            'detectors_run': sorted(self.scheduler.scheduled),
+            'face_present': detection_results['face_present'],
+            'person_present': detection_results['pose'].pose_landmarks is not None,
+            'people_count': self.face_detector.people_count(packet.timestamp),
+            'face_direction': direction,
+            'gaze': gaze_data,
+            'hands': len(hand_results.multi_hand_landmarks or []) if hand_results else None,
+            'posture': posture_data,
+            'objects': objects_detected,
+            'objects_fresh': fresh_objects,
+            'yolo_imgsz': self.object_detector.img_size,
+            'emotion': emotion_results,
+            'behavior': behavior_analysis,
+            'cheating_score': self.alert_manager.cheating_score,
+            'alerts': self.alert_manager.alert_log[alerts_before:],
+            # Raw MediaPipe output, only needed for drawing
+            'landmarks': {
+                'face': face_landmarks,
+                'pose': detection_results['pose_points'],
+                'hands': landmarks.hand_arrays(hand_results)
+            }
+        }
+        return self.last_result
+    
+    def _adapt_resolution(self, frame_time, result):
+        """Let the controller pick the YOLO input size for the next frames"""
+        behavior = result.get('behavior')
+        risk_level = behavior['risk_level'] if behavior else None
+        old_size = self.object_detector.img_size
+        objects = self.scheduler.detectors.get('objects')
+        size = self.resolution.update(frame_time, self.object_detector.inference_time,
+                                      risk_level, result['timestamp'], objects['rate'] if objects else None)
+        if size != old_size:
+            self.object_detector.set_img_size(size)
+            print(f"🔍 YOLO input size: {old_size} -> {size} ({self.resolution.changes[-1]['reason']})")
+            
+            # Rescale the cost estimate so the scheduler reacts on the next frame
+            if objects:
+                objects['cost'] *= (size / old_size) ** 2
+    
+    def _poll_objects(self, packet):
+        """(objects, frame timestamp) of an async detection completed since the last poll, or None"""
+        completed = self.object_detector.poll()
+        if not completed:
+            return None
+        self.latency.record('staleness', packet.timestamp - completed['timestamp'])
+        return completed['objects'], completed['timestamp']
+    
+    def _take_objects(self, objects, detection_time):
+        """Feed one fresh detection run to people counting and the object evidence"""
+        # People counting reuses the person boxes of full-frame YOLO runs
+        persons = getattr(objects, 'persons', None)
+        if persons is not None:
+            self.face_detector.update_person_boxes(persons, detection_time)
+        
+        # Alerts come from accumulated evidence: one event when an object is confirmed
+        self.alert_manager.update_object_evidence(objects, self.notification_system, detection_time)
+    
+    def _reuse_result(self, packet, gate):
+        """Result for a gated frame: previous detections, new frame id and time
         
-        # Update termination
-        if self.alert_manager.update_exam_termination():
-            if self.alert_manager.should_terminate():
-                self._terminate_exam()
+        Async detections that complete during a static stretch are still taken.
+        """
+        self.frame_skip_count += 1
+        self._update_fps()
+        alerts_before = len(self.alert_manager.alert_log)
+        
+        # A covered or dead camera is as bad as an empty seat
+        absent_threshold = self.config.TIME_THRESHOLDS['person_absent'] if self.config else 3.0
+        if self.frame_gate.unusable_duration(packet.timestamp) > absent_threshold:
+            self.alert_manager.add_alert(
+                f"Camera view unusable ({gate['action']})",
+                "person_absent",
+                self.notification_system
+            )
         
-        return frame
+        result = dict(self.last_result)
+        
+        objects_fresh = False
+        if self.async_objects and self.object_detector.has_pending():
+            completed = self._poll_objects(packet)
+            if completed:
+                objects, detection_time = completed
+                self.object_tracker.update(objects, detection_time, packet.shape, self.object_detector.img_size)
+                self._take_objects(objects, detection_time)
+                self.last_objects = result['objects'] = self.object_tracker.predict(packet.timestamp, packet.shape)
+                objects_fresh = True
+        
+        result.update({
+            'frame_id': packet.frame_id,
+            'timestamp': packet.timestamp,
+            'detectors_run': [],
+            'people_count': self.face_detector.people_count(packet.timestamp),
+            'objects_fresh': objects_fresh,
+            'cheating_score': self.alert_manager.cheating_score,
+            'alerts': self.alert_manager.alert_log[alerts_before:],
+            'gate': gate['action']
+        })
+        self.last_result = result
+        return result
+    
+    def render(self, frame, result):
+        """Draw detections and UI overlays for an analyzed frame"""
+        # Latency numbers refresh once per second so the panel layer stays cached
+        if self.show_latency_panel and time.time() - self.latency_panel_time >= 1.0:
+            self.latency_panel_summary = self.latency.summary()
+            self.latency_panel_time = time.time()
+        
+        status = {
+            'score': self.alert_manager.cheating_score,
+            'fps': self.current_fps,
+            'alerts': self.alert_manager.alerts,
+            'audio_on': self.audio_detector.audio_monitoring if self.audio_detector else False,
+            'violations': self.alert_manager.real_time_metrics['object_violations'],
+            'termination_countdown': self.alert_manager.exam_termination_countdown,
+            'latency': self.latency_panel_summary if self.show_latency_panel else None
+        }
+        
+        # Drawn after all detectors ran (async YOLO letterboxes a copy on submit), so none of them sees the annotations
+        if self.renderer is None:
+            self.renderer = OverlayRenderer(self.overlay_detail)
+        return self.renderer.render(frame, result, status)
     
     def _update_fps(self):
         """Update FPS counter"""
@@ -229,71 +572,40 @@ class ExamMonitor:
             self.fps_counter = 0
             self.fps_start_time = current_time
     
-    def _draw_overlays(self, frame, behavior_analysis=None):
-        """Draw UI overlays with enhanced information"""
-        # Score with risk level
-        score_text = f"Cheating Score: {self.alert_manager.cheating_score}/100"
-        score_color = (0, 0, 255) if self.alert_manager.cheating_score > 50 else (0, 255, 0)
-        cv2.putText(frame, score_text, (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, score_color, 3)
-        
-        # Risk level (NEW)
-        if behavior_analysis:
-            risk_level = behavior_analysis['risk_level']
-            risk_colors = {
-                'high': (0, 0, 255),
-                'medium': (0, 165, 255),
-                'low': (0, 255, 255),
-                'normal': (0, 255, 0)
-            }
-            risk_color = risk_colors.get(risk_level, (255, 255, 255))
-            risk_text = f"Risk Level: {risk_level.upper()} ({behavior_analysis['risk_score']})"
-            cv2.putText(frame, risk_text, (20, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, risk_color, 2)
-        
-        # FPS (NEW)
-        fps_text = f"FPS: {self.current_fps:.1f}"
-        cv2.putText(frame, fps_text, (frame.shape[1] - 150, 50),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        
-        # Alerts
-        y_offset = 130
-        for i, alert in enumerate(self.alert_manager.alerts[-3:]):
-            cv2.putText(frame, f"⚠️ {alert}", (20, y_offset + i * 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        
-        # Status panel (enhanced)
-        panel_y = frame.shape[0] - 120
-        cv2.rectangle(frame, (10, panel_y), (400, frame.shape[0] - 10), (0, 0, 0), -1)
-        cv2.rectangle(frame, (10, panel_y), (400, frame.shape[0] - 10), (255, 255, 255), 2)
-        
-        # Audio status
-        audio_status = "ON" if self.audio_detector.audio_monitoring else "OFF"
-        audio_color = (0, 255, 0) if self.audio_detector.audio_monitoring else (0, 0, 255)
-        cv2.putText(frame, f"Audio: {audio_status}", (20, panel_y + 25),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, audio_color, 2)
-        
-        # Violations
-        cv2.putText(frame, f"Violations: {self.alert_manager.real_time_metrics['object_violations']}",
-                   (20, panel_y + 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # Behavior patterns (NEW)
-        if behavior_analysis and behavior_analysis.get('patterns'):
-            patterns_text = f"Patterns: {', '.join(behavior_analysis['patterns'][:2])}"
-            cv2.putText(frame, patterns_text, (20, panel_y + 75),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
-        
-        # Termination warning
-        if self.alert_manager.exam_termination_countdown and self.alert_manager.exam_termination_countdown > 0:
-            cv2.rectangle(frame, (0, 0), (frame.shape[1], frame.shape[0]), (0, 0, 255), -1)
-            warning_text = f"🚨 EXAM WILL CLOSE IN {self.alert_manager.exam_termination_countdown:.1f}s!"
-            text_size = cv2.getTextSize(warning_text, cv2.FONT_HERSHEY_SIMPLEX, 2.0, 4)[0]
-            text_x = (frame.shape[1] - text_size[0]) // 2
-            text_y = (frame.shape[0] + text_size[1]) // 2
-            cv2.putText(frame, warning_text, (text_x, text_y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 4)
+    def get_stage_metrics(self):
+        """Per-stage latency statistics (count, mean, p50/p95/p99, max in ms)"""
+        return self.latency.summary()
+    
+    def get_resolution_stats(self):
+        """YOLO input size statistics (fixed size when not adaptive)"""
+        if self.resolution:
+            return self.resolution.get_stats()
+        return {'img_size': self.object_detector.img_size}
+    
+    def yolo_roi(self, now):
+        """Crop for the next YOLO run: the person ROI, except for a periodic
+        full-frame run whose person boxes count everyone in the room"""
+        if self.person_roi is None or self.object_detector.person_id is None:
+            return self.person_roi
+        if self.last_person_scan is None or now < self.last_person_scan or \
+                now - self.last_person_scan >= self.person_scan_interval:
+            self.last_person_scan = now
+            return None
+        return self.person_roi
+    
+    def get_gate_stats(self):
+        """Frame gating decision counts (None when gating is disabled)"""
+        return self.frame_gate.get_stats() if self.frame_gate else None
     
     def _terminate_exam(self):
         """Terminate exam"""
         print("🚨 EXAM TERMINATED!")
+        self.terminated = True
+        
+        # Frames fed from outside (server): the owner stops this stream and saves the report
+        if not self.cap:
+            return
+        
         self.save_final_report()
         self.cleanup()
         exit(0)
@@ -302,15 +614,23 @@ class ExamMonitor:
         """Save final report"""
         try:
             report = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': datetime.fromtimestamp(clock.now()).isoformat(),
                 'final_score': self.alert_manager.cheating_score,
                 'total_violations': sum(self.alert_manager.real_time_metrics.values()),
                 'incidents': self.alert_manager.cheating_incidents,
-                'exam_duration': time.time() - self.session_start_time,
-                'metrics': self.alert_manager.real_time_metrics.copy()
+                'exam_duration': clock.now() - self.session_start_time,
+                'metrics': self.alert_manager.real_time_metrics.copy(),
+                'scheduler': self.scheduler.get_stats(),
+                'latency_ms': self.latency.summary(),
+                'gating': self.get_gate_stats(),
+                'object_detector': self.object_detector.get_stats(),
+                'face_cascade': self.face_detector.get_stats(),
+                'startup_s': self.startup_times,
+                'yolo_imgsz': self.get_resolution_stats()
             }
             
-            filename = f"exam_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            prefix = f"exam_report_{self.name}" if self.name else "exam_report"
+            filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(report, f, indent=2, ensure_ascii=False)
             
@@ -324,8 +644,13 @@ class ExamMonitor:
         print("🎓 Advanced AI Exam Monitoring System")
         print("=" * 60)
         print("📋 Controls:")
-        print("   - Press 'q' to quit")
-        print("   - Press 'a' to toggle audio")
+        if self.headless:
+            print("   - Headless mode: press Ctrl+C to quit")
+        else:
+            print("   - Press 'q' to quit")
+            print("   - Press 'a' to toggle audio")
+            print("   - Press 'p' to toggle the latency panel")
+            print("   - Press 'd' to change overlay detail (none/minimal/full)")
         print("\n✨ Features:")
         print("   - Fast face detection")
         print("   - Optimized object detection (YOLO)")
@@ -337,7 +662,8 @@ class ExamMonitor:
         if NEW_MODULES_AVAILABLE:
             print("   - Emotion detection")
         print("\n🚀 Performance Optimizations:")
-        print("   - Adaptive frame skipping")
+        print("   - Threaded capture (latest frame only)")
+        print("   - Deadline-aware detector scheduling")
         print("   - Result caching")
         print("   - GPU acceleration")
         print("   - Parallel processing")
@@ -348,15 +674,27 @@ class ExamMonitor:
             alert_callback=lambda msg, atype: self.alert_manager.add_alert(msg, atype, self.notification_system)
         )
         
+        self.grabber.start()
+        last_status_time = time.time()
+        
         try:
             while True:
-                ret, frame = self.cap.read()
+                ret, frame, timestamp = self.grabber.read()
                 if not ret:
+                    if self.grabber.running:
+                        continue  # No new frame yet
                     self.logger.error("Could not read frame")
                     break
                 
                 # Process frame
-                processed_frame = self.process_frame(frame)
+                processed_frame = self.process_frame(frame, timestamp)
+                
+                if self.headless:
+                    # No window: report status every few seconds instead
+                    if time.time() - last_status_time >= 10.0:
+                        last_status_time = time.time()
+                        print(f"📊 FPS: {self.current_fps:.1f} | Score: {self.alert_manager.cheating_score}/100")
+                    continue
                 
                 # Display
                 cv2.imshow('AI Exam Monitor', processed_frame)
@@ -365,6 +703,10 @@ class ExamMonitor:
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord('q'):
                     break
+                elif key == ord('p'):
+                    self.show_latency_panel = not self.show_latency_panel
+                elif key == ord('d'):
+                    print(f"🖼️ Overlay detail: {self.renderer.cycle_level()}")
                 elif key == ord('a'):
                     if self.audio_detector.audio_monitoring:
                         self.audio_detector.stop_monitoring()
@@ -385,16 +727,31 @@ class ExamMonitor:
         print("\n" + "=" * 60)
         print("🛑 Shutting down...")
         
-        self.audio_detector.stop_monitoring()
+        if self.audio_detector:
+            self.audio_detector.stop_monitoring()
+        if self.grabber:
+            self.grabber.stop()
+        self.object_detector.close()
         if self.cap:
             self.cap.release()
-        cv2.destroyAllWindows()
+        if not self.headless:
+            cv2.destroyAllWindows()
         
         print("\n📊 Final Statistics:")
         print(f"   Score: {self.alert_manager.cheating_score}/100")
-        print(f"   Duration: {time.time() - self.session_start_time:.1f}s")
+        print(f"   Duration: {clock.now() - self.session_start_time:.1f}s")
         print(f"   Incidents: {len(self.alert_manager.cheating_incidents)}")
         print(f"   Violations: {self.alert_manager.real_time_metrics['object_violations']}")
+        if self.frames_processed:
+            print(f"   Processing: {self.frames_processed / self.processing_time:.1f} frames/s "
+                  f"({'headless' if self.headless else 'with rendering'})")
+        if self.frame_gate:
+            gate_stats = self.frame_gate.get_stats()
+            print(f"   Gated: {gate_stats['skip_rate'] * 100:.1f}% of frames reused previous results")
+        if self.grabber:
+            capture_stats = self.grabber.get_stats()
+            print(f"   Frames: {capture_stats['captured']} captured, {capture_stats['dropped']} dropped"
+                  f"{' (capture failed: camera lost or end of video)' if capture_stats['failed'] else ''}")
         print("=" * 60)
 
 
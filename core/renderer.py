@@ -0,0 +1,245 @@
+"""
+Level-of-Detail Overlay Renderer
+عرض الطبقات المرئية بمستويات تفصيل مختلفة
+"""
+
+import cv2
+import numpy as np
+
+
+def _connections(connection_set):
+    """Convert a MediaPipe connection set into an (N, 2) index array"""
+    return np.array(sorted(connection_set), dtype=np.int32)
+
+
+class OverlayRenderer:
+    """Draws detections and the status HUD at a chosen level of detail
+
+    none:    only the exam termination warning
+    minimal: face/hand boxes, object boxes and status text
+    full:    face mesh tessellation, pose and hand skeletons as well
+    """
+
+    LEVELS = ('none', 'minimal', 'full')
+
+    RISK_COLORS = {
+        'high': (0, 0, 255),
+        'medium': (0, 165, 255),
+        'low': (0, 255, 255),
+        'normal': (0, 255, 0)
+    }
+
+    HUD_HEIGHT = 230
+    PANEL_SIZE = (390, 110)  # width, height
+
+    def __init__(self, level='full'):
+        """Initialize renderer"""
+        self.level = level if level in self.LEVELS else 'full'
+
+        # Connection index arrays, built once
+        import mediapipe as mp
+        self.face_connections = _connections(mp.solutions.face_mesh.FACEMESH_TESSELATION)
+        self.pose_connections = _connections(mp.solutions.pose.POSE_CONNECTIONS)
+        self.hand_connections = _connections(mp.solutions.hands.HAND_CONNECTIONS)
+
+        # Cached layers: rebuilt only when the displayed values change
+        self.hud_key = None
+        self.hud_layer = None
+        self.hud_mask = None
+        self.panel_base = None
+        self.panel_key = None
+        self.panel_image = None
+        self.latency_key = None
+        self.latency_image = None
+
+    def cycle_level(self):
+        """Switch to the next level of detail"""
+        self.level = self.LEVELS[(self.LEVELS.index(self.level) + 1) % len(self.LEVELS)]
+        return self.level
+
+    def render(self, frame, result, status):
+        """Draw an analyzed frame
+
+        result: ExamMonitor.analyze_frame output
+        status: score, fps, alerts, audio_on, violations, termination_countdown, latency
+        """
+        if self.level != 'none':
+            self._draw_landmarks(frame, result['landmarks'])
+            self._draw_objects(frame, result['objects'])
+            self._draw_hud(frame, result['behavior'], status)
+            self._draw_panel(frame, result['behavior'], status)
+            if status.get('latency'):
+                self._draw_latency(frame, status['latency'])
+
+        self._draw_termination(frame, status['termination_countdown'])
+        return frame
+
+    # === Landmarks ===
+
+    @staticmethod
+    def _to_pixels(points, width, height):
+        """Normalized landmark array -> (N, 2) int32 pixel array"""
+        return (points[:, :2] * (width, height)).astype(np.int32)
+
+    @staticmethod
+    def _draw_segments(frame, points, connections, color, thickness, valid=None):
+        """Draw all connections with a single polylines call"""
+        if valid is not None:
+            connections = connections[valid[connections[:, 0]] & valid[connections[:, 1]]]
+        if len(connections):
+            segments = points[connections]  # (N, 2, 2)
+            cv2.polylines(frame, segments, False, color, thickness)
+
+    @staticmethod
+    def _draw_box(frame, points, color):
+        """Draw the bounding box of a point set"""
+        x1, y1 = points.min(axis=0)
+        x2, y2 = points.max(axis=0)
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+
+    def _draw_landmarks(self, frame, landmarks):
+        """Draw face, pose and hand landmark arrays (shared with the detectors)"""
+        h, w = frame.shape[:2]
+        full = self.level == 'full'
+
+        face = landmarks['face']
+        if face is not None:
+            points = self._to_pixels(face, w, h)
+            if full:
+                self._draw_segments(frame, points, self.face_connections, (0, 255, 0), 1)
+            else:
+                self._draw_box(frame, points, (0, 255, 0))
+
+        pose = landmarks['pose']
+        if full and pose is not None:
+            points = self._to_pixels(pose, w, h)
+            visible = pose[:, 3] > 0.5
+            self._draw_segments(frame, points, self.pose_connections, (245, 245, 245), 2, visible)
+
+        for hand in landmarks['hands']:
+            points = self._to_pixels(hand, w, h)
+            if full:
+                self._draw_segments(frame, points, self.hand_connections, (0, 255, 0), 2)
+                for x, y in points:
+                    cv2.circle(frame, (int(x), int(y)), 2, (255, 0, 0), 2)
+            else:
+                self._draw_box(frame, points, (255, 0, 0))
+
+    def _draw_objects(self, frame, objects_detected):
+        """Draw object bounding boxes"""
+        for obj in objects_detected:
+            x1, y1, x2, y2 = obj['position']
+
+            # Color based on severity
+            if obj['severity'] == 'high':
+                color = (0, 0, 255)  # Red
+            elif obj['name'] in ['book', 'notebook', 'paper']:
+                color = (0, 165, 255)  # Orange
+            else:
+                color = (0, 255, 255)  # Yellow
+
+            # Tracked boxes carry an id; extrapolated ones are drawn thinner
+            label = f"{obj['name']} {obj['confidence']:.2f}"
+            if 'track_id' in obj:
+                label = f"{obj['name']} #{obj['track_id']} {obj['confidence']:.2f}"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 1 if obj.get('predicted') else 2)
+            cv2.putText(frame, label, (x1, y1 - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    # === Cached HUD layers ===
+
+    def _draw_hud(self, frame, behavior_analysis, status):
+        """Score, risk level, FPS and recent alerts (text over video, cached as a masked layer)"""
+        width = frame.shape[1]
+        height = min(self.HUD_HEIGHT, frame.shape[0])
+        risk = (behavior_analysis['risk_level'], behavior_analysis['risk_score']) if behavior_analysis else None
+        key = (width, height, status['score'], risk, round(status['fps'], 1), tuple(status['alerts'][-3:]))
+
+        if key != self.hud_key:
+            layer = np.zeros((height, width, 3), dtype=np.uint8)
+
+            score_color = (0, 0, 255) if status['score'] > 50 else (0, 255, 0)
+            cv2.putText(layer, f"Cheating Score: {status['score']}/100", (20, 50),
+                       cv2.FONT_HERSHEY_SIMPLEX, 1, score_color, 3)
+
+            if risk:
+                risk_color = self.RISK_COLORS.get(risk[0], (255, 255, 255))
+                cv2.putText(layer, f"Risk Level: {risk[0].upper()} ({risk[1]})", (20, 90),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, risk_color, 2)
+
+            cv2.putText(layer, f"FPS: {status['fps']:.1f}", (width - 150, 50),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+            for i, alert in enumerate(status['alerts'][-3:]):
+                cv2.putText(layer, f"⚠️ {alert}", (20, 130 + i * 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+            self.hud_layer = layer
+            self.hud_mask = layer.any(axis=2)[..., None]
+            self.hud_key = key
+
+        np.copyto(frame[:height], self.hud_layer, where=self.hud_mask)
+
+    def _draw_panel(self, frame, behavior_analysis, status):
+        """Bottom status panel (opaque, copied in as one block)"""
+        panel_w, panel_h = self.PANEL_SIZE
+        if frame.shape[0] < panel_h + 10 or frame.shape[1] < panel_w + 10:
+            return
+
+        # Static background, pre-rendered once
+        if self.panel_base is None:
+            base = np.zeros((panel_h, panel_w, 3), dtype=np.uint8)
+            cv2.rectangle(base, (0, 0), (panel_w - 1, panel_h - 1), (255, 255, 255), 2)
+            self.panel_base = base
+
+        patterns = tuple(behavior_analysis['patterns'][:2]) if behavior_analysis else ()
+        key = (status['audio_on'], status['violations'], patterns)
+
+        if key != self.panel_key:
+            panel = self.panel_base.copy()
+
+            audio_color = (0, 255, 0) if status['audio_on'] else (0, 0, 255)
+            cv2.putText(panel, f"Audio: {'ON' if status['audio_on'] else 'OFF'}", (10, 25),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, audio_color, 2)
+            cv2.putText(panel, f"Violations: {status['violations']}", (10, 50),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            if patterns:
+                cv2.putText(panel, f"Patterns: {', '.join(patterns)}", (10, 75),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+
+            self.panel_image = panel
+            self.panel_key = key
+
+        panel_y = frame.shape[0] - 10 - panel_h
+        frame[panel_y:panel_y + panel_h, 10:10 + panel_w] = self.panel_image
+
+    def _draw_latency(self, frame, stages):
+        """Per-stage p50/p95 latency panel (opaque, rebuilt when the numbers change)"""
+        panel_w, panel_h = 250, 30 + 20 * len(stages)
+        if frame.shape[1] < panel_w + 10 or frame.shape[0] < panel_h + 70:
+            return
+
+        key = tuple((name, round(s['p50_ms'], 1), round(s['p95_ms'], 1)) for name, s in stages.items())
+        if key != self.latency_key:
+            panel = np.zeros((panel_h, panel_w, 3), dtype=np.uint8)
+            cv2.putText(panel, "Stage     p50   p95 (ms)", (10, 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+            for i, (name, p50, p95) in enumerate(key):
+                cv2.putText(panel, f"{name[:10]:<10}{p50:6.1f}{p95:6.1f}", (10, 40 + i * 20),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+            self.latency_image = panel
+            self.latency_key = key
+
+        x = frame.shape[1] - 10 - panel_w
+        frame[70:70 + panel_h, x:x + panel_w] = self.latency_image
+
+    def _draw_termination(self, frame, countdown):
+        """Full-screen termination warning (shown at every level)"""
+        if countdown and countdown > 0:
+            frame[:] = (0, 0, 255)
+            warning_text = f"🚨 EXAM WILL CLOSE IN {countdown:.1f}s!"
+            text_size = cv2.getTextSize(warning_text, cv2.FONT_HERSHEY_SIMPLEX, 2.0, 4)[0]
+            text_x = (frame.shape[1] - text_size[0]) // 2
+            text_y = (frame.shape[0] + text_size[1]) // 2
+            cv2.putText(frame, warning_text, (text_x, text_y),
+                       cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 4)
@@ -0,0 +1,243 @@
+"""
+Offline Replay and Throughput Benchmark
+إعادة تشغيل التسجيلات وقياس الأداء بدون كاميرا
+"""
+
+import glob
+import json
+import os
+import time
+
+import cv2
+
+from utils import clock
+from utils.clock import ReplayClock
+from utils.frame_packet import FramePacket
+from .monitor import ExamMonitor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def _image_paths(source):
+    """Return sorted image paths for a directory or glob pattern, None for a video file"""
+    if os.path.isdir(source):
+        return sorted(
+            path for path in glob.glob(os.path.join(source, '*'))
+            if path.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    if any(char in source for char in '*?['):
+        return sorted(glob.glob(source))
+    return None
+
+
+def iter_frames(source):
+    """Yield BGR frames from a video file, an image directory or a glob pattern"""
+    paths = _image_paths(source)
+    if paths is not None:
+        for path in paths:
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {source}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def probe_fps(source, default=30.0):
+    """Return the recorded frame rate of a video (default for image sequences)"""
+    if _image_paths(source) is not None:
+        return default
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+    cap.release()
+    return fps if fps and fps > 0 else default
+
+
+class ReplayRunner:
+    """Feeds recorded frames through the full pipeline as fast as possible"""
+
+    def __init__(self, source, fps=None, headless=True, max_frames=None, respect_budget=False, batch_size=1):
+        """Initialize replay
+
+        fps: simulated capture rate (defaults to the video's own rate)
+        respect_budget: keep the frame time budget; by default every detector
+                        runs at its target rate on simulated time, so decisions
+                        are identical on every machine
+        batch_size: buffer this many frames and run YOLO over the due ones in
+                    one batched call (1 = YOLO is scheduled frame by frame)
+        """
+        self.source = source
+        self.fps = fps or probe_fps(source)
+        self.max_frames = max_frames
+        self.batch_size = max(1, batch_size)
+
+        # Simulated time must be installed before the detectors read the clock. It starts at
+        # the recording's modification time (now for image sequences), so alert times and the
+        # report date are real dates instead of 1970
+        self.clock = ReplayClock(os.path.getmtime(source) if os.path.isfile(source) else time.time())
+        self.previous_clock = clock.set_clock(self.clock)
+        try:
+            self.monitor = ExamMonitor(
+                open_capture=False,
+                name='replay',
+                headless=headless,
+                enable_notifications=False
+            )
+        except Exception:
+            clock.set_clock(self.previous_clock)
+            raise
+
+        if not respect_budget:
+            self.monitor.scheduler.budget = float('inf')
+
+        # Results must belong to the frame they were computed on for reproducible runs,
+        # and the YOLO input size must not depend on this machine's speed
+        self.monitor.async_objects = False
+        self.monitor.resolution = None
+
+        # Batched mode: YOLO runs here at its target rate instead of in the scheduler
+        self.object_interval = None
+        if self.batch_size > 1:
+            objects_rate = self.monitor.scheduler.detectors['objects']['rate']
+            self.object_interval = 1.0 / objects_rate
+            self.monitor.scheduler.unregister('objects')
+        self.last_object_run = None
+
+    def run(self):
+        """Replay all frames and return the benchmark report"""
+        frames = 0
+        start = time.perf_counter()
+
+        try:
+            if self.batch_size > 1:
+                frames = self._run_batched()
+            else:
+                for frame in iter_frames(self.source):
+                    if self.max_frames and frames >= self.max_frames:
+                        break
+
+                    self.monitor.process_frame(frame, self.clock.now())
+                    frames += 1
+                    self.clock.advance(1.0 / self.fps)
+
+                    if self.monitor.terminated:
+                        break
+        finally:
+            wall_time = time.perf_counter() - start
+            clock.set_clock(self.previous_clock)
+            self.monitor.object_detector.close()
+
+        return self._build_report(frames, wall_time)
+
+    def _run_batched(self):
+        """Replay in chunks of batch_size frames with one YOLO call per chunk"""
+        frames = 0
+        buffer = []
+        source = iter_frames(self.source)
+
+        while not self.monitor.terminated:
+            frame = None if self.max_frames and frames + len(buffer) >= self.max_frames else next(source, None)
+            if frame is not None:
+                buffer.append(FramePacket(frame, self.clock.now(), frames + len(buffer) + 1))
+                self.clock.advance(1.0 / self.fps)
+                if len(buffer) < self.batch_size:
+                    continue
+            if not buffer:
+                break
+
+            # Pick the frames that are due for YOLO and detect them together
+            due = []
+            for index, packet in enumerate(buffer):
+                if self.last_object_run is None or packet.timestamp - self.last_object_run >= self.object_interval:
+                    due.append(index)
+                    self.last_object_run = packet.timestamp
+            batch_objects = [None] * len(buffer)
+            if due:
+                with self.monitor.latency.stage('objects'):
+                    detections = self.monitor.object_detector.detect_batch(
+                        [buffer[i] for i in due],
+                        [self.monitor.yolo_roi(buffer[i].timestamp) for i in due]
+                    )
+                for index, objects in zip(due, detections):
+                    batch_objects[index] = objects
+
+            # Rewind the clock so alerts carry each frame's own timestamp
+            resume = self.clock.now()
+            for packet, objects in zip(buffer, batch_objects):
+                self.clock.set(packet.timestamp)
+                self.monitor.process_frame(packet, objects=objects)
+                frames += 1
+                if self.monitor.terminated:
+                    break
+            self.clock.set(resume)
+            buffer = []
+
+        return frames
+
+    def _build_report(self, frames, wall_time):
+        """Collect throughput, latency and alert results"""
+        alert_manager = self.monitor.alert_manager
+        return {
+            'source': self.source,
+            'frames': frames,
+            'simulated_fps': self.fps,
+            'batch_size': self.batch_size,
+            'headless': self.monitor.headless,
+            'wall_time_s': wall_time,
+            'throughput_fps': frames / wall_time if wall_time > 0 else 0.0,
+            'latency_ms': self.monitor.latency.summary(),
+            'scheduler': self.monitor.scheduler.get_stats(),
+            'gating': self.monitor.get_gate_stats(),
+            'face_cascade': self.monitor.face_detector.get_stats(),
+            'yolo_imgsz': self.monitor.get_resolution_stats(),
+            'final_score': alert_manager.cheating_score,
+            'incidents': len(alert_manager.cheating_incidents),
+            'alerts': list(alert_manager.alert_log)
+        }
+
+    @staticmethod
+    def print_report(report):
+        """Print a readable benchmark summary"""
+        print("=" * 60)
+        print(f"🎬 Replay: {report['source']}")
+        print("=" * 60)
+        print(f"   Frames: {report['frames']} in {report['wall_time_s']:.2f}s")
+        print(f"   Throughput: {report['throughput_fps']:.1f} frames/s "
+              f"({'headless' if report['headless'] else 'with rendering'})")
+
+        print("\n⏱️ Latency (ms):")
+        print(f"   {'stage':<10} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for name, stats in report['latency_ms'].items():
+            print(f"   {name:<10} {stats['count']:>6} {stats['p50_ms']:>8.2f} "
+                  f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+        if report['gating']:
+            counts = report['gating']['counts']
+            print(f"\n🚦 Gating: {report['gating']['skip_rate'] * 100:.1f}% skipped "
+                  f"({', '.join(f'{action} {count}' for action, count in counts.items())})")
+
+        cascade = report['face_cascade']
+        print(f"\n🧍 Face cascade: Pose on {cascade['pose_run_rate'] * 100:.1f}% of frames, "
+              f"FaceDetection recovery on {cascade['recovery_rate'] * 100:.1f}%")
+
+        print(f"\n🚨 Alerts: {len(report['alerts'])} (final score {report['final_score']}/100)")
+        for alert in report['alerts']:
+            print(f"   [{alert['timestamp']}] {alert['type']}: {alert['message']}")
+        print("=" * 60)
+
+    @staticmethod
+    def save_report(report, filename):
+        """Save report as JSON"""
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📄 Report saved: {filename}")
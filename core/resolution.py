@@ -0,0 +1,119 @@
+"""
+Adaptive YOLO Input Resolution
+التحكم التلقائي بدقة إدخال YOLO حسب زمن الإطار ومستوى الخطورة
+"""
+
+from collections import Counter
+
+
+class ResolutionController:
+    """Moves YOLO imgsz between fixed steps to hold a target frame time
+
+    Only YOLO's share of the frame time (inference time x runs per frame) is
+    attributed to imgsz. Steps down when the smoothed frame time exceeds the
+    target and the rest of the frame would fit without that share, so a slow
+    pipeline elsewhere does not cost recall for nothing. Steps up when the
+    predicted share at the next step still fits (YOLO cost ~ imgsz^2), and
+    jumps up when the risk level rises so suspicious moments get full detail.
+    """
+
+    def __init__(self, steps=(320, 416, 480, 640), initial=480, target_ms=33.0, cooldown=2.0):
+        """Initialize controller"""
+        self.steps = sorted(steps)
+        self.index = min(range(len(self.steps)), key=lambda i: abs(self.steps[i] - initial))
+        self.default_index = self.index
+        self.target = target_ms / 1000.0
+        self.cooldown = cooldown  # seconds between regular step changes
+
+        # Smoothed measurements (seconds)
+        self.alpha = 0.1
+        self.frame_time = None
+        self.frame_interval = None
+        self.yolo_time = None
+        self.last_update = None
+
+        self.yolo_rate = None
+
+        self.last_change = None
+        self.changes = []
+        self.frames_at = Counter()
+
+    @property
+    def img_size(self):
+        """Current YOLO input size"""
+        return self.steps[self.index]
+
+    def update(self, frame_time, yolo_time, risk_level=None, now=0.0, yolo_rate=None):
+        """Feed one frame's measurements; returns the (possibly new) imgsz
+
+        yolo_rate: scheduled YOLO runs per second (None = every frame)
+        """
+        self.frame_time = frame_time if self.frame_time is None else \
+            self.frame_time + self.alpha * (frame_time - self.frame_time)
+        if self.last_update is not None and now > self.last_update:
+            interval = now - self.last_update
+            self.frame_interval = interval if self.frame_interval is None else \
+                self.frame_interval + self.alpha * (interval - self.frame_interval)
+        self.last_update = now
+        self.yolo_rate = yolo_rate
+        if yolo_time:
+            self.yolo_time = yolo_time if self.yolo_time is None else \
+                self.yolo_time + self.alpha * (yolo_time - self.yolo_time)
+        self.frames_at[self.img_size] += 1
+
+        # Rising risk overrides the cooldown: the floor applies immediately
+        floor = self._risk_floor(risk_level)
+        if self.index < floor:
+            return self._change(floor, f"risk {risk_level}", now)
+
+        if self.last_change is not None and now - self.last_change < self.cooldown:
+            return self.img_size
+
+        if self.frame_time > self.target * 1.1 and self.index > floor and \
+                self.frame_time - self.yolo_share() <= self.target:
+            return self._change(self.index - 1, "over budget", now)
+
+        if self.index + 1 < len(self.steps) and self._fits(self.index + 1):
+            return self._change(self.index + 1, "headroom", now)
+
+        return self.img_size
+
+    def _risk_floor(self, risk_level):
+        """Lowest step index allowed at this risk level"""
+        if risk_level == 'high':
+            return len(self.steps) - 1
+        if risk_level == 'medium':
+            return self.default_index
+        return 0
+
+    def yolo_share(self):
+        """Smoothed YOLO seconds per frame: inference time x scheduled runs per frame"""
+        if self.yolo_time is None:
+            return 0.0
+        if not self.yolo_rate:
+            return self.yolo_time
+        interval = self.frame_interval if self.frame_interval is not None else self.frame_time
+        return self.yolo_time * min(1.0, self.yolo_rate * interval)
+
+    def _fits(self, index):
+        """Predicted frame time at another step stays under the target"""
+        if self.yolo_time is None:
+            return False
+        growth = (self.steps[index] / self.img_size) ** 2 - 1
+        return self.frame_time + self.yolo_share() * growth < self.target * 0.9
+
+    def _change(self, index, reason, now):
+        """Switch step and log the decision"""
+        self.changes.append({'time': now, 'from': self.img_size, 'to': self.steps[index], 'reason': reason})
+        self.index = index
+        self.last_change = now
+        return self.img_size
+
+    def get_stats(self):
+        """Current size, frames per size and change log"""
+        return {
+            'img_size': self.img_size,
+            'frames_at': dict(self.frames_at),
+            'changes': len(self.changes),
+            'last_changes': self.changes[-10:]
+        }
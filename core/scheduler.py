@@ -0,0 +1,151 @@
+"""
+Deadline-Aware Detector Scheduler
+جدولة الكواشف حسب الميزانية الزمنية
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils import clock
+
+
+class DetectorScheduler:
+    """Decides each frame which detectors fit into the frame time budget"""
+
+    def __init__(self, budget_ms=33.0, history_size=100, latency_tracker=None):
+        """Initialize scheduler with a per-frame budget in milliseconds"""
+        self.budget = budget_ms / 1000.0
+        self.detectors = {}
+        self.latency_tracker = latency_tracker
+
+        # Cost smoothing (exponential moving average)
+        self.cost_alpha = 0.2
+
+        # Decision log for inspection
+        self.decisions = deque(maxlen=history_size)
+        self.last_decision = None
+        self.scheduled = set()
+
+    def register(self, name, rate=None, priority=1, min_rate=None, required=False, initial_cost_ms=10.0):
+        """Register a detector
+
+        rate: target runs per second (None = every frame)
+        priority: higher runs first when the budget is tight
+        min_rate: runs per second guaranteed even over budget (None = no guarantee)
+        required: always runs, its cost is reserved from the budget first
+        """
+        self.detectors[name] = {
+            'rate': rate,
+            'priority': priority,
+            'min_rate': min_rate,
+            'required': required,
+            'cost': initial_cost_ms / 1000.0,
+            'last_run': None,
+            'runs': 0,
+            'skips': 0
+        }
+
+    def unregister(self, name):
+        """Remove a detector (e.g. when it is driven from outside)"""
+        self.detectors.pop(name, None)
+        self.scheduled.discard(name)
+
+    def plan(self, now=None):
+        """Choose the detectors to run this frame and return their names"""
+        now = clock.now() if now is None else now
+        used = 0.0
+        selected = []
+        forced = []
+        candidates = []
+
+        for name, det in self.detectors.items():
+            if det['required']:
+                selected.append(name)
+                used += det['cost']
+                continue
+
+            waited = None if det['last_run'] is None else now - det['last_run']
+
+            # Not due yet at its target rate
+            if det['rate'] and waited is not None and waited < 1.0 / det['rate']:
+                continue
+
+            # Starvation guard: over budget or not, keep the minimum rate
+            if det['min_rate'] and (waited is None or waited >= 1.0 / det['min_rate']):
+                forced.append(name)
+                continue
+
+            # Urgency grows with how many periods the detector has waited
+            urgency = 1.0 if waited is None or not det['rate'] else waited * det['rate']
+            candidates.append((det['priority'] * urgency, name))
+
+        for name in forced:
+            selected.append(name)
+            used += self.detectors[name]['cost']
+
+        skipped = []
+        for _, name in sorted(candidates, reverse=True):
+            cost = self.detectors[name]['cost']
+            if used + cost <= self.budget:
+                selected.append(name)
+                used += cost
+            else:
+                skipped.append(name)
+
+        for name in self.detectors:
+            if name in selected:
+                self.detectors[name]['last_run'] = now
+                self.detectors[name]['runs'] += 1
+            elif name in skipped:
+                self.detectors[name]['skips'] += 1
+
+        self.scheduled = set(selected)
+        self.last_decision = {
+            'time': now,
+            'run': selected,
+            'forced': forced,
+            'skipped': skipped,
+            'estimated_ms': used * 1000.0,
+            'budget_ms': self.budget * 1000.0
+        }
+        self.decisions.append(self.last_decision)
+        return self.scheduled
+
+    def should_run(self, name):
+        """Check if detector was selected by the last plan"""
+        return name in self.scheduled
+
+    def record(self, name, elapsed, latency=True):
+        """Record measured run time (seconds) of a detector
+
+        latency=False only updates the cost, for detectors whose parts are
+        already recorded as their own latency stages
+        """
+        det = self.detectors.get(name)
+        if det:
+            det['cost'] += self.cost_alpha * (elapsed - det['cost'])
+        if latency and self.latency_tracker:
+            self.latency_tracker.record(name, elapsed)
+
+    @contextmanager
+    def measure(self, name, latency=True):
+        """Time the enclosed block and record it as the detector's cost"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, latency)
+
+    def get_stats(self):
+        """Get per-detector scheduling statistics"""
+        return {
+            name: {
+                'cost_ms': det['cost'] * 1000.0,
+                'runs': det['runs'],
+                'skips': det['skips'],
+                'rate': det['rate'],
+                'priority': det['priority']
+            }
+            for name, det in self.detectors.items()
+        }
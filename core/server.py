@@ -0,0 +1,179 @@
+"""
+Multi-Stream Monitoring Server
+خادم مراقبة عدة كاميرات في عملية واحدة
+"""
+
+import time
+
+import cv2
+
+# Import modules
+try:
+    from config import Config
+except ImportError:
+    Config = None
+
+from detectors import ObjectDetector
+from utils import setup_logger, FramePacket
+from .capture import FrameGrabber
+from .monitor import ExamMonitor, NEW_MODULES_AVAILABLE
+
+if NEW_MODULES_AVAILABLE:
+    from notification_system import NotificationSystem
+
+
+class MonitoringServer:
+    """Monitors many video sources in one process, sharing a single YOLO model"""
+
+    def __init__(self, sources, names=None):
+        """Open every source and build its per-stream detector state"""
+        self.config = Config if Config else None
+        self.logger = setup_logger()
+
+        # One YOLO model for all streams, fed with cross-stream batches
+        self.object_detector = ObjectDetector(self.config, use_worker=False)
+        self.object_detector.warm_up()
+        self.notification_system = NotificationSystem() if NEW_MODULES_AVAILABLE else None
+
+        buffer_size = self.config.CAPTURE_BUFFER_SIZE if self.config else 2
+        self.streams = {}
+
+        for index, source in enumerate(sources):
+            name = names[index] if names else f"stream{index}"
+
+            cap = cv2.VideoCapture(source)
+            if not cap.isOpened():
+                self.logger.error(f"Could not open source {source} ({name})")
+                continue
+
+            # Per-stream state: MediaPipe graphs, histories, AlertManager, BehaviorAnalyzer
+            monitor = ExamMonitor(
+                object_detector=self.object_detector,
+                notification_system=self.notification_system,
+                open_capture=False,
+                name=name,
+                headless=True
+            )
+            # Object detection is batched across streams here, not scheduled per stream
+            monitor.scheduler.unregister('objects')
+
+            self.streams[name] = {
+                'monitor': monitor,
+                'cap': cap,
+                'grabber': FrameGrabber(cap, buffer_size),
+                'frames': 0,
+                'latest': None,            # Newest packet, until YOLO has run on it
+                'objects_due': 0.0,        # When this stream's next YOLO run is due
+                'pending_objects': None    # (objects, frame time) waiting for the next frame
+            }
+            print(f"📹 {name}: {source}")
+
+        # Batched YOLO runs each stream at the configured object detection rate
+        objects_rate = self.config.get_detector_schedule()['objects']['rate'] if self.config else 5.0
+        self.object_interval = 1.0 / objects_rate
+
+        # Statistics
+        self.start_time = None
+        self.batches = 0
+        self.batched_frames = 0
+        self.finished_frames = 0
+
+    def run(self, duration=None):
+        """Main loop: gather the newest frame of every stream, batch YOLO, update each stream"""
+        print("=" * 60)
+        print(f"🎓 Multi-stream monitoring: {len(self.streams)} streams")
+        print("=" * 60)
+
+        for stream in self.streams.values():
+            stream['grabber'].start()
+
+        self.start_time = time.time()
+
+        try:
+            while self.streams:
+                ready = []
+                for name, stream in list(self.streams.items()):
+                    ok, frame, timestamp = stream['grabber'].read(timeout=0)
+                    if ok:
+                        packet = FramePacket(frame, timestamp, stream['frames'] + 1)
+                        stream['latest'] = packet
+                        ready.append((name, packet))
+                    elif not stream['grabber'].running:
+                        self._close_stream(name)
+
+                if not ready:
+                    time.sleep(0.001)
+                    continue
+
+                # One YOLO call for every stream that is due, each on its newest packet;
+                # a stream without a new frame this round gets its result with the next one
+                now = time.time()
+                due = [
+                    (name, stream['latest']) for name, stream in self.streams.items()
+                    if stream['latest'] is not None and now >= stream['objects_due']
+                ]
+                if due:
+                    batch_objects = self.object_detector.detect_batch(
+                        [packet for _, packet in due],
+                        [self.streams[name]['monitor'].yolo_roi(packet.timestamp) for name, packet in due]
+                    )
+                    for (name, packet), objects in zip(due, batch_objects):
+                        stream = self.streams[name]
+                        stream['pending_objects'] = (objects, packet.timestamp)
+                        stream['objects_due'] = now + self.object_interval
+                        stream['latest'] = None
+                    self.batches += 1
+                    self.batched_frames += len(due)
+
+                for name, packet in ready:
+                    stream = self.streams[name]
+                    objects, objects_time = stream['pending_objects'] or (None, None)
+                    stream['pending_objects'] = None
+                    stream['frames'] += 1
+                    stream['monitor'].process_frame(packet, objects=objects, objects_time=objects_time)
+
+                    if stream['monitor'].terminated:
+                        self._close_stream(name)
+
+                if duration and time.time() - self.start_time >= duration:
+                    break
+
+        except KeyboardInterrupt:
+            print("\n⏹️ Stopping...")
+        finally:
+            self.cleanup()
+
+    def _close_stream(self, name):
+        """Stop a stream and release its capture"""
+        stream = self.streams.pop(name)
+        stream['grabber'].stop()
+        stream['cap'].release()
+        stream['monitor'].save_final_report()
+        reason = " (capture failed)" if stream['grabber'].failed else ""
+        print(f"⏹️ {name} closed after {stream['frames']} frames{reason}")
+        self.finished_frames += stream['frames']
+
+    def get_stats(self):
+        """Get server throughput statistics"""
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+        frames = self.finished_frames + sum(s['frames'] for s in self.streams.values())
+        return {
+            'streams': len(self.streams),
+            'frames': frames,
+            'elapsed': elapsed,
+            'fps': frames / elapsed if elapsed > 0 else 0.0,
+            'yolo_batches': self.batches,
+            'avg_batch_size': self.batched_frames / self.batches if self.batches else 0.0
+        }
+
+    def cleanup(self):
+        """Close all streams and print statistics"""
+        for name in list(self.streams):
+            self._close_stream(name)
+        self.object_detector.close()
+
+        stats = self.get_stats()
+        print("\n📊 Server Statistics:")
+        print(f"   Frames: {stats['frames']} in {stats['elapsed']:.1f}s ({stats['fps']:.1f} frames/s total)")
+        print(f"   YOLO batches: {stats['yolo_batches']} (avg {stats['avg_batch_size']:.1f} frames)")
+        print("=" * 60)
@@ -1,18 +1,34 @@
 """
 Detectors module
 وحدة الكواشف
+
+Detector classes are imported on first use, so heavy dependencies
+(torch, mediapipe, speech_recognition) load only when they are needed,
+and can load in parallel from the startup thread pool.
 """
 
-from .face_detector import FaceDetector
-from .object_detector import ObjectDetector
-from .audio_detector import AudioDetector
-from .hand_detector import HandDetector
-from .eye_tracker import EyeTracker
-from .posture_detector import PostureDetector
-from .behavior_analyzer import BehaviorAnalyzer
+import importlib
+
+_EXPORTS = {
+    'FaceDetector': '.face_detector',
+    'ObjectDetector': '.object_detector',
+    'AudioDetector': '.audio_detector',
+    'HandDetector': '.hand_detector',
+    'EyeTracker': '.eye_tracker',
+    'PostureDetector': '.posture_detector',
+    'BehaviorAnalyzer': '.behavior_analyzer',
+    'FaceLandmarkService': '.landmark_service',
+    'ObjectTracker': '.object_tracker'
+}
+
+__all__ = list(_EXPORTS)
 
-__all__ = [
-    'FaceDetector', 'ObjectDetector', 'AudioDetector',
-    'HandDetector', 'EyeTracker', 'PostureDetector', 'BehaviorAnalyzer'
-]
 
+def __getattr__(name):
+    """Import the module that defines name on first access"""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -3,10 +3,10 @@ Advanced Behavior Analysis Module
 وحدة التحليل السلوكي المتقدم
 """
 
-import time
 import numpy as np
-from collections import deque
-from datetime import datetime
+
+from utils import clock
+from utils.ring_buffer import RingBuffer
 
 
 class BehaviorAnalyzer:
@@ -16,18 +16,18 @@ class BehaviorAnalyzer:
         """Initialize behavior analyzer"""
         self.config = config
         
-        # Behavior patterns
+        # Behavior patterns (event timestamps)
         self.behavior_patterns = {
-            'frequent_looking_away': deque(maxlen=100),
-            'rapid_head_movements': deque(maxlen=50),
-            'hand_to_face_patterns': deque(maxlen=50),
-            'posture_changes': deque(maxlen=50),
-            'object_detections': deque(maxlen=50)
+            'frequent_looking_away': RingBuffer(100),
+            'rapid_head_movements': RingBuffer(50),
+            'hand_to_face_patterns': RingBuffer(50),
+            'posture_changes': RingBuffer(50),
+            'object_detections': RingBuffer(50)
         }
         
         # Risk scoring
         self.risk_score = 0
-        self.risk_history = deque(maxlen=100)
+        self.risk_history = RingBuffer(100, ('score',))
         
         # Time windows
         self.SHORT_WINDOW = 10  # seconds
@@ -41,7 +41,7 @@ class BehaviorAnalyzer:
     
     def analyze_pattern(self, detection_data):
         """Analyze detection patterns and calculate risk"""
-        current_time = time.time()
+        current_time = clock.now()
         
         # Record patterns
         if detection_data.get('looking_away'):
@@ -62,11 +62,7 @@ class BehaviorAnalyzer:
         # Calculate risk score
         risk_score = self._calculate_risk_score(current_time)
         self.risk_score = risk_score
-        self.risk_history.append({
-            'timestamp': current_time,
-            'score': risk_score,
-            'level': self._get_risk_level(risk_score)
-        })
+        self.risk_history.append(current_time, risk_score)
         
         return {
             'risk_score': risk_score,
@@ -79,29 +75,24 @@ class BehaviorAnalyzer:
         score = 0
         
         # Frequent looking away (high weight)
-        recent_look_aways = [t for t in self.behavior_patterns['frequent_looking_away'] 
-                           if current_time - t < self.SHORT_WINDOW]
-        score += min(len(recent_look_aways) * 5, 30)
+        recent_look_aways = self.behavior_patterns['frequent_looking_away'].count(current_time - self.SHORT_WINDOW)
+        score += min(recent_look_aways * 5, 30)
         
         # Rapid movements (medium weight)
-        recent_movements = [t for t in self.behavior_patterns['rapid_head_movements'] 
-                          if current_time - t < self.SHORT_WINDOW]
-        score += min(len(recent_movements) * 3, 20)
+        recent_movements = self.behavior_patterns['rapid_head_movements'].count(current_time - self.SHORT_WINDOW)
+        score += min(recent_movements * 3, 20)
         
         # Hand to face (high weight - using phone)
-        recent_hand_face = [t for t in self.behavior_patterns['hand_to_face_patterns'] 
-                          if current_time - t < self.SHORT_WINDOW]
-        score += min(len(recent_hand_face) * 4, 25)
+        recent_hand_face = self.behavior_patterns['hand_to_face_patterns'].count(current_time - self.SHORT_WINDOW)
+        score += min(recent_hand_face * 4, 25)
         
         # Posture changes (medium weight)
-        recent_posture = [t for t in self.behavior_patterns['posture_changes'] 
-                        if current_time - t < self.MEDIUM_WINDOW]
-        score += min(len(recent_posture) * 2, 15)
+        recent_posture = self.behavior_patterns['posture_changes'].count(current_time - self.MEDIUM_WINDOW)
+        score += min(recent_posture * 2, 15)
         
         # Object detections (very high weight)
-        recent_objects = [t for t in self.behavior_patterns['object_detections'] 
-                        if current_time - t < self.SHORT_WINDOW]
-        score += min(len(recent_objects) * 10, 40)
+        recent_objects = self.behavior_patterns['object_detections'].count(current_time - self.SHORT_WINDOW)
+        score += min(recent_objects * 10, 40)
         
         return min(score, 100)
     
@@ -120,43 +111,34 @@ class BehaviorAnalyzer:
         patterns = []
         
         # Pattern 1: Frequent looking away
-        look_aways = [t for t in self.behavior_patterns['frequent_looking_away'] 
-                     if current_time - t < self.SHORT_WINDOW]
-        if len(look_aways) > 5:
+        look_aways = self.behavior_patterns['frequent_looking_away'].count(current_time - self.SHORT_WINDOW)
+        if look_aways > 5:
             patterns.append('frequent_looking_away')
         
         # Pattern 2: Rapid movements (nervous behavior)
-        movements = [t for t in self.behavior_patterns['rapid_head_movements'] 
-                   if current_time - t < self.SHORT_WINDOW]
-        if len(movements) > 8:
+        movements = self.behavior_patterns['rapid_head_movements'].count(current_time - self.SHORT_WINDOW)
+        if movements > 8:
             patterns.append('nervous_behavior')
         
         # Pattern 3: Hand to face repeatedly (using phone)
-        hand_face = [t for t in self.behavior_patterns['hand_to_face_patterns'] 
-                   if current_time - t < self.SHORT_WINDOW]
-        if len(hand_face) > 3:
+        hand_face = self.behavior_patterns['hand_to_face_patterns'].count(current_time - self.SHORT_WINDOW)
+        if hand_face > 3:
             patterns.append('phone_usage_suspected')
         
         # Pattern 4: Multiple objects detected
-        objects = [t for t in self.behavior_patterns['object_detections'] 
-                 if current_time - t < self.SHORT_WINDOW]
-        if len(objects) > 2:
+        objects = self.behavior_patterns['object_detections'].count(current_time - self.SHORT_WINDOW)
+        if objects > 2:
             patterns.append('multiple_forbidden_objects')
         
         return patterns
     
     def get_risk_summary(self):
         """Get risk summary for reporting"""
-        if not self.risk_history:
+        recent_since = clock.now() - self.LONG_WINDOW
+        avg_risk = self.risk_history.mean('score', recent_since)
+        if avg_risk is None:
             return None
-        
-        recent_risks = [r for r in self.risk_history if time.time() - r['timestamp'] < 60]
-        
-        if not recent_risks:
-            return None
-        
-        avg_risk = np.mean([r['score'] for r in recent_risks])
-        max_risk = max([r['score'] for r in recent_risks])
+        max_risk = self.risk_history.max('score', recent_since)
         
         return {
             'current_risk': self.risk_score,
@@ -171,10 +153,10 @@ class BehaviorAnalyzer:
         if len(self.risk_history) < 10:
             return 'stable'
         
-        recent = [r['score'] for r in list(self.risk_history)[-10:]]
-        older = [r['score'] for r in list(self.risk_history)[-20:-10]]
+        scores = self.risk_history.window('score', last=20)
+        recent, older = scores[-10:], scores[:-10]
         
-        if not older:
+        if not len(older):
             return 'stable'
         
         recent_avg = np.mean(recent)
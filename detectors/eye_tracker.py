@@ -4,8 +4,16 @@ Eye Gaze Tracking Module
 """
 
 import numpy as np
-import time
-from collections import deque
+
+from utils import clock, landmarks
+from utils.ring_buffer import RingBuffer
+
+
+# MediaPipe Face Mesh eye contours, left eye then right eye (16 points each)
+EYE_INDICES = np.array([
+    33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246,
+    362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398
+])
 
 
 class EyeTracker:
@@ -16,7 +24,7 @@ class EyeTracker:
         self.config = config
         
         # Eye tracking data
-        self.eye_gaze_history = deque(maxlen=30)
+        self.eye_gaze_history = RingBuffer(30, ('x', 'y'))
         self.looking_away_count = 0
         self.looking_at_screen_count = 0
         self.last_gaze_direction = None
@@ -29,40 +37,18 @@ class EyeTracker:
         self.screen_center = (0.5, 0.4)  # Normalized coordinates
     
     def track_gaze(self, face_landmarks, frame_shape):
-        """Track eye gaze direction"""
-        if not face_landmarks:
+        """Track eye gaze direction (face landmarks as protobuf or (N, 3) array)"""
+        points = landmarks.face_array(face_landmarks)
+        if points is None:
             return None
         
         try:
-            # Get eye landmarks (MediaPipe Face Mesh)
-            # Left eye: 33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246
-            # Right eye: 362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398
-            
-            left_eye_landmarks = [
-                33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246
-            ]
-            right_eye_landmarks = [
-                362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398
-            ]
-            
-            # Calculate eye centers
-            left_eye_center = self._get_eye_center(face_landmarks, left_eye_landmarks, frame_shape)
-            right_eye_center = self._get_eye_center(face_landmarks, right_eye_landmarks, frame_shape)
-            
-            if left_eye_center and right_eye_center:
-                # Average eye center
-                eye_center = (
-                    (left_eye_center[0] + right_eye_center[0]) / 2,
-                    (left_eye_center[1] + right_eye_center[1]) / 2
-                )
+            # Average of both eye centers, in normalized coordinates
+            eye_center = self._get_eye_center(points)
+            if eye_center is not None:
+                normalized_center = tuple(eye_center.tolist())
                 
-                # Normalize coordinates
-                normalized_center = (
-                    eye_center[0] / frame_shape[1],
-                    eye_center[1] / frame_shape[0]
-                )
-                
-                self.eye_gaze_history.append(normalized_center)
+                self.eye_gaze_history.append(clock.now(), *normalized_center)
                 
                 # Determine gaze direction relative to screen center
                 gaze_direction = self._calculate_gaze_direction(normalized_center)
@@ -77,18 +63,15 @@ class EyeTracker:
         
         return None
     
-    def _get_eye_center(self, face_landmarks, eye_indices, frame_shape):
-        """Calculate eye center from landmarks"""
-        try:
-            x_coords = [face_landmarks.landmark[i].x for i in eye_indices]
-            y_coords = [face_landmarks.landmark[i].y for i in eye_indices]
-            
-            center_x = sum(x_coords) / len(x_coords) * frame_shape[1]
-            center_y = sum(y_coords) / len(y_coords) * frame_shape[0]
-            
-            return (center_x, center_y)
-        except:
+    def _get_eye_center(self, points):
+        """Normalized (x, y) midpoint of both eye centers from a face landmark array
+        
+        Both eyes have the same number of points, so the mean over all of them
+        equals the average of the two eye centers.
+        """
+        if len(points) < landmarks.FACE_POINTS:
             return None
+        return points[EYE_INDICES, :2].mean(axis=0)
     
     def _calculate_gaze_direction(self, eye_center):
         """Calculate gaze direction"""
@@ -102,11 +85,8 @@ class EyeTracker:
     
     def _is_looking_at_screen(self, eye_center):
         """Check if looking at screen center"""
-        distance = np.sqrt(
-            (eye_center[0] - self.screen_center[0])**2 +
-            (eye_center[1] - self.screen_center[1])**2
-        )
-        return distance < self.GAZE_DEVIATION_THRESHOLD
+        distance = np.hypot(eye_center[0] - self.screen_center[0], eye_center[1] - self.screen_center[1])
+        return bool(distance < self.GAZE_DEVIATION_THRESHOLD)
     
     def detect_prolonged_looking_away(self, gaze_data):
         """Detect if student is looking away for too long"""
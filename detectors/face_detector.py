@@ -3,88 +3,228 @@ Face Detection Module
 وحدة كشف الوجه
 """
 
-import cv2
 import mediapipe as mp
 import numpy as np
-import time
-from collections import deque
+from collections import namedtuple
+from contextlib import nullcontext
+
+from utils.frame_packet import FramePacket
+from utils.ring_buffer import RingBuffer
+from utils import clock
+from utils import landmarks
+from .landmark_service import FaceLandmarkService
+
+
+# Stand-ins for MediaPipe's pose result on frames where Pose is extrapolated
+_Landmark = namedtuple('_Landmark', 'x y z visibility')
+_LandmarkList = namedtuple('_LandmarkList', 'landmark')
+_PoseResult = namedtuple('_PoseResult', 'pose_landmarks')
 
 
 class FaceDetector:
     """Face detection and tracking using MediaPipe"""
     
-    def __init__(self, config=None):
-        """Initialize face detector"""
+    def __init__(self, config=None, landmark_service=None, latency=None):
+        """Initialize face detector (latency: LatencyTracker for the pose and recovery stages)"""
         self.config = config
+        self.latency = latency
         
         # Initialize MediaPipe
         self.mp_face_detection = mp.solutions.face_detection
-        self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_pose = mp.solutions.pose
-        self.mp_drawing = mp.solutions.drawing_utils
         
         # Get confidence thresholds
         face_conf = config.MEDIAPIPE_FACE_DETECTION_CONFIDENCE if config else 0.5
-        mesh_conf = config.MEDIAPIPE_FACE_MESH_CONFIDENCE if config else 0.5
         pose_conf = config.MEDIAPIPE_POSE_CONFIDENCE if config else 0.5
         
-        # Initialize detectors
+        # FaceMesh is shared with the other landmark consumers (gaze, emotion)
+        # and runs in tracking mode; FaceDetection only recovers a lost mesh
+        self.landmark_service = landmark_service or FaceLandmarkService(config)
         self.face_detection = self.mp_face_detection.FaceDetection(
             model_selection=0, min_detection_confidence=face_conf
         )
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=mesh_conf,
-            min_tracking_confidence=mesh_conf
-        )
         self.pose = self.mp_pose.Pose(
+            model_complexity=config.POSE_MODEL_COMPLEXITY if config else 0,
             min_detection_confidence=pose_conf,
             min_tracking_confidence=pose_conf
         )
         
+        # MediaPipe input width; landmarks and boxes come back normalized
+        self.analysis_width = config.ANALYSIS_WIDTH if config else 640
+        
+        # Pose cascade: run at pose_rate, extrapolate the landmarks in between
+        pose_rate = config.POSE_RATE if config else 10.0
+        self.pose_interval = 1.0 / pose_rate if pose_rate > 0 else 0.0
+        self.last_pose_time = None
+        self.last_pose_results = None
+        self.pose_samples = RingBuffer(2, (('points', np.float32, (landmarks.POSE_POINTS, 4)),))  # x, y, z, visibility
+        self.pose_points = None  # this frame's pose as a 33x4 array, shared with the posture detector
+        self.cascade_stats = {'frames': 0, 'pose_runs': 0, 'recovery_runs': 0, 'recovered': 0}
+        
+        # People counting: YOLO person boxes (fed by the monitor) and the faces of
+        # recovery runs; the periodic face count while the mesh tracks is opt-in.
+        # Each count expires after people_count_max_age
+        self.face_count_interval = config.FACE_COUNT_INTERVAL if config else 0.0
+        self.people_count_max_age = config.PEOPLE_COUNT_MAX_AGE if config else 3.0
+        self.face_count = None
+        self.face_count_time = None
+        self.yolo_person_count = None
+        self.yolo_person_time = None
+        self.multiple_people_start = None
+        
         # Face movement tracking
         self.face_movement_start = None
         self.face_movement_direction = None
         self.face_movement_threshold = 3.0
-        self.face_center_history = deque(maxlen=30)
+        self.face_center_history = RingBuffer(30, (('x', np.int32), ('y', np.int32)))
         self.face_movement_sensitivity = 50
         
         # State tracking
-        self.last_face_time = time.time()
+        self.last_face_time = clock.now()
         self.face_away_start = None
         self.person_absent_start = None
-        self.last_person_time = time.time()
+        self.last_person_time = clock.now()
         
         # Thresholds
         if config:
             thresholds = config.get_time_thresholds()
             self.FACE_AWAY_THRESHOLD = thresholds.get('face_away', 5.0)
             self.PERSON_ABSENT_THRESHOLD = thresholds.get('person_absent', 3.0)
+            self.MULTIPLE_PEOPLE_THRESHOLD = thresholds.get('multiple_people', 2.0)
         else:
             self.FACE_AWAY_THRESHOLD = 5.0
             self.PERSON_ABSENT_THRESHOLD = 3.0
+            self.MULTIPLE_PEOPLE_THRESHOLD = 2.0
     
     def process(self, frame):
-        """Process frame and return detection results"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        """Process frame (ndarray or FramePacket) and return detection results"""
+        packet = FramePacket.wrap(frame)
+        self.cascade_stats['frames'] += 1
         
-        # Process with MediaPipe (optimized for speed)
-        face_results = self.face_detection.process(rgb_frame)
-        face_mesh_results = self.face_mesh.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
+        # Face presence comes from the tracked mesh; the FaceDetection graph
+        # only runs when the mesh has lost the face (or to count faces, if enabled)
+        face_mesh_results = self.landmark_service.process(packet)
+        face_present = bool(face_mesh_results.multi_face_landmarks)
+        if not face_present:
+            self.cascade_stats['recovery_runs'] += 1
+            with self._stage('recovery'):
+                faces = self._count_faces(packet)
+            face_present = faces > 0
+            self.cascade_stats['recovered'] += face_present
+        elif self._face_count_due(packet.timestamp):
+            with self._stage('face_count'):
+                self._count_faces(packet)
+        
+        pose_fresh = self._pose_due(packet.timestamp)
+        if pose_fresh:
+            pose_results = self._run_pose(packet)
+        else:
+            pose_results = self._extrapolate_pose(packet.timestamp)
         
         return {
-            'face': face_results,
+            'face_present': face_present,
             'face_mesh': face_mesh_results,
-            'pose': pose_results
+            'pose': pose_results,
+            'pose_points': self.pose_points,
+            'pose_fresh': pose_fresh
         }
     
-    def detect_face_away(self, face_results):
-        """Detect if student is looking away"""
-        current_time = time.time()
+    def _stage(self, name):
+        """Latency stage on the tracker, or nothing when no tracker is attached"""
+        return self.latency.stage(name) if self.latency else nullcontext()
+    
+    def _face_count_due(self, timestamp):
+        """Faces are counted every face_count_interval (0 disables the extra runs)"""
+        if not self.face_count_interval:
+            return False
+        if self.face_count_time is None or timestamp < self.face_count_time:
+            return True
+        return timestamp - self.face_count_time >= self.face_count_interval
+    
+    def _count_faces(self, packet):
+        """Run FaceDetection once and remember how many faces it found"""
+        detections = self.face_detection.process(packet.analysis_rgb(self.analysis_width)).detections or []
+        self.face_count = len(detections)
+        self.face_count_time = packet.timestamp
+        return self.face_count
+    
+    def update_person_boxes(self, persons, timestamp):
+        """Take the YOLO person boxes of one full-frame detection run"""
+        self.yolo_person_count = len(persons)
+        self.yolo_person_time = timestamp
+    
+    def people_count(self, now):
+        """Most people seen by any recent source (YOLO persons, FaceDetection faces), or None"""
+        counts = [
+            count for count, seen in ((self.yolo_person_count, self.yolo_person_time),
+                                      (self.face_count, self.face_count_time))
+            if count is not None and abs(now - seen) <= self.people_count_max_age
+        ]
+        return max(counts) if counts else None
+    
+    def _pose_due(self, timestamp):
+        """Pose runs at pose_interval, and again whenever the clock goes backwards (replay)"""
+        if self.last_pose_time is None or timestamp < self.last_pose_time:
+            return True
+        return timestamp - self.last_pose_time >= self.pose_interval
+    
+    def _run_pose(self, packet):
+        """Run the Pose graph and keep its landmarks for extrapolation"""
+        self.cascade_stats['pose_runs'] += 1
+        with self._stage('pose'):
+            results = self.pose.process(packet.analysis_rgb(self.analysis_width))
+        
+        self.pose_points = landmarks.pose_array(results.pose_landmarks)
+        if self.pose_points is not None:
+            self.pose_samples.append(packet.timestamp, self.pose_points)
+        else:
+            self.pose_samples.clear()
+        
+        self.last_pose_time = packet.timestamp
+        self.last_pose_results = results
+        return results
+    
+    def _extrapolate_pose(self, timestamp):
+        """Last pose moved along its velocity, for at most one pose interval"""
+        if len(self.pose_samples) < 2:
+            return self.last_pose_results
         
-        if face_results.detections:
+        samples = self.pose_samples.window()
+        (t0, t1), (previous, latest) = samples['timestamp'].tolist(), samples['points']
+        if t1 <= t0:
+            return self.last_pose_results
+        
+        dt = min(timestamp - t1, self.pose_interval)
+        points = latest.copy()
+        points[:, :3] += (latest[:, :3] - previous[:, :3]) * (dt / (t1 - t0))
+        self.pose_points = points
+        
+        return _PoseResult(_LandmarkList([_Landmark(*point) for point in points.tolist()]))
+    
+    def reset(self):
+        """Forget pose state (after warm-up or between sessions)"""
+        self.last_pose_time = None
+        self.last_pose_results = None
+        self.pose_samples.clear()
+        self.pose_points = None
+        self.face_count = self.face_count_time = None
+        self.yolo_person_count = self.yolo_person_time = None
+        self.cascade_stats = {'frames': 0, 'pose_runs': 0, 'recovery_runs': 0, 'recovered': 0}
+    
+    def get_stats(self):
+        """How often each stage of the cascade actually ran"""
+        frames = max(self.cascade_stats['frames'], 1)
+        return {
+            **self.cascade_stats,
+            'pose_run_rate': self.cascade_stats['pose_runs'] / frames,
+            'recovery_rate': self.cascade_stats['recovery_runs'] / frames
+        }
+    
+    def detect_face_away(self, face_present):
+        """Detect if student is looking away (face_present from process())"""
+        current_time = clock.now()
+        
+        if face_present:
             self.last_face_time = current_time
             if self.face_away_start:
                 self.face_away_start = None
@@ -99,7 +239,7 @@ class FaceDetector:
     
     def detect_person_absence(self, pose_results):
         """Detect if student is not present"""
-        current_time = time.time()
+        current_time = clock.now()
         
         if pose_results.pose_landmarks:
             self.last_person_time = current_time
@@ -114,32 +254,39 @@ class FaceDetector:
                 return True
         return False
     
-    def detect_multiple_people(self, pose_results):
-        """Detect if multiple people are in frame"""
-        if pose_results.pose_landmarks:
-            landmarks = pose_results.pose_landmarks.landmark
-            visible_landmarks = sum(1 for lm in landmarks if lm.visibility > 0.5)
-            return visible_landmarks > 33
+    def detect_multiple_people(self, timestamp=None):
+        """Detect if more than one person stays in frame (YOLO persons or faces)"""
+        current_time = clock.now()
+        count = self.people_count(current_time if timestamp is None else timestamp)
+        
+        if count is not None and count > 1:
+            if self.multiple_people_start is None:
+                self.multiple_people_start = current_time
+            elif current_time - self.multiple_people_start > self.MULTIPLE_PEOPLE_THRESHOLD:
+                self.multiple_people_start = None
+                return True
+        else:
+            self.multiple_people_start = None
         return False
     
     def detect_face_movement(self, face_landmarks, frame):
-        """Detect face movement direction"""
-        if not face_landmarks:
+        """Detect face movement direction (face landmarks as protobuf or (N, 3) array)"""
+        points = landmarks.face_array(face_landmarks)
+        if points is None:
             return None
         
         try:
-            nose_tip = face_landmarks.landmark[4]
-            face_center = (int(nose_tip.x * frame.shape[1]), int(nose_tip.y * frame.shape[0]))
-            self.face_center_history.append(face_center)
+            nose_tip = points[4]
+            self.face_center_history.append(
+                clock.now(), int(nose_tip[0] * frame.shape[1]), int(nose_tip[1] * frame.shape[0])
+            )
             
             if len(self.face_center_history) < 10:
                 return None
             
-            start_point = self.face_center_history[0]
-            end_point = self.face_center_history[-1]
-            
-            dx = end_point[0] - start_point[0]
-            dy = end_point[1] - start_point[1]
+            # Displacement from the oldest to the newest center
+            dx = self.face_center_history.last('x') - self.face_center_history.first('x')
+            dy = self.face_center_history.last('y') - self.face_center_history.first('y')
             
             direction = None
             if abs(dx) > self.face_movement_sensitivity:
@@ -150,31 +297,11 @@ class FaceDetector:
             if direction:
                 if self.face_movement_direction != direction:
                     self.face_movement_direction = direction
-                    self.face_movement_start = time.time()
-                elif self.face_movement_start and time.time() - self.face_movement_start > self.face_movement_threshold:
+                    self.face_movement_start = clock.now()
+                elif self.face_movement_start and clock.now() - self.face_movement_start > self.face_movement_threshold:
                     self.face_movement_start = None
                     return direction
             
             return None
         except Exception:
             return None
-    
-    def draw_landmarks(self, frame, face_mesh_results, pose_results):
-        """Draw landmarks on frame"""
-        # Draw face mesh
-        if face_mesh_results.multi_face_landmarks:
-            for face_landmarks in face_mesh_results.multi_face_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    frame, face_landmarks, self.mp_face_mesh.FACEMESH_TESSELATION,
-                    landmark_drawing_spec=None,
-                    connection_drawing_spec=self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1)
-                )
-        
-        # Draw pose
-        if pose_results.pose_landmarks:
-            self.mp_drawing.draw_landmarks(
-                frame, pose_results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS
-            )
-        
-        return frame
-
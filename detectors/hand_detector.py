@@ -3,11 +3,17 @@ Hand Detection and Tracking Module
 وحدة كشف وتتبع حركة اليدين
 """
 
-import cv2
 import mediapipe as mp
 import numpy as np
-import time
-from collections import deque
+
+from utils.frame_packet import FramePacket
+from utils import clock, landmarks
+from utils.ring_buffer import RingBuffer
+
+
+WRIST = 0
+NOSE_TIP = 4  # Face Mesh index
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])  # thumb, index, middle, ring, pinky
 
 
 class HandDetector:
@@ -19,7 +25,6 @@ class HandDetector:
         
         # Initialize MediaPipe Hands
         self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
         
         # Initialize hands detector
         self.hands = self.mp_hands.Hands(
@@ -29,8 +34,11 @@ class HandDetector:
             min_tracking_confidence=0.5
         )
         
+        # MediaPipe input width; landmarks come back normalized
+        self.analysis_width = config.ANALYSIS_WIDTH if config else 640
+        
         # Hand movement tracking
-        self.hand_positions_history = deque(maxlen=30)
+        self.hand_positions_history = RingBuffer(30, ('x', 'y'))
         self.suspicious_hand_movements = 0
         self.hand_near_face_count = 0
         self.hand_near_phone_zone = 0
@@ -41,23 +49,29 @@ class HandDetector:
         self.PHONE_ZONE_THRESHOLD = 0.2  # normalized distance from bottom corners
     
     def process(self, frame):
-        """Process frame and detect hands"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        """Process frame (ndarray or FramePacket) and detect hands"""
+        rgb_frame = FramePacket.wrap(frame).analysis_rgb(self.analysis_width)
         results = self.hands.process(rgb_frame)
         return results
     
     def detect_suspicious_hand_movements(self, hand_results, face_landmarks=None):
-        """Detect suspicious hand movements (typing on phone, writing)"""
-        if not hand_results.multi_hand_landmarks:
+        """Detect suspicious hand movements (typing on phone, writing)
+        
+        Takes MediaPipe results or a (hands, 21, 3) array, and face landmarks
+        as protobuf or (N, 3) array.
+        """
+        hands = landmarks.hand_arrays(hand_results)
+        if not len(hands):
             return False
         
+        face_points = landmarks.face_array(face_landmarks)
+        near_face = self._is_hand_near_face(hands, face_points)
+        in_phone_zone = self._is_hand_in_phone_zone(hands)
         suspicious = False
         
-        for hand_landmarks in hand_results.multi_hand_landmarks:
+        for hand, hand_near_face, hand_in_phone_zone in zip(hands, near_face, in_phone_zone):
             # Get hand center (wrist)
-            wrist = hand_landmarks.landmark[0]
-            hand_center = (wrist.x, wrist.y)
-            self.hand_positions_history.append(hand_center)
+            self.hand_positions_history.append(clock.now(), *hand[WRIST, :2].tolist())
             
             # Check for rapid hand movements (typing pattern)
             if len(self.hand_positions_history) >= 10:
@@ -67,14 +81,13 @@ class HandDetector:
                     suspicious = True
             
             # Check if hand is near face (covering face or using phone)
-            if face_landmarks:
-                if self._is_hand_near_face(hand_landmarks, face_landmarks):
-                    self.hand_near_face_count += 1
-                    if self.hand_near_face_count > 5:
-                        suspicious = True
+            if hand_near_face:
+                self.hand_near_face_count += 1
+                if self.hand_near_face_count > 5:
+                    suspicious = True
             
             # Check if hand is in phone zone (bottom corners - typical phone position)
-            if self._is_hand_in_phone_zone(hand_landmarks):
+            if hand_in_phone_zone:
                 self.hand_near_phone_zone += 1
                 if self.hand_near_phone_zone > 3:
                     suspicious = True
@@ -86,77 +99,33 @@ class HandDetector:
         if len(self.hand_positions_history) < 10:
             return 0
         
-        movements = 0
-        for i in range(1, len(self.hand_positions_history)):
-            prev = self.hand_positions_history[i-1]
-            curr = self.hand_positions_history[i]
-            
-            # Calculate distance
-            dist = np.sqrt((curr[0] - prev[0])**2 + (curr[1] - prev[1])**2)
-            if dist > 0.05:  # Significant movement
-                movements += 1
-        
-        return movements
+        # Steps between consecutive wrist positions, significant above 0.05
+        positions = self.hand_positions_history.window()
+        steps = np.hypot(np.diff(positions['x']), np.diff(positions['y']))
+        return int(np.count_nonzero(steps > 0.05))
     
-    def _is_hand_near_face(self, hand_landmarks, face_landmarks):
-        """Check if hand is near face"""
-        # Get hand center
-        wrist = hand_landmarks.landmark[0]
-        
-        # Get face center (nose tip)
-        try:
-            nose_tip = face_landmarks.landmark[4]
-            distance = np.sqrt(
-                (wrist.x - nose_tip.x)**2 + 
-                (wrist.y - nose_tip.y)**2
-            )
-            return distance < self.HAND_NEAR_FACE_THRESHOLD
-        except:
-            return False
+    def _is_hand_near_face(self, hands, face_points):
+        """Per hand: wrist within HAND_NEAR_FACE_THRESHOLD of the nose tip"""
+        if face_points is None or len(face_points) <= NOSE_TIP:
+            return np.zeros(len(hands), dtype=bool)
+        distance = np.hypot(*(hands[:, WRIST, :2] - face_points[NOSE_TIP, :2]).T)
+        return distance < self.HAND_NEAR_FACE_THRESHOLD
     
-    def _is_hand_in_phone_zone(self, hand_landmarks):
-        """Check if hand is in typical phone position (bottom corners)"""
-        wrist = hand_landmarks.landmark[0]
+    def _is_hand_in_phone_zone(self, hands):
+        """Per hand: wrist in a typical phone position (bottom corners)"""
+        x, y = hands[:, WRIST, 0], hands[:, WRIST, 1]
         
         # Phone zones: bottom-left and bottom-right corners
-        bottom_left_zone = (wrist.x < self.PHONE_ZONE_THRESHOLD and 
-                           wrist.y > (1 - self.PHONE_ZONE_THRESHOLD))
-        bottom_right_zone = (wrist.x > (1 - self.PHONE_ZONE_THRESHOLD) and 
-                            wrist.y > (1 - self.PHONE_ZONE_THRESHOLD))
-        
-        return bottom_left_zone or bottom_right_zone
+        bottom = y > (1 - self.PHONE_ZONE_THRESHOLD)
+        side = (x < self.PHONE_ZONE_THRESHOLD) | (x > (1 - self.PHONE_ZONE_THRESHOLD))
+        return bottom & side
     
     def detect_typing_pattern(self, hand_results):
         """Detect typing pattern (rapid finger movements)"""
-        if not hand_results.multi_hand_landmarks:
+        hands = landmarks.hand_arrays(hand_results)
+        if not len(hands):
             return False
         
-        for hand_landmarks in hand_results.multi_hand_landmarks:
-            # Get finger tips
-            finger_tips = [
-                hand_landmarks.landmark[4],   # Thumb
-                hand_landmarks.landmark[8],   # Index
-                hand_landmarks.landmark[12],  # Middle
-                hand_landmarks.landmark[16],  # Ring
-                hand_landmarks.landmark[20]   # Pinky
-            ]
-            
-            # Check if multiple fingers are extended (typing position)
-            extended_fingers = sum(1 for tip in finger_tips 
-                                 if tip.y < hand_landmarks.landmark[0].y)
-            
-            if extended_fingers >= 3:
-                return True
-        
-        return False
-    
-    def draw_hands(self, frame, hand_results):
-        """Draw hand landmarks"""
-        if hand_results.multi_hand_landmarks:
-            for hand_landmarks in hand_results.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2, circle_radius=2),
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2)
-                )
-        return frame
+        # Fingers extended above the wrist (typing position), counted per hand
+        extended_fingers = np.count_nonzero(hands[:, FINGER_TIPS, 1] < hands[:, WRIST, None, 1], axis=1)
+        return bool((extended_fingers >= 3).any())
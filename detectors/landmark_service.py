@@ -0,0 +1,61 @@
+"""
+Face Landmark Service
+خدمة معالم الوجه المشتركة
+"""
+
+import mediapipe as mp
+
+from utils.frame_packet import FramePacket
+from utils import landmarks
+
+
+class FaceLandmarkService:
+    """Runs FaceMesh once per frame and shares the result with every consumer"""
+
+    def __init__(self, config=None):
+        """Initialize the single FaceMesh graph"""
+        self.config = config
+        self.mp_face_mesh = mp.solutions.face_mesh
+
+        mesh_conf = config.MEDIAPIPE_FACE_MESH_CONFIDENCE if config else 0.5
+        self.face_mesh = self.mp_face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=mesh_conf,
+            min_tracking_confidence=mesh_conf
+        )
+
+        # Downscaled input; landmarks are normalized, so nothing needs remapping
+        self.analysis_width = config.ANALYSIS_WIDTH if config else 640
+
+        # Result of the last processed packet
+        self.last_packet = None
+        self.last_results = None
+        self.last_points = None
+
+    def process(self, frame):
+        """Return FaceMesh results for frame, running the graph at most once per packet"""
+        packet = FramePacket.wrap(frame)
+        if packet is self.last_packet:
+            return self.last_results
+
+        self.last_results = self.face_mesh.process(packet.analysis_rgb(self.analysis_width))
+        self.last_packet = packet
+        self.last_points = None
+        return self.last_results
+
+    def get_face_landmarks(self, frame):
+        """Return landmarks of the first face in frame, or None"""
+        results = self.process(frame)
+        if results.multi_face_landmarks:
+            return results.multi_face_landmarks[0]
+        return None
+
+    def get_face_points(self, frame):
+        """Return the first face as a (N, 3) float32 array, converted once per packet, or None"""
+        face_landmarks = self.get_face_landmarks(frame)
+        if face_landmarks is None:
+            return None
+        if self.last_points is None:
+            self.last_points = landmarks.face_array(face_landmarks)
+        return self.last_points
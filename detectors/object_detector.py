@@ -3,24 +3,36 @@ Object Detection Module using YOLO
 وحدة كشف الأجسام باستخدام YOLO
 """
 
-import cv2
-import numpy as np
 import time
-from ultralytics import YOLO
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.frame_packet import FramePacket
+from .yolo_backends import create_backend
+from .yolo_worker import YoloWorker
+
+
+class Detections(list):
+    """Forbidden objects found in one frame (a plain list for existing callers)
+    
+    persons carries the YOLO 'person' boxes of the same run, so people can be
+    counted without another model. It is None when the run did not cover the
+    whole frame (person ROI) or person detection is off.
+    """
+    
+    def __init__(self, objects=(), persons=None):
+        super().__init__(objects)
+        self.persons = persons
 
 
 class ObjectDetector:
     """Fast object detection using YOLO with optimizations"""
     
-    def __init__(self, config=None):
-        """Initialize YOLO detector with optimizations"""
+    def __init__(self, config=None, use_worker=None):
+        """Initialize YOLO detector with optimizations (use_worker overrides Config.YOLO_WORKER_PROCESS)"""
         self.config = config
         
-        # Load model
-        model_path = config.YOLO_MODEL_PATH if config else 'yolov8n.pt'
-        print(f"📦 Loading YOLO model: {model_path}")
-        self.yolo_model = YOLO(model_path)
-        
         # Detect device (GPU/CPU)
         try:
             import torch
@@ -33,9 +45,40 @@ class ObjectDetector:
             self.device = 'cpu'
             print("💻 Using CPU for inference")
         
-        # Optimize model
-        if hasattr(self.yolo_model, 'fuse'):
-            self.yolo_model.fuse()
+        # Use smaller image size for CPU, larger for GPU
+        self.img_size = 480 if self.device == 'cpu' else 640
+        
+        # Inference backend: torch, onnx or openvino (':int8' for quantized CPU models)
+        model_path = config.YOLO_MODEL_PATH if config else 'yolov8n.pt'
+        self.backend_name = config.YOLO_BACKEND if config else 'torch'
+        calibration_dir = config.YOLO_CALIBRATION_DIR if config else None
+        cache_dir = config.YOLO_CACHE_DIR if config else 'models'
+        
+        # Load model (in this process, or in a dedicated worker process)
+        if use_worker is None:
+            use_worker = config.YOLO_WORKER_PROCESS if config else False
+        self.backend = None
+        self.worker = None
+        
+        if use_worker:
+            print(f"📦 Starting YOLO worker process: {model_path} ({self.backend_name})")
+            num_slots = config.YOLO_WORKER_SLOTS if config else 2
+            self.worker = YoloWorker(model_path, self.device, self.img_size, num_slots,
+                                     backend=self.backend_name, calibration_dir=calibration_dir,
+                                     cache_dir=cache_dir)
+            self.class_names = self.worker.names
+        else:
+            print(f"📦 Loading YOLO model: {model_path} ({self.backend_name})")
+            try:
+                self.backend = create_backend(self.backend_name, model_path, self.device,
+                                              self.img_size, calibration_dir, cache_dir)
+            except Exception as e:
+                if self.backend_name == 'torch':
+                    raise
+                print(f"⚠️ YOLO backend {self.backend_name} unavailable ({e}), using torch")
+                self.backend_name = 'torch'
+                self.backend = create_backend('torch', model_path, self.device, self.img_size)
+            self.class_names = self.backend.names
         
         # Load forbidden objects
         if config:
@@ -48,98 +91,323 @@ class ObjectDetector:
                 'smartwatch', 'watch', 'calculator', 'book', 'paper'
             ]
         
+        # Resolve the forbidden list into model class indices once
+        self._compile_class_filter()
+        
+        # Person-ROI mode: detect on a crop around the student instead of the whole frame
+        self.use_person_roi = config.YOLO_PERSON_ROI if config else False
+        self.roi_margin = config.YOLO_ROI_MARGIN if config else 0.25
+        
         print("✅ YOLO model loaded and optimized")
         
-        # Frame skipping for speed (process every N frames)
-        # Adaptive: use more skipping on CPU, less on GPU
-        self.frame_skip = 3 if self.device == 'cpu' else 2
-        self.frame_count = 0
-        self.last_results = None
-        
-        # Cache for faster processing
-        self.result_cache = {}
-        self.cache_timeout = 0.1  # 100ms cache
-        self.last_cache_time = 0
-    
-    def detect(self, frame):
-        """Detect forbidden objects in frame (with frame skipping and caching for speed)"""
-        self.frame_count += 1
-        current_time = time.time()
-        
-        # Skip frames for speed (only process every N frames)
-        if self.frame_count % self.frame_skip != 0:
-            # Use cached results if available and fresh
-            if (self.last_results and 
-                current_time - self.last_cache_time < self.cache_timeout):
-                return self.last_results
-            return []
+        # Last completed detection (cadence is decided by the DetectorScheduler)
+        self.last_results = []
+        self.last_detection_time = 0
+        self.inference_time = None  # Smoothed seconds per image, at the current img_size
+        
+        # Asynchronous submit()/poll(): a background thread, or the worker process
+        self.async_mode = self.worker is not None or (config.YOLO_ASYNC if config else False)
+        self.executor = None
+        self.pending = None
+        self.async_submitted = 0
+        self.async_skipped = 0
+        self.async_completed = 0
+    
+    def set_img_size(self, size):
+        """Change the YOLO input size; returns False where it is fixed (worker shared memory)"""
+        if self.worker:
+            return False
+        if size != self.img_size:
+            self.img_size = size
+            self.inference_time = None
+        return True
+    
+    def warm_up(self):
+        """Run one dummy inference so the first real frame skips graph initialization"""
+        if self.backend:
+            dummy = np.full((self.img_size, self.img_size, 3), 114, dtype=np.uint8)
+            self.backend.predict([dummy], self.min_confidence, 1, self.query_ids)
+    
+    def detect(self, frame, roi=None):
+        """Detect forbidden objects in frame or FramePacket (optionally only inside roi)"""
+        packet = FramePacket.wrap(frame)
+        
+        # Letterbox once per frame; boxes are mapped back in _postprocess
+        yolo_input, scale, pad = packet.letterbox(self.img_size, roi)
         
         try:
-            conf_threshold = self.config.YOLO_CONFIDENCE_THRESHOLD if self.config else 0.5
-            
-            # Run YOLO with optimized settings
-            # Use smaller image size for CPU, larger for GPU
-            img_size = 480 if self.device == 'cpu' else 640
-            
-            results = self.yolo_model(
-                frame,
-                verbose=False,
-                conf=conf_threshold,
-                imgsz=img_size,
-                half=False,
-                device=self.device,
-                max_det=20  # Limit detections for speed
-            )
-            
-            objects_detected = []
-            
-            for result in results:
-                if result.boxes is not None:
-                    boxes = result.boxes.xyxy.cpu().numpy()
-                    confidences = result.boxes.conf.cpu().numpy()
-                    classes = result.boxes.cls.cpu().numpy().astype(int)
-                    
-                    for box, conf, cls in zip(boxes, confidences, classes):
-                        class_name = result.names[cls]
-                        
-                        if class_name in self.forbidden_objects and conf > conf_threshold:
-                            x1, y1, x2, y2 = map(int, box)
-                            
-                            objects_detected.append({
-                                'name': class_name,
-                                'confidence': float(conf),
-                                'position': (x1, y1, x2, y2),
-                                'severity': 'high' if class_name in ['cell phone', 'smartphone', 'laptop'] else 'medium'
-                            })
-            
-            self.last_results = objects_detected
-            self.last_cache_time = current_time
-            return objects_detected
-            
+            if self.worker:
+                # Blocks until the worker has processed this very frame
+                result = self.worker.run(yolo_input, packet.frame_id, packet.timestamp, (scale, pad, roi is None),
+                                         self.min_confidence, 20, self.query_ids)
+                if result is None:
+                    return Detections()
+                objects_detected = self._postprocess(result['boxes'], result['confidences'], result['classes'],
+                                                     scale, pad, roi is None)
+            else:
+                objects_detected = self._infer([(yolo_input, scale, pad)], [roi is None])[0]
         except Exception as e:
             print(f"YOLO detection error: {e}")
+            return Detections()
+        
+        self.last_results = objects_detected
+        self.last_detection_time = packet.timestamp
+        return objects_detected
+    
+    def detect_batch(self, frames, rois=None):
+        """Detect forbidden objects in several frames with batched YOLO calls
+        
+        frames: frames or FramePackets from several cameras, or several
+                buffered frames of one camera
+        rois: optional crop per frame (None entries use the whole frame)
+        Returns one detection list per frame, in the same format as detect()
+        """
+        packets = [FramePacket.wrap(frame) for frame in frames]
+        if not packets:
             return []
+        rois = rois or [None] * len(packets)
+        
+        # The worker process handles one frame at a time, each waited for in turn
+        if self.worker:
+            return [self.detect(packet, roi) for packet, roi in zip(packets, rois)]
+        
+        batch_size = self.config.YOLO_BATCH_SIZE if self.config else 8
+        letterboxed = [packet.letterbox(self.img_size, roi) for packet, roi in zip(packets, rois)]
+        
+        full_frame = [roi is None for roi in rois]
+        
+        batch_detections = []
+        for start in range(0, len(letterboxed), batch_size):
+            chunk = letterboxed[start:start + batch_size]
+            try:
+                batch_detections.extend(self._infer(chunk, full_frame[start:start + batch_size]))
+            except Exception as e:
+                print(f"YOLO batch detection error: {e}")
+                batch_detections.extend(Detections() for _ in chunk)
+        
+        self.last_results = batch_detections[-1]
+        self.last_detection_time = max(packet.timestamp for packet in packets)
+        return batch_detections
     
-    def draw_detections(self, frame, objects_detected):
-        """Draw bounding boxes on frame"""
-        for obj in objects_detected:
-            x1, y1, x2, y2 = obj['position']
-            
-            # Color based on severity
-            if obj['severity'] == 'high':
-                color = (0, 0, 255)  # Red
-            elif obj['name'] in ['book', 'notebook', 'paper']:
-                color = (0, 165, 255)  # Orange
-            else:
-                color = (0, 255, 255)  # Yellow
-            
-            # Draw box
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(
-                frame, f"{obj['name']} {obj['confidence']:.2f}",
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2
+    def person_roi(self, pose_results, shape):
+        """Crop (x1, y1, x2, y2) around the student's upper body from pose landmarks
+        
+        Covers head, shoulders, elbows, wrists and hips plus a margin, so
+        objects held in the hands or lying on the desk stay inside.
+        Returns None (whole frame) when no pose is visible.
+        """
+        if not pose_results or not pose_results.pose_landmarks:
+            return None
+        
+        h, w = shape[:2]
+        landmarks = pose_results.pose_landmarks.landmark
+        points = [
+            (landmarks[i].x * w, landmarks[i].y * h)
+            for i in (0, 11, 12, 13, 14, 15, 16, 23, 24)
+            if landmarks[i].visibility > 0.3
+        ]
+        if len(points) < 3:
+            return None
+        
+        xs, ys = zip(*points)
+        margin_x = (max(xs) - min(xs)) * self.roi_margin + 40
+        margin_y = (max(ys) - min(ys)) * self.roi_margin + 40
+        x1 = max(0, int(min(xs) - margin_x))
+        y1 = max(0, int(min(ys) - margin_y))
+        x2 = min(w, int(max(xs) + margin_x))
+        y2 = min(h, int(max(ys) + margin_y))
+        
+        # Degenerate or nearly full-frame crops are not worth it
+        if x2 - x1 < 64 or y2 - y1 < 64 or (x2 - x1) * (y2 - y1) > 0.9 * w * h:
+            return None
+        return (x1, y1, x2, y2)
+    
+    def _compile_class_filter(self):
+        """Build class index filter, per-class thresholds and severity lookup tables"""
+        conf_threshold = self.config.YOLO_CONFIDENCE_THRESHOLD if self.config else 0.5
+        overrides = self.config.get_class_confidence_thresholds() if self.config else {}
+        name_to_id = {name: class_id for class_id, name in self.class_names.items()}
+        num_classes = max(self.class_names) + 1
+        
+        # Names the model cannot emit are reported once instead of being checked every frame
+        missing = [name for name in self.forbidden_objects if name not in name_to_id]
+        if missing:
+            print(f"⚠️ Forbidden objects not in model classes (never detected): {', '.join(missing)}")
+        
+        self.forbidden_ids = sorted(name_to_id[name] for name in self.forbidden_objects if name in name_to_id)
+        
+        # Non-forbidden classes get an unreachable threshold
+        self.class_thresholds = np.full(num_classes, np.inf, dtype=np.float32)
+        for class_id in self.forbidden_ids:
+            self.class_thresholds[class_id] = overrides.get(self.class_names[class_id], conf_threshold)
+        
+        # 'person' boxes are requested too, but kept apart for people counting
+        count_persons = self.config.PERSON_DETECTION if self.config else True
+        self.person_id = name_to_id.get('person') if count_persons else None
+        self.person_confidence = self.config.PERSON_CONFIDENCE if self.config else 0.5
+        self.query_ids = self.forbidden_ids
+        thresholds = self.class_thresholds[self.forbidden_ids].tolist()
+        if self.person_id is not None and self.person_id not in self.forbidden_ids:
+            self.query_ids = sorted(self.forbidden_ids + [self.person_id])
+            thresholds.append(self.person_confidence)
+        
+        # YOLO only needs to return boxes above the lowest threshold in use
+        self.min_confidence = float(min(thresholds)) if thresholds else conf_threshold
+        
+        self.high_severity = np.zeros(num_classes, dtype=bool)
+        for name in ('cell phone', 'smartphone', 'laptop'):
+            if name in name_to_id:
+                self.high_severity[name_to_id[name]] = True
+    
+    def _infer(self, letterboxed, full_frame=None):
+        """Run the in-process model once over [(image, scale, pad), ...]; returns Detections per image
+        
+        full_frame: per image, whether it covers the whole frame (persons are only counted then)
+        """
+        full_frame = full_frame or [True] * len(letterboxed)
+        start = time.perf_counter()
+        outputs = self.backend.predict(
+            [yolo_input for yolo_input, _, _ in letterboxed],
+            self.min_confidence,
+            20,  # Limit detections for speed
+            self.query_ids
+        )
+        per_image = (time.perf_counter() - start) / len(letterboxed)
+        self.inference_time = per_image if self.inference_time is None else \
+            self.inference_time + 0.2 * (per_image - self.inference_time)
+        
+        return [
+            self._postprocess(boxes, confidences, classes, scale, pad, whole)
+            for (boxes, confidences, classes), (_, scale, pad), whole in zip(outputs, letterboxed, full_frame)
+        ]
+    
+    def submit(self, frame, roi=None):
+        """Start detection without waiting; returns False if the detector is still busy
+        
+        The frame is dropped rather than queued, so poll() always delivers
+        results for recent frames.
+        """
+        packet = FramePacket.wrap(frame)
+        
+        if self.worker:
+            yolo_input, scale, pad = packet.letterbox(self.img_size, roi)
+            return self.worker.submit(yolo_input, packet.frame_id, packet.timestamp, (scale, pad, roi is None),
+                                      self.min_confidence, 20, self.query_ids)
+        
+        if self.pending is not None and not self.pending.done():
+            self.async_skipped += 1
+            return False
+        
+        # Letterbox here, before the caller draws on packet.bgr; the thread only gets the copy
+        letterboxed = packet.letterbox(self.img_size, roi)
+        
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='yolo')
+        self.pending = self.executor.submit(self._run_async, letterboxed, roi is None,
+                                            packet.frame_id, packet.timestamp)
+        self.async_submitted += 1
+        return True
+    
+    def _run_async(self, letterboxed, full_frame, frame_id, timestamp):
+        """Executor job: detect one already letterboxed frame"""
+        return {
+            'objects': self._infer([letterboxed], [full_frame])[0],
+            'frame_id': frame_id,
+            'timestamp': timestamp
+        }
+    
+    def poll(self):
+        """Newest detection completed since the last poll, or None
+        
+        Returns {'objects', 'frame_id', 'timestamp'}; timestamp is the time
+        of the frame the detections belong to, not the completion time.
+        """
+        if self.worker:
+            result = self.worker.poll()
+            if result is None:
+                return None
+            result_scale, result_pad, full_frame = result['meta']
+            completed = {
+                'objects': self._postprocess(
+                    result['boxes'], result['confidences'], result['classes'],
+                    result_scale, result_pad, full_frame
+                ),
+                'frame_id': result['frame_id'],
+                'timestamp': result['timestamp']
+            }
+        else:
+            if self.pending is None or not self.pending.done():
+                return None
+            future, self.pending = self.pending, None
+            try:
+                completed = future.result()
+            except Exception as e:
+                print(f"YOLO detection error: {e}")
+                return None
+        
+        self.async_completed += 1
+        self.last_results = completed['objects']
+        self.last_detection_time = completed['timestamp']
+        return completed
+    
+    def has_pending(self):
+        """True while a submitted detection has not been returned by poll() yet"""
+        if self.worker:
+            return bool(self.worker.pending) or self.worker.unpolled is not None
+        return self.pending is not None
+    
+    def get_stats(self):
+        """Asynchronous detection statistics"""
+        if self.worker:
+            return self.worker.get_stats()
+        return {
+            'submitted': self.async_submitted,
+            'skipped': self.async_skipped,
+            'completed': self.async_completed,
+            'in_flight': int(self.pending is not None and not self.pending.done())
+        }
+    
+    def _postprocess(self, boxes, confidences, classes, scale, pad, full_frame=True):
+        """Filter forbidden objects and persons, and map letterboxed boxes back to frame coordinates"""
+        count_persons = full_frame and self.person_id is not None
+        if not len(classes):
+            return Detections([], [] if count_persons else None)
+        
+        # Vectorized: per-class threshold mask, then one affine map for all boxes
+        keep = confidences > self.class_thresholds[classes]
+        pad_x, pad_y = pad
+        positions = (boxes - (pad_x, pad_y, pad_x, pad_y)) / scale
+        kept_classes = classes[keep]
+        high = self.high_severity[kept_classes]
+        
+        objects = [
+            {
+                'name': self.class_names[cls],
+                'confidence': float(conf),
+                'position': tuple(position),
+                'severity': 'high' if is_high else 'medium'
+            }
+            for cls, conf, position, is_high in zip(
+                kept_classes.tolist(), confidences[keep].tolist(),
+                positions[keep].astype(int).tolist(), high.tolist()
             )
+        ]
         
-        return frame
-
+        persons = None
+        if count_persons:
+            is_person = (classes == self.person_id) & (confidences > self.person_confidence)
+            persons = [
+                {'confidence': float(conf), 'position': tuple(position)}
+                for conf, position in zip(confidences[is_person].tolist(), positions[is_person].astype(int).tolist())
+            ]
+        
+        return Detections(objects, persons)
+    
+    def close(self):
+        """Release the worker process or background thread, if any"""
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.worker:
+            self.worker.close()
+            self.worker = None
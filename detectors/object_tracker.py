@@ -0,0 +1,181 @@
+"""
+Lightweight Object Tracker
+تتبع الأجسام بين دورات YOLO
+"""
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """Pairwise IoU of two xyxy box arrays"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _to_state(position):
+    """xyxy -> (cx, cy, w, h)"""
+    x1, y1, x2, y2 = position
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def _to_xyxy(state):
+    """(cx, cy, w, h) -> xyxy"""
+    cx, cy, w, h = state
+    return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+
+class ObjectTracker:
+    """IoU association plus a constant-velocity alpha-beta filter (steady-state Kalman)
+
+    update() takes fresh YOLO detections, predict() extrapolates the tracks on
+    frames where YOLO did not run. Tracks keep their id while they are matched.
+    Velocities are capped relative to the box size and reported boxes are
+    clipped to the frame; a change of YOLO input size starts over, since the
+    jump in box accuracy would otherwise be taken for motion.
+    """
+
+    def __init__(self, config=None):
+        """Initialize tracker"""
+        self.iou_threshold = config.TRACK_IOU_THRESHOLD if config else 0.3
+        self.min_hits = config.TRACK_MIN_HITS if config else 2
+        self.max_age = config.TRACK_MAX_AGE if config else 1.5  # seconds without a match
+
+        # Filter gains: position and velocity correction
+        self.alpha = 0.7
+        self.beta = 0.3
+        self.max_extrapolation = 0.5  # seconds
+        self.max_speed = 2.0  # box sizes per second
+
+        self.tracks = []
+        self.next_id = 1
+        self.frame_shape = None  # (height, width) the reported boxes are clipped to
+        self.img_size = None  # YOLO input size of the last update
+
+    def _predicted_state(self, track, timestamp):
+        """Track state extrapolated to timestamp"""
+        dt = min(max(timestamp - track['last_update'], 0.0), self.max_extrapolation)
+        return track['state'] + track['velocity'] * dt
+
+    def update(self, detections, timestamp, shape=None, img_size=None):
+        """Match fresh detections to tracks; returns confirmed tracked objects
+
+        shape: frame shape to clip boxes to; img_size: YOLO input size of the run
+        """
+        if shape is not None:
+            self.frame_shape = shape[:2]
+        if img_size is not None and self.img_size is not None and img_size != self.img_size:
+            self.reset()
+        if img_size is not None:
+            self.img_size = img_size
+
+        predicted = [self._predicted_state(track, timestamp) for track in self.tracks]
+
+        # Greedy IoU matching within the same class, best overlaps first
+        matches = []
+        if self.tracks and detections:
+            track_boxes = np.array([_to_xyxy(state) for state in predicted])
+            detection_boxes = np.array([det['position'] for det in detections], dtype=np.float64)
+            iou = box_iou(track_boxes, detection_boxes)
+            same_class = np.array([[track['name'] == det['name'] for det in detections] for track in self.tracks])
+            iou[~same_class] = 0.0
+
+            used_tracks, used_detections = set(), set()
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = np.unravel_index(flat, iou.shape)
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in used_tracks or d in used_detections:
+                    continue
+                matches.append((t, d))
+                used_tracks.add(t)
+                used_detections.add(d)
+
+        matched_tracks = {t for t, _ in matches}
+        matched_detections = {d for _, d in matches}
+
+        for t, d in matches:
+            track, detection = self.tracks[t], detections[d]
+            measurement = _to_state(detection['position'])
+            residual = measurement - predicted[t]
+            dt = timestamp - track['last_update']
+
+            track['state'] = predicted[t] + self.alpha * residual
+            if dt > 0:
+                track['velocity'] = self._capped(track['velocity'] + self.beta * residual / dt, track['state'])
+            track['last_update'] = timestamp
+            track['last_seen'] = timestamp
+            track['hits'] += 1
+            track['confidence'] = detection['confidence']
+            track['severity'] = detection['severity']
+
+        # Unmatched detections start new tracks
+        for d, detection in enumerate(detections):
+            if d in matched_detections:
+                continue
+            self.tracks.append({
+                'id': self.next_id,
+                'name': detection['name'],
+                'confidence': detection['confidence'],
+                'severity': detection['severity'],
+                'state': _to_state(detection['position']),
+                'velocity': np.zeros(4),
+                'hits': 1,
+                'first_seen': timestamp,
+                'last_seen': timestamp,
+                'last_update': timestamp
+            })
+            self.next_id += 1
+
+        # Unmatched tracks coast until they are too old
+        self.tracks = [
+            track for i, track in enumerate(self.tracks)
+            if i in matched_tracks or timestamp - track['last_seen'] <= self.max_age
+        ]
+
+        return self._objects(timestamp)
+
+    def _capped(self, velocity, state):
+        """Velocity limited to max_speed box sizes per second on every axis"""
+        w, h = abs(state[2]), abs(state[3])
+        limit = self.max_speed * np.array([w, h, w, h])
+        return np.clip(velocity, -limit, limit)
+
+    def predict(self, timestamp, shape=None):
+        """Confirmed objects at their extrapolated positions (frames without YOLO)"""
+        if shape is not None:
+            self.frame_shape = shape[:2]
+        self.tracks = [track for track in self.tracks if timestamp - track['last_seen'] <= self.max_age]
+        return self._objects(timestamp)
+
+    def _objects(self, timestamp):
+        """Confirmed tracks in the ObjectDetector result format, plus track info"""
+        objects = []
+        for track in self.tracks:
+            if track['hits'] < self.min_hits:
+                continue
+            box = _to_xyxy(self._predicted_state(track, timestamp))
+            if self.frame_shape is not None:
+                height, width = self.frame_shape
+                box = np.clip(box, 0, [width, height, width, height])
+            x1, y1, x2, y2 = map(int, box)
+            if x2 <= x1 or y2 <= y1:
+                continue  # Coasted out of the frame
+            objects.append({
+                'name': track['name'],
+                'confidence': track['confidence'],
+                'position': (x1, y1, x2, y2),
+                'severity': track['severity'],
+                'track_id': track['id'],
+                'predicted': track['last_seen'] != timestamp
+            })
+        return objects
+
+    def reset(self):
+        """Drop all tracks"""
+        self.tracks = []
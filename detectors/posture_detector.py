@@ -4,8 +4,16 @@ Posture Detection Module
 """
 
 import numpy as np
-import time
-from collections import deque
+
+from utils import clock, landmarks
+from utils.ring_buffer import RingBuffer
+
+
+# Pose keypoints used for posture: nose, shoulders (left, right), hips (left, right)
+POSTURE_POINTS = np.array([0, 11, 12, 23, 24])
+
+# Per-frame posture flags, in the order they are stored in the history
+POSTURE_FLAGS = ('leaning_left', 'leaning_right', 'slouching', 'turned_away', 'too_close', 'too_far')
 
 
 class PostureDetector:
@@ -16,7 +24,7 @@ class PostureDetector:
         self.config = config
         
         # Posture tracking
-        self.posture_history = deque(maxlen=30)
+        self.posture_history = RingBuffer(30, [(flag, np.bool_) for flag in POSTURE_FLAGS])
         self.suspicious_posture_count = 0
         
         # Thresholds
@@ -25,22 +33,14 @@ class PostureDetector:
         self.SLOUCHING_THRESHOLD = 0.2  # normalized distance
     
     def detect_posture(self, pose_landmarks, frame_shape):
-        """Detect body posture"""
-        if not pose_landmarks:
+        """Detect body posture (pose landmarks as protobuf or (33, 4) array)"""
+        points = landmarks.pose_array(pose_landmarks)
+        if points is None or len(points) < landmarks.POSE_POINTS:
             return None
         
         try:
-            landmarks = pose_landmarks.landmark
-            
-            # Key points for posture detection
-            nose = landmarks[0] if len(landmarks) > 0 else None
-            left_shoulder = landmarks[11] if len(landmarks) > 11 else None
-            right_shoulder = landmarks[12] if len(landmarks) > 12 else None
-            left_hip = landmarks[23] if len(landmarks) > 23 else None
-            right_hip = landmarks[24] if len(landmarks) > 24 else None
-            
-            if not all([nose, left_shoulder, right_shoulder, left_hip, right_hip]):
-                return None
+            # Key points for posture detection, (x, y) each
+            nose, left_shoulder, right_shoulder, left_hip, right_hip = points[POSTURE_POINTS, :2]
             
             # Calculate posture metrics
             posture_data = {
@@ -52,7 +52,7 @@ class PostureDetector:
                 'too_far': self._is_too_far_from_screen(nose, frame_shape)
             }
             
-            self.posture_history.append(posture_data)
+            self.posture_history.append(clock.now(), *(posture_data[flag] for flag in POSTURE_FLAGS))
             
             # Check for suspicious patterns
             is_suspicious = self._check_suspicious_posture(posture_data)
@@ -67,46 +67,36 @@ class PostureDetector:
     
     def _is_leaning_left(self, left_shoulder, right_shoulder, nose):
         """Check if leaning left (looking at phone/paper on left)"""
-        shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-        deviation = nose.x - shoulder_center_x
-        return deviation < -self.LEANING_THRESHOLD
+        deviation = nose[0] - (left_shoulder[0] + right_shoulder[0]) / 2
+        return bool(deviation < -self.LEANING_THRESHOLD)
     
     def _is_leaning_right(self, left_shoulder, right_shoulder, nose):
         """Check if leaning right (looking at phone/paper on right)"""
-        shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
-        deviation = nose.x - shoulder_center_x
-        return deviation > self.LEANING_THRESHOLD
+        deviation = nose[0] - (left_shoulder[0] + right_shoulder[0]) / 2
+        return bool(deviation > self.LEANING_THRESHOLD)
     
     def _is_slouching(self, left_shoulder, left_hip, right_shoulder, right_hip):
         """Check if slouching (hiding something)"""
-        shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
-        hip_center_y = (left_hip.y + right_hip.y) / 2
-        torso_length = abs(shoulder_center_y - hip_center_y)
+        shoulder_center_y = (left_shoulder[1] + right_shoulder[1]) / 2
+        hip_center_y = (left_hip[1] + right_hip[1]) / 2
         
         # Slouching: shoulders too low relative to hips
-        return (shoulder_center_y - hip_center_y) > self.SLOUCHING_THRESHOLD
+        return bool((shoulder_center_y - hip_center_y) > self.SLOUCHING_THRESHOLD)
     
     def _is_turned_away(self, left_shoulder, right_shoulder, nose):
         """Check if body is turned away from screen"""
-        shoulder_center_x = (left_shoulder.x + right_shoulder.x) / 2
         # If nose is significantly off-center from shoulders
-        deviation = abs(nose.x - shoulder_center_x)
-        return deviation > 0.25
+        deviation = abs(nose[0] - (left_shoulder[0] + right_shoulder[0]) / 2)
+        return bool(deviation > 0.25)
     
     def _is_too_close_to_screen(self, nose, frame_shape):
         """Check if too close to screen (hiding something)"""
         # Normalized distance from center
-        center_x = 0.5
-        center_y = 0.4
-        distance = np.sqrt((nose.x - center_x)**2 + (nose.y - center_y)**2)
-        return distance < 0.15  # Very close
+        return bool(np.hypot(nose[0] - 0.5, nose[1] - 0.4) < 0.15)  # Very close
     
     def _is_too_far_from_screen(self, nose, frame_shape):
         """Check if too far from screen (not engaged)"""
-        center_x = 0.5
-        center_y = 0.4
-        distance = np.sqrt((nose.x - center_x)**2 + (nose.y - center_y)**2)
-        return distance > 0.4  # Very far
+        return bool(np.hypot(nose[0] - 0.5, nose[1] - 0.4) > 0.4)  # Very far
     
     def _check_suspicious_posture(self, posture_data):
         """Check if posture is suspicious"""
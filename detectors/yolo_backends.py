@@ -0,0 +1,344 @@
+"""
+YOLO Inference Backends (PyTorch, ONNX Runtime, OpenVINO)
+واجهات تشغيل YOLO: PyTorch أو ONNX Runtime أو OpenVINO مع تكميم INT8
+"""
+
+import glob
+import json
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+from .object_tracker import box_iou
+
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+NMS_IOU_THRESHOLD = 0.45
+
+
+def parse_backend(spec):
+    """'onnx:int8' -> ('onnx', True)"""
+    name, _, option = spec.partition(':')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown YOLO backend: {name} (choose from {', '.join(BACKENDS)})")
+    return name, option == 'int8'
+
+
+def create_backend(spec, model_path, device='cpu', img_size=480, calibration_dir=None, cache_dir='models'):
+    """Create a backend from a spec such as 'torch', 'onnx', 'onnx:int8' or 'openvino:int8'"""
+    name, int8 = parse_backend(spec)
+    if name == 'torch':
+        return TorchBackend(model_path, device, img_size, cache_dir)
+    if name == 'onnx':
+        return OnnxBackend(model_path, img_size, int8, calibration_dir, cache_dir)
+    return OpenVinoBackend(model_path, img_size, int8, calibration_dir, cache_dir)
+
+
+class TorchBackend:
+    """ultralytics YOLO on PyTorch (CPU or CUDA)"""
+
+    name = 'torch'
+
+    def __init__(self, model_path, device='cpu', img_size=480, cache_dir='models'):
+        """Load the PyTorch model, fused once and cached on disk"""
+        from ultralytics import YOLO
+
+        self.device = device
+        self.img_size = img_size
+
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        fused_path = os.path.join(cache_dir, f"{stem}_fused.pt")
+        cache_valid = os.path.exists(fused_path) and (
+            not os.path.exists(model_path) or os.path.getmtime(fused_path) >= os.path.getmtime(model_path)
+        )
+
+        if cache_valid:
+            # Already fused: YOLO's own fuse() check makes it a no-op
+            self.model = YOLO(fused_path)
+        else:
+            self.model = YOLO(model_path)
+            if hasattr(self.model, 'fuse'):
+                self.model.fuse()
+            self._save_fused(fused_path)
+        self.names = dict(self.model.names)
+
+    def _save_fused(self, path):
+        """Store the fused network in ultralytics checkpoint format"""
+        try:
+            import torch
+
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            checkpoint = getattr(self.model, 'ckpt', None) or {}
+            torch.save({'model': self.model.model, 'train_args': checkpoint.get('train_args', {})}, path)
+        except Exception as e:
+            print(f"⚠️ Could not cache fused model: {e}")
+
+    def predict(self, images, conf, max_det, classes=None):
+        """Run letterboxed BGR images; returns [(boxes_xyxy, confidences, classes), ...]
+
+        classes: optional class indices to keep (filtered inside YOLO's NMS)
+        """
+        results = self.model(
+            images,
+            verbose=False,
+            conf=conf,
+            imgsz=images[0].shape[0],  # follows the letterbox size, which may adapt at runtime
+            half=False,
+            device=self.device,
+            max_det=max_det,
+            classes=classes
+        )
+
+        outputs = []
+        for result in results:
+            if result.boxes is None:
+                outputs.append(_empty())
+                continue
+            outputs.append((
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(int)
+            ))
+        return outputs
+
+
+class _ExportedBackend:
+    """Shared pre/post-processing for exported (raw output) YOLOv8 models"""
+
+    def __init__(self, model_path, img_size, int8, calibration_dir, cache_dir):
+        """Export the model to ONNX once and remember the artifact paths"""
+        self.img_size = img_size
+        self.int8 = int8
+        self.calibration_dir = calibration_dir
+        self.cache_dir = cache_dir
+        self.stem = f"{os.path.splitext(os.path.basename(model_path))[0]}_{img_size}"
+        self.onnx_path = self._export_onnx(model_path)
+        self.names = self._load_names()
+
+    def _artifact(self, suffix):
+        """Path of a cached artifact"""
+        return os.path.join(self.cache_dir, f"{self.stem}{suffix}")
+
+    def _export_onnx(self, model_path):
+        """Export the PyTorch model to ONNX (dynamic batch), reusing the cached file"""
+        path = self._artifact('.onnx')
+        if os.path.exists(path) and os.path.exists(self._artifact('.names.json')):
+            return path
+
+        from ultralytics import YOLO
+
+        print(f"📤 Exporting {model_path} to ONNX (imgsz={self.img_size})...")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        model = YOLO(model_path)
+        exported = model.export(format='onnx', imgsz=self.img_size, dynamic=True)
+        shutil.move(exported, path)
+        with open(self._artifact('.names.json'), 'w', encoding='utf-8') as f:
+            json.dump({int(k): v for k, v in model.names.items()}, f)
+        return path
+
+    def _load_names(self):
+        """Class names saved next to the exported model"""
+        with open(self._artifact('.names.json'), encoding='utf-8') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+
+    def calibration_images(self, limit=200):
+        """Letterboxed, preprocessed (1, 3, H, W) calibration batches, or [] if none"""
+        from utils.frame_packet import FramePacket
+
+        if not self.calibration_dir or not os.path.isdir(self.calibration_dir):
+            return []
+
+        batches = []
+        for path in sorted(glob.glob(os.path.join(self.calibration_dir, '*')))[:limit]:
+            image = cv2.imread(path)
+            if image is not None:
+                batches.append(self.preprocess([FramePacket(image, 0).letterbox(self.img_size)[0]]))
+        return batches
+
+    @staticmethod
+    def preprocess(images):
+        """BGR uint8 (H, W, 3) list -> RGB float32 (N, 3, H, W) in [0, 1]"""
+        batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+    @staticmethod
+    def decode(output, conf, max_det, class_filter=None):
+        """Raw YOLOv8 output (N, 4 + classes, anchors) -> [(boxes_xyxy, confidences, classes), ...]"""
+        outputs = []
+        for prediction in output:
+            prediction = prediction.T
+            scores = prediction[:, 4:]
+            classes = scores.argmax(axis=1)
+            confidences = scores[np.arange(len(scores)), classes]
+
+            keep = confidences > conf
+            if class_filter is not None:
+                keep &= np.isin(classes, class_filter)
+            if not keep.any():
+                outputs.append(_empty())
+                continue
+
+            cx, cy, w, h = prediction[keep, :4].T
+            boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+            confidences, classes = confidences[keep], classes[keep]
+
+            # Class-aware NMS, highest scores first
+            indices = cv2.dnn.NMSBoxesBatched(
+                np.stack([boxes[:, 0], boxes[:, 1], w, h], axis=1).tolist(),
+                confidences.tolist(), classes.tolist(), conf, NMS_IOU_THRESHOLD
+            )
+            indices = np.array(indices, dtype=int).reshape(-1)[:max_det]
+            outputs.append((boxes[indices], confidences[indices], classes[indices].astype(int)))
+        return outputs
+
+    def predict(self, images, conf, max_det, classes=None):
+        """Run letterboxed BGR images; returns [(boxes_xyxy, confidences, classes), ...]"""
+        return self.decode(self.run(self.preprocess(images)), conf, max_det, classes)
+
+
+class OnnxBackend(_ExportedBackend):
+    """ONNX Runtime on CPU, optionally INT8 quantized"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, img_size=480, int8=False, calibration_dir=None, cache_dir='models'):
+        """Export/quantize once (cached) and open an inference session"""
+        import onnxruntime as ort
+
+        super().__init__(model_path, img_size, int8, calibration_dir, cache_dir)
+        path = self._quantize() if int8 else self.onnx_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _quantize(self):
+        """INT8 model: static (calibrated) if calibration images exist, else dynamic"""
+        import onnxruntime as ort
+        from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_dynamic, quantize_static
+
+        path = self._artifact('_int8.onnx')
+        if os.path.exists(path):
+            return path
+
+        batches = self.calibration_images()
+        input_name = ort.InferenceSession(self.onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+        class Reader(CalibrationDataReader):
+            def __init__(self):
+                self.batches = iter(batches)
+
+            def get_next(self):
+                batch = next(self.batches, None)
+                return None if batch is None else {input_name: batch}
+
+        if batches:
+            print(f"🔢 Quantizing to INT8 with {len(batches)} calibration images...")
+            quantize_static(self.onnx_path, path, Reader(),
+                            activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        else:
+            print("🔢 No calibration images, using dynamic INT8 quantization")
+            quantize_dynamic(self.onnx_path, path, weight_type=QuantType.QUInt8)
+        return path
+
+    def run(self, batch):
+        """Raw model output for a preprocessed batch"""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend(_ExportedBackend):
+    """OpenVINO on CPU, optionally INT8 quantized with NNCF"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, img_size=480, int8=False, calibration_dir=None, cache_dir='models'):
+        """Convert/quantize once (cached) and compile for the CPU"""
+        import openvino as ov
+
+        super().__init__(model_path, img_size, int8, calibration_dir, cache_dir)
+        core = ov.Core()
+        path = self._artifact('_int8_openvino.xml' if int8 else '_openvino.xml')
+
+        if not os.path.exists(path):
+            model = core.read_model(self.onnx_path)
+            if int8:
+                model = self._quantize(model)
+            ov.save_model(model, path)
+
+        self.model = core.compile_model(path, 'CPU')
+        self.output = self.model.output(0)
+
+    def _quantize(self, model):
+        """INT8 post-training quantization with NNCF (needs calibration images)"""
+        import nncf
+
+        batches = self.calibration_images()
+        if not batches:
+            raise RuntimeError("OpenVINO INT8 needs calibration images (Config.YOLO_CALIBRATION_DIR)")
+        print(f"🔢 Quantizing to INT8 with {len(batches)} calibration images...")
+        return nncf.quantize(model, nncf.Dataset(batches), preset=nncf.QuantizationPreset.MIXED)
+
+    def run(self, batch):
+        """Raw model output for a preprocessed batch"""
+        return self.model(batch)[self.output]
+
+
+def _empty():
+    """No detections"""
+    return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=int)
+
+
+def compare_backends(specs, images, model_path, device='cpu', img_size=480, conf=0.5,
+                     calibration_dir=None, cache_dir='models'):
+    """Latency and agreement of several backends on the same letterboxed images
+
+    The first spec is the reference: precision/recall count a detection as
+    matched when a reference box of the same class overlaps it with IoU >= 0.5.
+    """
+    report = {}
+    reference = None
+
+    for spec in specs:
+        try:
+            backend = create_backend(spec, model_path, device, img_size, calibration_dir, cache_dir)
+        except Exception as e:
+            print(f"⚠️ Backend {spec} unavailable: {e}")
+            report[spec] = {'error': str(e)}
+            continue
+
+        backend.predict(images[:1], conf, 20)  # Warm-up
+
+        timings = []
+        detections = []
+        for image in images:
+            start = time.perf_counter()
+            detections.extend(backend.predict([image], conf, 20))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        entry = {
+            'mean_ms': float(np.mean(timings)),
+            'p50_ms': float(np.percentile(timings, 50)),
+            'p95_ms': float(np.percentile(timings, 95)),
+            'detections': sum(len(d[0]) for d in detections)
+        }
+
+        if reference is None:
+            reference = detections
+        else:
+            matched, total_ref, total = 0, 0, 0
+            for (boxes, _, classes), (ref_boxes, _, ref_classes) in zip(detections, reference):
+                total += len(boxes)
+                total_ref += len(ref_boxes)
+                if len(boxes) and len(ref_boxes):
+                    iou = box_iou(boxes, ref_boxes) * (classes[:, None] == ref_classes[None, :])
+                    matched += int((iou.max(axis=1) >= 0.5).sum())
+            entry['precision'] = matched / total if total else 1.0
+            entry['recall'] = matched / total_ref if total_ref else 1.0
+
+        report[spec] = entry
+
+    return report
@@ -0,0 +1,223 @@
+"""
+Out-of-Process YOLO Worker
+تشغيل YOLO في عملية منفصلة
+"""
+
+import multiprocessing as mp
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker_main(backend_args, slot_names, slot_shape, requests, results):
+    """Worker process: load YOLO once, then run inference on shared-memory slots"""
+    try:
+        from detectors.yolo_backends import create_backend
+
+        backend = create_backend(*backend_args)
+    except Exception as e:
+        results.put(('failed', str(e)))
+        return
+
+    # Spawned children share the parent's resource tracker; the parent unlinks the slots
+    shms = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    slots = [np.ndarray(slot_shape, dtype=np.uint8, buffer=shm.buf) for shm in shms]
+
+    # Warm-up before reporting ready, so the first real frame is not slow
+    backend.predict([slots[0]], 0.5, 1)
+    results.put(('ready', dict(backend.names)))
+
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+
+            slot, frame_id, conf, max_det, class_filter = request
+            try:
+                boxes, confidences, classes = backend.predict([slots[slot]], conf, max_det, class_filter)[0]
+
+                # Only the small result arrays are pickled, never the frame
+                results.put(('result', slot, frame_id, boxes, confidences, classes))
+            except Exception as e:
+                results.put(('error', slot, frame_id, str(e)))
+    finally:
+        del slots
+        for shm in shms:
+            shm.close()
+
+
+class YoloWorker:
+    """Runs YOLO in a dedicated process; frames are handed over through shared memory"""
+
+    def __init__(self, model_path, device='cpu', img_size=480, num_slots=2, startup_timeout=120.0,
+                 backend='torch', calibration_dir=None, cache_dir='models', mp_context=None):
+        """Create shared-memory slots and start the worker process (mp_context defaults to spawn)"""
+        self.slot_shape = (img_size, img_size, 3)
+        slot_bytes = int(np.prod(self.slot_shape))
+
+        self.shms = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(num_slots)]
+        self.slots = [np.ndarray(self.slot_shape, dtype=np.uint8, buffer=shm.buf) for shm in self.shms]
+        self.free_slots = deque(range(num_slots))
+        self.pending = {}  # slot -> (frame_id, timestamp, meta)
+        self.abandoned = set()  # Slots run() gave up on; their late results are dropped
+
+        # Spawn keeps torch/OpenCV thread pools of the parent out of the child
+        ctx = mp_context or mp.get_context('spawn')
+        self.requests = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=((backend, model_path, device, img_size, calibration_dir, cache_dir),
+                  [shm.name for shm in self.shms], self.slot_shape, self.requests, self.results),
+            daemon=True
+        )
+        self.process.start()
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_skipped = 0
+        self.frames_completed = 0
+        self.errors = 0
+        self.latest = None
+        self.unpolled = None  # Newest result collected by run() on behalf of poll()
+
+        # Wait for the model to load, giving up early if the worker died
+        message = None
+        waited = 0.0
+        while message is None:
+            try:
+                message = self.results.get(timeout=1.0)
+            except queue.Empty:
+                waited += 1.0
+                if not self.process.is_alive() or waited >= startup_timeout:
+                    self.close()
+                    raise RuntimeError("YOLO worker did not start")
+
+        if message[0] != 'ready':
+            self.close()
+            raise RuntimeError(f"YOLO worker failed to load model: {message[1]}")
+        self.names = message[1]
+
+    def submit(self, image, frame_id, timestamp, meta=None, conf=0.5, max_det=20, classes=None):
+        """Copy image into a free slot and queue it; returns False if the worker is saturated"""
+        if not self.free_slots:
+            self.frames_skipped += 1
+            return False
+
+        slot = self.free_slots.popleft()
+        np.copyto(self.slots[slot], image)
+        self.pending[slot] = (frame_id, timestamp, meta)
+        self.requests.put((slot, frame_id, conf, max_det, classes))
+        self.frames_submitted += 1
+        return True
+
+    def run(self, image, frame_id, timestamp, meta=None, conf=0.5, max_det=20, classes=None, timeout=10.0):
+        """Detect one image and wait for its own result; None on error or timeout
+
+        Waits for a free slot first if earlier submits are still in flight;
+        their results are kept for the next poll().
+        """
+        deadline = time.monotonic() + timeout
+        slot = None
+
+        while True:
+            if not self.process.is_alive():
+                self.errors += 1
+                print(f"YOLO worker is not running, frame {frame_id} not detected")
+                return None
+
+            if slot is None and self.free_slots:
+                slot = self.free_slots[0]
+                self.submit(image, frame_id, timestamp, meta, conf, max_det, classes)
+
+            # Short waits, so a worker that dies is noticed without sitting out the timeout
+            remaining = deadline - time.monotonic()
+            try:
+                message = self.results.get(timeout=max(0.0, min(remaining, 0.5)))
+            except queue.Empty:
+                if remaining > 0.5:
+                    continue
+                if slot is not None:
+                    self.abandoned.add(slot)
+                self.errors += 1
+                print(f"YOLO worker timed out on frame {frame_id}")
+                return None
+
+            done_slot, result = self._collect(message)
+            if done_slot == slot:
+                return result
+            if result and (self.unpolled is None or result['frame_id'] >= self.unpolled['frame_id']):
+                self.unpolled = result
+
+    def poll(self):
+        """Collect finished results without blocking; return the newest one, or None if nothing new"""
+        newest, self.unpolled = self.unpolled, None
+
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            _, result = self._collect(message)
+            if result and (self.latest is None or result['frame_id'] >= self.latest['frame_id']):
+                newest = result
+                self.latest = newest
+
+        return newest
+
+    def _collect(self, message):
+        """Free the slot of one worker message; returns (slot, result), result None on error"""
+        kind, slot, frame_id = message[:3]
+        _, timestamp, meta = self.pending.pop(slot, (frame_id, None, None))
+        self.free_slots.append(slot)
+
+        if slot in self.abandoned:
+            # Late result of a frame run() timed out on: its caller has moved on
+            self.abandoned.discard(slot)
+            return slot, None
+        if kind == 'error':
+            self.errors += 1
+            print(f"YOLO worker error: {message[3]}")
+            return slot, None
+
+        self.frames_completed += 1
+        return slot, {
+            'frame_id': frame_id,
+            'timestamp': timestamp,
+            'meta': meta,
+            'boxes': message[3],
+            'confidences': message[4],
+            'classes': message[5]
+        }
+
+    def get_stats(self):
+        """Get worker statistics"""
+        return {
+            'submitted': self.frames_submitted,
+            'skipped': self.frames_skipped,
+            'completed': self.frames_completed,
+            'in_flight': len(self.pending),
+            'errors': self.errors
+        }
+
+    def close(self):
+        """Stop the worker and release shared memory"""
+        if self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+
+        self.slots = []
+        for shm in self.shms:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shms = []
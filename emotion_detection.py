@@ -5,23 +5,28 @@ Advanced Emotion Detection Module
 
 import cv2
 import numpy as np
-import mediapipe as mp
-from collections import deque
-import time
 import json
 
+from utils import clock
+from utils import landmarks
+from utils.ring_buffer import RingBuffer
+
+# Face Mesh indices (left, right): upper/lower eyelids, brows; upper/lower lip
+UPPER_EYELIDS = (159, 386)
+LOWER_EYELIDS = (145, 374)
+BROWS = (66, 296)
+LIPS = (13, 14)
+
 class EmotionDetector:
-    def __init__(self):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, landmark_service=None):
+        # Landmarks come from the shared FaceLandmarkService, no FaceMesh of our own
+        self.landmark_service = landmark_service
         
         self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
-        self.emotion_history = deque(maxlen=30)
+        # Emotions are stored as indices into self.emotions
+        self.emotion_history = RingBuffer(30, (
+            ('emotion', np.int8), 'confidence', ('suspicious', np.bool_), 'suspicious_score'
+        ))
         self.current_emotion = 'neutral'
         self.emotion_confidence = 0.0
         
@@ -33,7 +38,7 @@ class EmotionDetector:
         }
         
         self.emotion_changes = []
-        self.last_emotion_time = time.time()
+        self.last_emotion_time = clock.now()
     
     def detect_emotion(self, frame, face_landmarks=None):
         results = {
@@ -45,8 +50,11 @@ class EmotionDetector:
             'features': {}
         }
         
+        if face_landmarks is None and self.landmark_service is not None:
+            face_landmarks = self.landmark_service.get_face_points(frame)
+        
         # Simple emotion detection based on facial features
-        if face_landmarks:
+        if face_landmarks is not None:
             emotions = self.classify_emotion_from_landmarks(face_landmarks)
             results['emotions'] = emotions
             
@@ -67,12 +75,12 @@ class EmotionDetector:
         return results
     
     def classify_emotion_from_landmarks(self, face_landmarks):
-        landmarks = face_landmarks.landmark
+        points = landmarks.face_array(face_landmarks)
         
         # Calculate facial features
-        eye_openness = self.calculate_eye_openness(landmarks)
-        mouth_openness = self.calculate_mouth_openness(landmarks)
-        brow_position = self.calculate_brow_position(landmarks)
+        eye_openness = self.calculate_eye_openness(points)
+        mouth_openness = self.calculate_mouth_openness(points)
+        brow_position = self.calculate_brow_position(points)
         
         emotions = {}
         
@@ -116,18 +124,17 @@ class EmotionDetector:
         
         return emotions
     
-    def calculate_eye_openness(self, landmarks):
-        left_eye_height = abs(landmarks[159].y - landmarks[145].y)
-        right_eye_height = abs(landmarks[386].y - landmarks[374].y)
-        return (left_eye_height + right_eye_height) / 2
+    # Two-point features index the array directly: cheaper than a fancy-index reduction
+    def calculate_eye_openness(self, points):
+        left = abs(points[UPPER_EYELIDS[0], 1] - points[LOWER_EYELIDS[0], 1])
+        right = abs(points[UPPER_EYELIDS[1], 1] - points[LOWER_EYELIDS[1], 1])
+        return float(left + right) / 2
     
-    def calculate_mouth_openness(self, landmarks):
-        return abs(landmarks[13].y - landmarks[14].y)
+    def calculate_mouth_openness(self, points):
+        return float(abs(points[LIPS[0], 1] - points[LIPS[1], 1]))
     
-    def calculate_brow_position(self, landmarks):
-        left_brow = landmarks[66].y
-        right_brow = landmarks[296].y
-        return (left_brow + right_brow) / 2
+    def calculate_brow_position(self, points):
+        return float(points[BROWS[0], 1] + points[BROWS[1], 1]) / 2
     
     def check_suspicious_emotions(self, results):
         suspicious_score = 0.0
@@ -142,18 +149,19 @@ class EmotionDetector:
         return min(suspicious_score, 1.0)
     
     def update_emotion_history(self, results):
-        current_time = time.time()
-        
-        self.emotion_history.append({
-            'time': current_time,
-            'emotion': results['emotion'],
-            'confidence': results['confidence'],
-            'suspicious': results['suspicious'],
-            'suspicious_score': results['suspicious_score']
-        })
-        
-        if len(self.emotion_history) > 1:
-            prev_emotion = self.emotion_history[-2]['emotion']
+        current_time = clock.now()
+        
+        previous = self.emotion_history.last('emotion')
+        self.emotion_history.append(
+            current_time,
+            self.emotions.index(results['emotion']),
+            results['confidence'],
+            results['suspicious'],
+            results['suspicious_score']
+        )
+        
+        if previous is not None:
+            prev_emotion = self.emotions[previous]
             if prev_emotion != results['emotion']:
                 self.emotion_changes.append({
                     'time': current_time,
@@ -167,50 +175,37 @@ class EmotionDetector:
         self.emotion_confidence = results['confidence']
     
     def get_emotion_statistics(self):
-        if not self.emotion_history:
+        total = len(self.emotion_history)
+        if not total:
             return {}
         
-        stats = {
-            'total_detections': len(self.emotion_history),
-            'emotion_distribution': {},
-            'suspicious_count': 0,
+        history = self.emotion_history.window()
+        counts = np.bincount(history['emotion'], minlength=len(self.emotions))
+        suspicious_count = int(np.count_nonzero(history['suspicious']))
+        
+        return {
+            'total_detections': total,
+            'emotion_distribution': {
+                self.emotions[i]: (count / total) * 100 for i, count in enumerate(counts.tolist()) if count
+            },
+            'suspicious_count': suspicious_count,
             'emotion_changes': len(self.emotion_changes),
             'current_emotion': self.current_emotion,
-            'current_confidence': self.emotion_confidence
+            'current_confidence': self.emotion_confidence,
+            'suspicious_percentage': (suspicious_count / total) * 100
         }
-        
-        for entry in self.emotion_history:
-            emotion = entry['emotion']
-            stats['emotion_distribution'][emotion] = stats['emotion_distribution'].get(emotion, 0) + 1
-            
-            if entry['suspicious']:
-                stats['suspicious_count'] += 1
-        
-        total = len(self.emotion_history)
-        if total > 0:
-            stats['emotion_distribution'] = {
-                k: (v / total) * 100 for k, v in stats['emotion_distribution'].items()
-            }
-            stats['suspicious_percentage'] = (stats['suspicious_count'] / total) * 100
-        
-        return stats
     
     def get_emotion_alert(self):
-        if not self.emotion_history:
-            return None
-        
-        recent_suspicious = [
-            entry for entry in list(self.emotion_history)[-10:]
-            if entry['suspicious'] and entry['suspicious_score'] > 0.7
-        ]
+        recent = self.emotion_history.window(last=10)
+        recent_suspicious = recent[recent['suspicious'] & (recent['suspicious_score'] > 0.7)]
         
         if len(recent_suspicious) >= 3:
             return {
                 'type': 'suspicious_emotion',
                 'message': f"Suspicious emotional behavior detected: {len(recent_suspicious)} suspicious emotions",
                 'severity': 'medium',
-                'emotions': [entry['emotion'] for entry in recent_suspicious],
-                'suspicious_score': sum(entry['suspicious_score'] for entry in recent_suspicious) / len(recent_suspicious)
+                'emotions': [self.emotions[i] for i in recent_suspicious['emotion'].tolist()],
+                'suspicious_score': float(recent_suspicious['suspicious_score'].mean())
             }
         
         return None
@@ -3,10 +3,13 @@ Advanced AI Exam Monitoring System
 نظام مراقبة الامتحانات المتقدم بالذكاء الاصطناعي
 
 Main entry point - uses optimized modular system
+Run with --headless to analyze without drawing or opening a window
 """
 
+import sys
+
 from core.monitor import ExamMonitor
 
 if __name__ == "__main__":
-    monitor = ExamMonitor()
+    monitor = ExamMonitor(headless=True if "--headless" in sys.argv else None)
     monitor.run()
@@ -0,0 +1,34 @@
+"""
+Offline Replay and Benchmark
+إعادة تشغيل فيديو مسجل عبر نظام المراقبة لقياس الأداء
+
+Usage: python replay.py recording.mp4 [--fps 30] [--max-frames 500] [--render] [--batch 8] [--output report.json]
+"""
+
+import argparse
+
+from core.replay import ReplayRunner
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a video or image sequence through the exam monitor")
+    parser.add_argument("source", help="video file, image directory or glob pattern")
+    parser.add_argument("--fps", type=float, default=None, help="simulated capture rate (default: video rate)")
+    parser.add_argument("--max-frames", type=int, default=None, help="stop after this many frames")
+    parser.add_argument("--render", action="store_true", help="run the drawing code too (no window is shown)")
+    parser.add_argument("--respect-budget", action="store_true", help="apply the frame time budget (machine dependent)")
+    parser.add_argument("--batch", type=int, default=1, help="buffer frames and run YOLO on them in batches of this size")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    runner = ReplayRunner(
+        args.source,
+        fps=args.fps,
+        headless=not args.render,
+        max_frames=args.max_frames,
+        respect_budget=args.respect_budget,
+        batch_size=args.batch
+    )
+    report = runner.run()
+    ReplayRunner.print_report(report)
+    if args.output:
+        ReplayRunner.save_report(report, args.output)
@@ -0,0 +1,15 @@
+"""
+Multi-Stream Exam Monitoring Server
+خادم مراقبة عدة طلاب في عملية واحدة
+
+Usage: python server.py 0 1 rtsp://camera/stream recording.mp4
+"""
+
+import sys
+
+from core.server import MonitoringServer
+
+if __name__ == "__main__":
+    sources = [int(arg) if arg.isdigit() else arg for arg in sys.argv[1:]] or [0]
+    server = MonitoringServer(sources)
+    server.run()
@@ -0,0 +1,20 @@
+"""
+Test configuration
+إعدادات الاختبارات
+"""
+
+import os
+import sys
+
+import pytest
+
+# Modules import each other as top-level packages (core, detectors, utils)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def phone():
+    """Factory for one detection in the ObjectDetector result format"""
+    def make(position=(100, 100, 200, 200), confidence=0.9, name='cell phone'):
+        return {'name': name, 'confidence': confidence, 'position': position, 'severity': 'high'}
+    return make
@@ -0,0 +1,37 @@
+"""
+Alert Manager Tests
+اختبارات إدارة التنبيهات
+"""
+
+import pytest
+
+from utils import clock
+from utils.alerts import AlertManager
+from utils.clock import ReplayClock
+
+
+@pytest.fixture
+def replay_clock():
+    """Simulated clock starting at 0 (the worst case for the cooldown)"""
+    simulated = ReplayClock()
+    previous = clock.set_clock(simulated)
+    yield simulated
+    clock.set_clock(previous)
+
+
+def test_first_alert_is_not_swallowed_by_cooldown(replay_clock):
+    manager = AlertManager()
+
+    assert manager.add_alert("Face not visible", "face_away")
+    assert manager.cheating_score == manager.SCORE_PENALTIES['face_away']
+
+
+def test_cooldown_applies_between_alerts(replay_clock):
+    manager = AlertManager()
+    manager.add_alert("Face not visible", "face_away")
+
+    replay_clock.advance(1.0)
+    assert manager.add_alert("Talking detected", "talking") is None
+
+    replay_clock.advance(manager.alert_cooldown)
+    assert manager.add_alert("Talking detected", "talking")
@@ -0,0 +1,82 @@
+"""
+Threaded Capture Tests
+اختبارات الالتقاط في خيط منفصل
+"""
+
+import queue
+import time
+
+import numpy as np
+import pytest
+
+from core.capture import FrameGrabber
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in fed frame by frame from the test; None ends the stream"""
+
+    def __init__(self):
+        self.frames = queue.Queue()
+
+    def set(self, prop, value):
+        return True
+
+    def read(self):
+        frame = self.frames.get()
+        return (False, None) if frame is None else (True, frame)
+
+
+def frame(value):
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def capture():
+    return FakeCapture()
+
+
+@pytest.fixture
+def grabber(capture):
+    grabber = FrameGrabber(capture, buffer_size=2).start()
+    yield grabber
+    capture.frames.put(None)
+    grabber.stop()
+
+
+def test_read_returns_newest_frame_and_counts_skipped(capture, grabber):
+    for value in (1, 2, 3):
+        capture.frames.put(frame(value))
+    wait_for(lambda: grabber.frames_captured == 3)
+
+    ok, image, timestamp = grabber.read(timeout=0.5)
+
+    assert ok and image[0, 0, 0] == 3 and timestamp is not None
+    assert grabber.get_stats()['dropped'] == 2
+
+
+def test_read_waits_for_a_new_frame(capture, grabber):
+    capture.frames.put(frame(1))
+    assert grabber.read(timeout=0.5)[0]
+
+    assert grabber.read(timeout=0.05) == (False, None, None)
+
+    capture.frames.put(frame(2))
+    ok, image, _ = grabber.read(timeout=0.5)
+    assert ok and image[0, 0, 0] == 2
+
+
+def test_end_of_stream_stops_reading(capture, grabber):
+    capture.frames.put(None)
+    wait_for(lambda: not grabber.running)
+
+    assert grabber.failed
+    assert grabber.get_stats()['failed']
+    assert grabber.read(timeout=0.05) == (False, None, None)
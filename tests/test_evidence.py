@@ -0,0 +1,67 @@
+"""
+Object Evidence Tests
+اختبارات تجميع أدلة الأجسام
+"""
+
+import pytest
+
+from utils.evidence import ObjectEvidence
+
+
+def test_single_detection_is_not_confirmed(phone):
+    evidence = ObjectEvidence()
+
+    assert evidence.update([phone()], 0.0) == []
+    assert evidence.get_active() == []
+
+
+def test_repeated_detections_confirm_once(phone):
+    evidence = ObjectEvidence()
+
+    events = [evidence.update([phone()], t * 0.2) for t in range(8)]
+
+    appeared = [(i, e) for i, run in enumerate(events) for e in run]
+    assert len(appeared) == 1
+    index, event = appeared[0]
+    assert index == 2  # 3 x 0.9 / 5 reaches the 0.4 threshold
+    assert event['event'] == 'appeared'
+    assert event['evidence'] == pytest.approx(0.54)
+    assert evidence.get_active() == ['cell phone']
+
+
+def test_flicker_does_not_release_confirmed_object(phone):
+    evidence = ObjectEvidence()
+    for t in range(5):
+        evidence.update([phone()], t)
+
+    assert evidence.update([], 5) == []
+    assert evidence.update([phone()], 6) == []
+    assert evidence.get_active() == ['cell phone']
+
+
+def test_absence_releases_with_duration(phone):
+    evidence = ObjectEvidence()
+    for t in range(5):
+        evidence.update([phone()], float(t))
+
+    events = [event for t in range(5, 10) for event in evidence.update([], float(t))]
+
+    assert [event['event'] for event in events] == ['disappeared']
+    assert events[0]['duration'] == pytest.approx(9.0 - 2.0)  # confirmed at t=2, released once all votes are gone
+    assert evidence.get_active() == []
+    assert evidence.votes == {}
+
+
+def test_best_confidence_per_class_counts_once_per_run(phone):
+    evidence = ObjectEvidence(window=2, on_threshold=0.4)
+
+    events = evidence.update([phone(confidence=0.3), phone(confidence=0.9), phone(confidence=0.5)], 0.0)
+
+    assert [event['object']['confidence'] for event in events] == [0.9]
+
+
+def test_low_confidence_never_confirms(phone):
+    evidence = ObjectEvidence()
+
+    for t in range(20):
+        assert evidence.update([phone(confidence=0.35)], t) == []
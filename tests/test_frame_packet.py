@@ -0,0 +1,78 @@
+"""
+Frame Packet Tests
+اختبارات حزمة الإطار المشتركة
+"""
+
+import numpy as np
+import pytest
+
+from utils.frame_packet import FramePacket
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return (rng.random((480, 640, 3)) * 255).astype(np.uint8)
+
+
+def test_wrap_keeps_existing_packet(image):
+    packet = FramePacket(image, 1.0, 7)
+
+    assert FramePacket.wrap(packet) is packet
+    assert FramePacket.wrap(image).bgr is image
+
+
+def test_views_are_built_once(image):
+    packet = FramePacket(image, 0.0)
+
+    assert packet.rgb is packet.rgb
+    assert packet.gray is packet.gray
+    assert packet.half.shape == (240, 320, 3)
+    assert packet.gray.shape == (240, 320)
+    assert np.array_equal(packet.rgb, image[..., ::-1])
+    assert not packet.rgb.flags.writeable
+
+
+def test_letterbox_maps_back_to_frame(image):
+    packet = FramePacket(image, 0.0)
+
+    canvas, scale, (pad_x, pad_y) = packet.letterbox(320)
+
+    assert canvas.shape == (320, 320, 3)
+    assert packet.letterbox(320)[0] is canvas
+    # A frame corner lands where (point * scale + pad) says it does
+    assert scale == pytest.approx(0.5)
+    assert (pad_x, pad_y) == (0, 40)
+    assert np.all(canvas[:40] == 114) and np.all(canvas[280:] == 114)
+
+
+def test_letterbox_roi_pad_includes_crop_origin(image):
+    packet = FramePacket(image, 0.0)
+    roi = (100, 50, 300, 250)
+
+    canvas, scale, pad = packet.letterbox(200, roi)
+
+    # frame = (letterboxed - pad) / scale holds for the crop as well
+    assert scale == pytest.approx(1.0)
+    frame_point = (np.array([0.0, 0.0]) - pad) / scale
+    assert tuple(frame_point) == pytest.approx((100, 50))
+    assert np.array_equal(canvas, image[50:250, 100:300])
+
+
+def test_analysis_view_is_downscaled_rgb(image):
+    packet = FramePacket(image, 0.0)
+
+    view = packet.analysis_rgb(320)
+
+    assert view.shape == (240, 320, 3)
+    assert not view.flags.writeable
+    assert packet.analysis_rgb(320) is view
+    assert np.abs(view.astype(int) - packet.half[..., ::-1]).max() <= 1
+
+
+def test_analysis_view_full_resolution_when_not_smaller(image):
+    packet = FramePacket(image, 0.0)
+
+    assert packet.analysis_rgb(None) is packet.rgb
+    assert packet.analysis_rgb(640) is packet.rgb
+    assert packet.analysis_rgb(480).shape == (360, 480, 3)
@@ -0,0 +1,84 @@
+"""
+Frame Gating Tests
+اختبارات تخطي الإطارات
+"""
+
+import numpy as np
+import pytest
+
+from core.gating import FrameGate
+from utils.frame_packet import FramePacket
+
+
+@pytest.fixture
+def scene():
+    rng = np.random.default_rng(0)
+    return (rng.random((240, 320, 3)) * 255).astype(np.uint8)
+
+
+def nudged(frame):
+    """Same picture, different buffer contents (new hash, no real motion)"""
+    frame = frame.copy()
+    frame[0, 0] ^= 1
+    return frame
+
+
+def test_first_frame_is_processed():
+    gate = FrameGate()
+
+    assert gate.check(FramePacket(np.zeros((240, 320, 3), np.uint8), 0.0))['action'] == 'process'
+
+
+def test_duplicate_and_static_frames(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+
+    assert gate.check(FramePacket(scene.copy(), 0.1))['action'] == 'duplicate'
+    assert gate.check(FramePacket(nudged(scene), 0.2))['action'] == 'static'
+
+
+def test_motion_is_processed(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+
+    moved = np.roll(scene, 40, axis=1)
+
+    assert gate.check(FramePacket(moved, 0.1))['action'] == 'process'
+
+
+def test_unchanged_frames_are_reanalyzed_after_max_reuse(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+
+    assert gate.check(FramePacket(scene, 0.3))['action'] == 'duplicate'
+    assert gate.check(FramePacket(scene, 0.6))['action'] == 'process'
+
+
+def test_force_always_processes(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+
+    assert gate.check(FramePacket(scene, 0.1), force=True)['action'] == 'process'
+
+
+def test_dark_and_blurry_frames_start_unusable_streak(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+
+    assert gate.check(FramePacket(np.zeros_like(scene), 1.0))['action'] == 'dark'
+    assert gate.check(FramePacket(np.full_like(scene, 128), 2.0))['action'] == 'blurry'
+    assert gate.unusable_duration(4.0) == pytest.approx(3.0)
+
+    gate.check(FramePacket(np.roll(scene, 40, axis=1), 5.0))
+    assert gate.unusable_duration(6.0) == 0.0
+
+
+def test_stats_count_skips(scene):
+    gate = FrameGate()
+    gate.check(FramePacket(scene, 0.0))
+    gate.check(FramePacket(scene, 0.1))
+
+    stats = gate.get_stats()
+
+    assert stats['frames'] == 2
+    assert stats['skip_rate'] == pytest.approx(0.5)
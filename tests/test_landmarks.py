@@ -0,0 +1,77 @@
+"""
+Landmark Array Tests
+اختبارات تحويل المعالم إلى مصفوفات
+"""
+
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils import landmarks
+
+
+class WireLandmarks:
+    """Landmark list that serializes like a MediaPipe NormalizedLandmarkList"""
+
+    def __init__(self, values, fields=None):
+        self.values = np.asarray(values, dtype=np.float32)
+        self.fields = fields or list(range(1, self.values.shape[1] + 1))
+        self.landmark = [
+            SimpleNamespace(**dict(zip(('x', 'y', 'z', 'visibility', 'presence'), row.tolist())))
+            for row in self.values
+        ]
+
+    def SerializeToString(self):
+        data = b''
+        for row in self.values:
+            message = b''.join(struct.pack('<Bf', (field << 3) | 5, value) for field, value in zip(self.fields, row))
+            data += bytes([0x0A, len(message)]) + message
+        return data
+
+
+def test_plain_objects_use_attribute_fallback():
+    values = np.random.default_rng(0).random((478, 3))
+    face = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in values])
+
+    points = landmarks.face_array(face)
+
+    assert points.dtype == np.float32 and points.shape == (478, 3)
+    assert np.allclose(points, values, atol=1e-6)
+
+
+def test_serialized_face_is_copied_in_bulk():
+    values = np.random.default_rng(1).random((468, 3))
+    face = WireLandmarks(values)
+    face.landmark = [None] * len(values)  # the attributes must not be read
+
+    assert np.allclose(landmarks.face_array(face), values, atol=1e-6)
+
+
+def test_serialized_pose_keeps_visibility():
+    values = np.random.default_rng(2).random((33, 5))
+
+    points = landmarks.pose_array(WireLandmarks(values))
+
+    assert points.shape == (33, 4)
+    assert np.allclose(points, values[:, :4], atol=1e-6)
+
+
+def test_unexpected_layout_falls_back_to_attributes():
+    values = np.random.default_rng(3).random((33, 4))
+    pose = WireLandmarks(values, fields=[1, 2, 3, 5])  # visibility missing, presence set
+
+    points = landmarks.pose_array(pose)
+
+    assert np.allclose(points, values, atol=1e-6)  # read from the attributes
+
+
+def test_hands_are_stacked():
+    values = np.random.default_rng(4).random((2, landmarks.HAND_POINTS, 3))
+    results = SimpleNamespace(multi_hand_landmarks=[WireLandmarks(hand) for hand in values])
+
+    hands = landmarks.hand_arrays(results)
+
+    assert hands.shape == (2, landmarks.HAND_POINTS, 3)
+    assert np.allclose(hands, values, atol=1e-6)
+    assert landmarks.hand_arrays(SimpleNamespace(multi_hand_landmarks=None)).shape == (0, landmarks.HAND_POINTS, 3)
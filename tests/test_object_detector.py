@@ -0,0 +1,178 @@
+"""
+Object Detector Tests (stub inference backend)
+اختبارات كاشف الأجسام باستخدام نموذج بديل
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from detectors import object_detector
+from detectors.object_detector import ObjectDetector
+from utils.frame_packet import FramePacket
+
+NAMES = {0: 'person', 63: 'laptop', 67: 'cell phone', 73: 'book', 74: 'clock'}
+
+
+class StubBackend:
+    """Returns the same letterboxed boxes for every image and records the calls"""
+
+    name = 'stub'
+    names = NAMES
+
+    def __init__(self):
+        self.boxes = np.array([[100, 100, 200, 200]], dtype=np.float32)
+        self.confidences = np.array([0.9], dtype=np.float32)
+        self.classes = np.array([67])
+        self.batches = []
+        self.inputs = []
+        self.release = None  # threading.Event that holds predict() back
+
+    def predict(self, images, conf, max_det, classes=None):
+        if self.release is not None:
+            self.release.wait(2.0)
+        self.batches.append(len(images))
+        self.inputs.extend(image.copy() for image in images)
+        return [(self.boxes, self.confidences, self.classes) for _ in images]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = StubBackend()
+    monkeypatch.setattr(object_detector, 'create_backend', lambda *args, **kwargs: backend)
+    return backend
+
+
+@pytest.fixture
+def detector(backend):
+    detector = ObjectDetector(use_worker=False)
+    yield detector
+    detector.close()
+
+
+@pytest.fixture
+def frame():
+    return np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+def to_frame(packet, size, box, roi=None):
+    """Letterboxed box -> frame coordinates, the way the detector maps them"""
+    _, scale, (pad_x, pad_y) = packet.letterbox(size, roi)
+    x1, y1, x2, y2 = box
+    return tuple(int(v) for v in ((x1 - pad_x) / scale, (y1 - pad_y) / scale,
+                                  (x2 - pad_x) / scale, (y2 - pad_y) / scale))
+
+
+def test_detect_maps_boxes_to_frame(detector, frame):
+    packet = FramePacket(frame, 1.0)
+
+    objects = detector.detect(packet)
+
+    assert [obj['name'] for obj in objects] == ['cell phone']
+    assert objects[0]['position'] == to_frame(packet, detector.img_size, (100, 100, 200, 200))
+    assert objects[0]['severity'] == 'high'
+    assert detector.last_detection_time == 1.0
+
+
+def test_detect_batch_returns_one_result_per_frame(detector, backend, frame):
+    packets = [FramePacket(frame, t) for t in range(10)]
+
+    results = detector.detect_batch(packets)
+
+    assert len(results) == 10
+    assert all(len(objects) == 1 for objects in results)
+    assert backend.batches == [8, 2]  # YOLO_BATCH_SIZE defaults to 8
+    assert detector.detect_batch([]) == []
+
+
+def test_detect_with_roi_maps_through_crop(detector, frame):
+    packet = FramePacket(frame, 0.0)
+    roi = (100, 50, 420, 370)
+
+    objects = detector.detect(packet, roi)
+
+    assert objects[0]['position'] == to_frame(packet, detector.img_size, (100, 100, 200, 200), roi)
+
+
+def test_person_roi_covers_upper_body(detector):
+    from types import SimpleNamespace
+
+    def landmark(x, y, visibility=1.0):
+        return SimpleNamespace(x=x, y=y, visibility=visibility)
+
+    points = [landmark(0.0, 0.0, 0.0)] * 33
+    for i, (x, y) in {0: (0.5, 0.3), 11: (0.4, 0.5), 12: (0.6, 0.5), 23: (0.42, 0.8), 24: (0.58, 0.8)}.items():
+        points[i] = landmark(x, y)
+    pose = SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points))
+
+    x1, y1, x2, y2 = detector.person_roi(pose, (480, 640))
+
+    assert x1 < 0.4 * 640 and x2 > 0.6 * 640 and y1 < 0.3 * 480 and y2 == 480
+    assert detector.person_roi(SimpleNamespace(pose_landmarks=None), (480, 640)) is None
+
+
+def test_class_filter_uses_per_class_thresholds(detector):
+    boxes = np.array([[0, 0, 10, 10]] * 4, dtype=np.float32)
+    confidences = np.array([0.9, 0.4, 0.9, 0.9], dtype=np.float32)
+    classes = np.array([67, 67, 74, 73])
+
+    objects = detector._postprocess(boxes, confidences, classes, 1.0, (0, 0))
+
+    # clock is not forbidden, the 0.4 phone is under the default 0.5 threshold
+    assert [(obj['name'], obj['severity']) for obj in objects] == [('cell phone', 'high'), ('book', 'medium')]
+    assert 74 not in detector.forbidden_ids
+
+
+def test_forbidden_names_missing_from_model_are_dropped(detector):
+    names = {detector.class_names[class_id] for class_id in detector.forbidden_ids}
+
+    assert names == {'cell phone', 'laptop', 'book'}
+    assert detector.min_confidence == pytest.approx(0.5)
+
+
+def test_submit_and_poll_in_thread_mode(detector, backend, frame):
+    backend.release = threading.Event()
+
+    assert detector.submit(FramePacket(frame, 1.0, 1))
+    assert not detector.submit(FramePacket(frame, 2.0, 2))  # busy: dropped, not queued
+    assert detector.poll() is None
+    assert detector.has_pending()
+
+    backend.release.set()
+    detector.pending.result(timeout=2.0)
+    completed = detector.poll()
+
+    assert completed['frame_id'] == 1 and completed['timestamp'] == 1.0
+    assert len(completed['objects']) == 1
+    assert detector.poll() is None
+    assert not detector.has_pending()
+    assert detector.get_stats() == {'submitted': 1, 'skipped': 1, 'completed': 1, 'in_flight': 0}
+
+
+def test_submit_letterboxes_before_the_frame_is_drawn_on(detector, backend, frame):
+    backend.release = threading.Event()
+    packet = FramePacket(frame, 1.0, 1)
+    expected = packet.letterbox(detector.img_size)[0].copy()
+
+    detector.submit(packet)
+    packet.bgr[:] = 255  # overlay drawn in place while YOLO runs
+    backend.release.set()
+    detector.pending.result(timeout=2.0)
+
+    assert np.array_equal(backend.inputs[0], expected)
+
+
+def test_person_boxes_only_on_full_frame_runs(detector, backend, frame):
+    backend.boxes = np.array([[100, 100, 200, 200], [300, 100, 400, 300], [0, 0, 5, 5]], dtype=np.float32)
+    backend.confidences = np.array([0.9, 0.8, 0.3], dtype=np.float32)
+    backend.classes = np.array([67, 0, 0])
+    packet = FramePacket(frame, 0.0)
+
+    full = detector.detect(packet)
+    cropped = detector.detect(packet, (100, 50, 420, 370))
+
+    assert [obj['name'] for obj in full] == ['cell phone']  # persons are not forbidden objects
+    assert len(full.persons) == 1  # the 0.3 box is under PERSON_CONFIDENCE
+    assert cropped.persons is None
+    assert 0 in detector.query_ids
@@ -0,0 +1,92 @@
+"""
+Object Tracker Tests
+اختبارات تتبع الأجسام
+"""
+
+import numpy as np
+import pytest
+
+from detectors.object_tracker import ObjectTracker, box_iou
+
+SHAPE = (480, 640, 3)
+
+
+def test_box_iou():
+    a = np.array([[0, 0, 10, 10]], dtype=np.float64)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=np.float64)
+
+    assert box_iou(a, b)[0] == pytest.approx([1.0, 1 / 3, 0.0])
+
+
+def test_track_is_reported_after_min_hits_with_stable_id(phone):
+    tracker = ObjectTracker()
+
+    assert tracker.update([phone((100, 100, 200, 200))], 0.0) == []
+    first = tracker.update([phone((104, 100, 204, 200))], 0.2)
+    second = tracker.update([phone((108, 100, 208, 200))], 0.4)
+
+    assert len(first) == len(second) == 1
+    assert first[0]['track_id'] == second[0]['track_id']
+    assert not second[0]['predicted']
+
+
+def test_different_classes_do_not_match(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((100, 100, 200, 200))], 0.0)
+    book = phone((100, 100, 200, 200), name='book')
+    tracker.update([book], 0.2)
+
+    assert len(tracker.tracks) == 2
+
+
+def test_predict_extrapolates_between_runs(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((100, 100, 200, 200))], 0.0)
+    tracker.update([phone((120, 100, 220, 200))], 0.2)
+
+    objects = tracker.predict(0.3)
+
+    assert objects[0]['predicted']
+    assert objects[0]['position'][0] > 114  # still moving right
+
+
+def test_tracks_expire_after_max_age(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((100, 100, 200, 200))], 0.0)
+    tracker.update([phone((100, 100, 200, 200))], 0.2)
+
+    assert tracker.predict(1.5) != []
+    assert tracker.predict(1.8) == []
+
+
+def test_extrapolated_boxes_stay_inside_frame(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((200, 60, 300, 160))], 0.0, SHAPE)
+    tracker.update([phone((200, 10, 300, 110))], 0.1, SHAPE)
+
+    for t in np.arange(0.1, 1.5, 0.1):
+        for obj in tracker.predict(t, SHAPE):
+            x1, y1, x2, y2 = obj['position']
+            assert 0 <= x1 < x2 <= 640 and 0 <= y1 < y2 <= 480
+
+
+def test_velocity_is_capped_relative_to_box_size(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((100, 100, 200, 200))], 0.0)
+    tracker.update([phone((140, 100, 240, 200))], 0.05)  # 800 px/s, cap is 200 px/s
+
+    velocity = tracker.tracks[0]['velocity']
+
+    assert abs(velocity[0]) == pytest.approx(tracker.max_speed * tracker.tracks[0]['state'][2])
+
+
+def test_input_size_change_resets_tracks(phone):
+    tracker = ObjectTracker()
+    tracker.update([phone((100, 100, 200, 200))], 0.0, SHAPE, 480)
+    tracker.update([phone((100, 100, 200, 200))], 0.2, SHAPE, 480)
+    old_id = tracker.tracks[0]['id']
+
+    objects = tracker.update([phone((100, 100, 200, 200))], 0.4, SHAPE, 416)
+
+    assert objects == []  # new track, not confirmed yet
+    assert [track['id'] for track in tracker.tracks] != [old_id]
@@ -0,0 +1,74 @@
+"""
+Adaptive YOLO Resolution Tests
+اختبارات التحكم بدقة إدخال YOLO
+"""
+
+from core.resolution import ResolutionController
+
+
+def run(controller, seconds, frame_time, yolo_time, rate=None, risk=None, fps=30):
+    """Feed constant measurements; frame_time/yolo_time may be callables of the current size"""
+    for i in range(1, int(seconds * fps) + 1):
+        size = controller.img_size
+        controller.update(
+            frame_time(size) if callable(frame_time) else frame_time,
+            yolo_time(size) if callable(yolo_time) else yolo_time,
+            risk, i / fps, rate
+        )
+    return controller.img_size
+
+
+def test_steps_down_when_yolo_causes_the_overrun():
+    controller = ResolutionController(initial=480, target_ms=33.0)
+
+    def yolo(size):
+        return 0.030 * (size / 480) ** 2
+
+    size = run(controller, 10, lambda size: 0.015 + yolo(size), yolo)
+
+    assert size < 480
+    assert controller.changes[0]['reason'] == 'over budget'
+
+
+def test_keeps_size_when_the_rest_of_the_frame_is_over_budget():
+    controller = ResolutionController(initial=480, target_ms=33.0)
+
+    # MediaPipe alone takes 40 ms; YOLO runs at 5 Hz
+    assert run(controller, 10, 0.050, 0.060, rate=5.0) == 480
+    assert controller.changes == []
+
+
+def test_yolo_share_follows_scheduled_rate():
+    controller = ResolutionController(initial=480)
+    run(controller, 2, 0.020, 0.030, rate=5.0)
+
+    # 5 runs per second at 30 fps: a sixth of the inference time per frame
+    assert abs(controller.yolo_share() - 0.030 * 5 / 30) < 1e-3
+
+
+def test_steps_up_with_headroom_without_oscillating():
+    controller = ResolutionController(initial=416, target_ms=33.0)
+
+    size = run(controller, 20, 0.010, 0.005)
+
+    assert size == 640
+    assert all(change['reason'] == 'headroom' for change in controller.changes)
+
+
+def test_high_risk_jumps_to_largest_size():
+    controller = ResolutionController(initial=320)
+    controller.update(0.050, 0.040, 'high', 0.0)
+
+    assert controller.img_size == 640
+    assert controller.changes[-1]['reason'] == 'risk high'
+
+
+def test_medium_risk_keeps_default_size():
+    controller = ResolutionController(initial=480)
+
+    def yolo(size):
+        return 0.040 * (size / 480) ** 2
+
+    size = run(controller, 10, lambda size: 0.010 + yolo(size), yolo, risk='medium')
+
+    assert size == 480
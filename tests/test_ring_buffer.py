@@ -0,0 +1,99 @@
+"""
+Ring Buffer Tests
+اختبارات المخزن الدائري
+"""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from utils.ring_buffer import RingBuffer
+
+
+def test_empty_buffer():
+    buffer = RingBuffer(4, ('value',))
+
+    assert len(buffer) == 0
+    assert buffer.first() is None and buffer.last('value') is None
+    assert buffer.count() == 0 and buffer.count(newer_than=0.0) == 0
+    assert buffer.mean('value') is None and buffer.max('value') is None
+    assert len(buffer.window('value')) == 0
+
+
+def test_overwrites_oldest_like_bounded_deque():
+    buffer = RingBuffer(3, ('value',))
+    reference = deque(maxlen=3)
+
+    for t in range(7):
+        buffer.append(float(t), t * 10)
+        reference.append((float(t), t * 10))
+
+        assert len(buffer) == len(reference)
+        assert buffer.first() == reference[0][0]
+        assert buffer.last('value') == reference[-1][1]
+        assert buffer.window('value').tolist() == [value for _, value in reference]
+
+
+def test_time_window_queries():
+    buffer = RingBuffer(5, ('value',))
+    for t, value in enumerate([1.0, 5.0, 2.0, 8.0, 4.0, 6.0, 3.0]):
+        buffer.append(float(t), value)
+
+    # Rows 2..6 remain; newer_than is exclusive
+    assert buffer.count() == 5
+    assert buffer.count(newer_than=4.0) == 2
+    assert buffer.mean('value', newer_than=3.0) == pytest.approx((4.0 + 6.0 + 3.0) / 3)
+    assert buffer.max('value', newer_than=3.0) == 6.0
+    assert buffer.max('value') == 8.0
+    assert buffer.window('value', newer_than=4.0).tolist() == [6.0, 3.0]
+    assert buffer.mean('value', newer_than=10.0) is None
+
+
+def test_window_last_rows_in_order_across_wrap():
+    buffer = RingBuffer(4, ('value',))
+    for t in range(6):
+        buffer.append(float(t), t)
+
+    assert buffer.window('value', last=3).tolist() == [3, 4, 5]
+    assert buffer.window('value', last=10).tolist() == [2, 3, 4, 5]
+    assert buffer.window('timestamp', newer_than=2.0, last=3).tolist() == [3.0, 4.0, 5.0]
+
+
+def test_typed_fields_and_full_rows():
+    buffer = RingBuffer(2, (('x', np.int32), ('flag', bool)))
+    buffer.append(1.0, 7, True)
+    buffer.append(2.0, -3, False)
+
+    rows = buffer.window()
+
+    assert buffer.fields == ('x', 'flag')
+    assert rows['x'].dtype == np.int32
+    assert rows['flag'].tolist() == [True, False]
+    assert buffer.count(newer_than=1.0) == 1
+
+
+def test_clear_keeps_capacity():
+    buffer = RingBuffer(3, ('value',))
+    for t in range(5):
+        buffer.append(float(t), t)
+
+    buffer.clear()
+    buffer.append(10.0, 1)
+
+    assert len(buffer) == 1 and buffer.capacity == 3
+    assert buffer.first() == buffer.last() == 10.0
+    assert buffer.window('value').tolist() == [1]
+
+
+def test_array_rows_keep_their_shape():
+    buffer = RingBuffer(2, (('points', np.float32, (33, 4)),))
+
+    for t in range(3):
+        buffer.append(float(t), np.full((33, 4), t, dtype=np.float32))
+    rows = buffer.window()
+
+    assert buffer.fields == ('points',)
+    assert rows['timestamp'].tolist() == [1.0, 2.0]
+    assert rows['points'].shape == (2, 33, 4)
+    assert rows['points'][:, 0, 0].tolist() == [1.0, 2.0]
@@ -0,0 +1,85 @@
+"""
+Detector Scheduler Tests
+اختبارات جدولة الكواشف
+"""
+
+import pytest
+
+from core.scheduler import DetectorScheduler
+from utils.metrics import LatencyTracker
+
+
+def test_required_detector_runs_every_frame():
+    scheduler = DetectorScheduler(budget_ms=1.0)
+    scheduler.register('face', required=True, initial_cost_ms=50.0)
+
+    for frame in range(5):
+        assert scheduler.plan(frame / 30) == {'face'}
+
+
+def test_rate_limits_runs():
+    scheduler = DetectorScheduler(budget_ms=100.0)
+    scheduler.register('objects', rate=5.0)
+
+    runs = [t for t in (i / 30 for i in range(30)) if 'objects' in scheduler.plan(t)]
+
+    # 5 Hz over one second of 30 fps frames
+    assert len(runs) == 5
+    assert all(later - earlier >= 0.2 - 1e-9 for earlier, later in zip(runs, runs[1:]))
+
+
+def test_budget_prefers_higher_priority():
+    scheduler = DetectorScheduler(budget_ms=33.0)
+    scheduler.register('face', required=True, initial_cost_ms=15.0)
+    scheduler.register('emotion', priority=1, initial_cost_ms=15.0)
+    scheduler.register('objects', priority=3, initial_cost_ms=15.0)
+
+    assert scheduler.plan(0.0) == {'face', 'objects'}
+    assert scheduler.last_decision['skipped'] == ['emotion']
+    assert scheduler.detectors['emotion']['skips'] == 1
+
+
+def test_min_rate_runs_over_budget():
+    scheduler = DetectorScheduler(budget_ms=10.0)
+    scheduler.register('face', required=True, initial_cost_ms=30.0)
+    scheduler.register('objects', rate=5.0, min_rate=1.0, initial_cost_ms=30.0)
+
+    assert scheduler.plan(0.0) == {'face', 'objects'}
+    assert scheduler.plan(0.5) == {'face'}
+    assert scheduler.plan(1.0) == {'face', 'objects'}
+    assert scheduler.last_decision['forced'] == ['objects']
+
+
+def test_record_smooths_cost():
+    scheduler = DetectorScheduler()
+    scheduler.register('hands', initial_cost_ms=10.0)
+
+    scheduler.record('hands', 0.020)
+
+    assert scheduler.detectors['hands']['cost'] == pytest.approx(0.012)
+
+
+def test_cost_only_measurement_is_not_a_latency_stage():
+    tracker = LatencyTracker()
+    scheduler = DetectorScheduler(latency_tracker=tracker)
+    scheduler.register('face', required=True)
+    scheduler.register('hands')
+
+    with scheduler.measure('face', latency=False):
+        pass
+    with scheduler.measure('hands'):
+        pass
+
+    assert list(tracker.summary()) == ['hands']
+    assert scheduler.detectors['face']['cost'] < 0.010  # the cost is still updated
+
+
+def test_unregister_removes_detector():
+    scheduler = DetectorScheduler()
+    scheduler.register('objects')
+    scheduler.plan(0.0)
+
+    scheduler.unregister('objects')
+
+    assert not scheduler.should_run('objects')
+    assert 'objects' not in scheduler.get_stats()
@@ -0,0 +1,136 @@
+"""
+Monitoring Server Tests
+اختبارات خادم المراقبة متعدد الكاميرات
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core import server as server_module
+from core.server import MonitoringServer
+
+
+class FakeTime:
+    """time module stand-in advanced by the capture reads"""
+
+    def __init__(self):
+        self.current = 0.0
+
+    def time(self):
+        return self.current
+
+    def sleep(self, seconds):
+        pass
+
+
+class ScriptedGrabber:
+    """Delivers one scripted frame (or nothing) per read; stops when the script ends"""
+
+    def __init__(self, script, fake_time, tick=0.0):
+        self.script = list(script)
+        self.time = fake_time
+        self.tick = tick
+        self.running = True
+        self.failed = False
+
+    def read(self, timeout=None):
+        self.time.current += self.tick
+        if not self.script:
+            self.running = False
+            self.failed = True  # end of the recording
+            return False, None, None
+        if self.script.pop(0):
+            return True, np.zeros((48, 64, 3), dtype=np.uint8), self.time.current
+        return False, None, None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RecordingMonitor:
+    """Records what each stream's ExamMonitor is fed"""
+
+    def __init__(self):
+        self.calls = []
+        self.terminated = False
+
+    def yolo_roi(self, now):
+        return None
+
+    def process_frame(self, packet, objects=None, objects_time=None):
+        self.calls.append((packet.frame_id, objects, objects_time))
+
+    def save_final_report(self):
+        pass
+
+
+class BatchDetector:
+    """Returns one marker detection per packet and records the batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    def detect_batch(self, packets, rois=None):
+        self.batches.append([(packet.frame_id, packet.timestamp) for packet in packets])
+        return [[('detected', packet.timestamp)] for packet in packets]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(server_module, 'time', clock)
+    return clock
+
+
+def make_server(scripts, fake_time, interval):
+    server = MonitoringServer.__new__(MonitoringServer)
+    server.object_detector = BatchDetector()
+    server.object_interval = interval
+    server.streams = {}
+    for index, (name, script) in enumerate(scripts.items()):
+        server.streams[name] = {
+            'monitor': RecordingMonitor(),
+            'cap': SimpleNamespace(release=lambda: None),
+            'grabber': ScriptedGrabber(script, fake_time, tick=0.1 if index == 0 else 0.0),
+            'frames': 0,
+            'latest': None,
+            'objects_due': 0.0,
+            'pending_objects': None
+        }
+    server.start_time = None
+    server.batches = server.batched_frames = server.finished_frames = 0
+    return server, {name: stream['monitor'] for name, stream in server.streams.items()}
+
+
+def test_every_due_stream_is_batched_on_its_newest_packet(fake_time):
+    # Rounds at t = 0.1, 0.2, 0.3, 0.4; YOLO is due every 0.15 s per stream
+    server, monitors = make_server({'a': [1, 1, 0, 1], 'b': [1, 0, 1, 0]}, fake_time, interval=0.15)
+
+    server.run()
+
+    a, b = monitors['a'].calls, monitors['b'].calls
+    detector = server.object_detector
+    assert [len(batch) for batch in detector.batches] == [2, 2]
+    # Round 3: 'a' had no new frame but was due, so its newest packet (t=0.2) joins 'b'
+    assert detector.batches[1] == [(2, pytest.approx(0.2)), (2, pytest.approx(0.3))]
+    assert b[1] == (2, [('detected', pytest.approx(0.3))], pytest.approx(0.3))
+    # ...and its result arrives with the next frame, stamped with the frame it was computed on
+    assert a[1] == (2, None, None)
+    assert a[2] == (3, [('detected', pytest.approx(0.2))], pytest.approx(0.2))
+
+
+def test_stream_joining_late_is_not_held_back_by_others(fake_time):
+    server, monitors = make_server({'a': [1, 0], 'b': [0, 1]}, fake_time, interval=10.0)
+
+    server.run()
+
+    assert monitors['b'].calls[0][1] is not None
+    assert server.object_detector.batches == [[(1, pytest.approx(0.1))], [(1, pytest.approx(0.2))]]
@@ -0,0 +1,65 @@
+"""
+YOLO Backend Tests
+اختبارات واجهات تشغيل YOLO
+"""
+
+import numpy as np
+import pytest
+
+from detectors.yolo_backends import _ExportedBackend, parse_backend
+
+
+def raw_output(rows, num_classes=3):
+    """YOLOv8 export layout (1, 4 + classes, anchors) from (cx, cy, w, h, class, score) rows"""
+    output = np.zeros((1, 4 + num_classes, len(rows)), dtype=np.float32)
+    for anchor, (cx, cy, w, h, cls, score) in enumerate(rows):
+        output[0, :4, anchor] = (cx, cy, w, h)
+        output[0, 4 + cls, anchor] = score
+    return output
+
+
+def test_parse_backend():
+    assert parse_backend('torch') == ('torch', False)
+    assert parse_backend('onnx:int8') == ('onnx', True)
+    assert parse_backend('openvino') == ('openvino', False)
+    with pytest.raises(ValueError):
+        parse_backend('tensorrt')
+
+
+def test_preprocess_layout():
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    image[..., 0] = 255  # blue
+
+    batch = _ExportedBackend.preprocess([image, image])
+
+    assert batch.shape == (2, 3, 4, 4) and batch.dtype == np.float32
+    assert batch[0, 2].max() == 1.0 and batch[0, 0].max() == 0.0  # RGB order
+
+
+def test_decode_thresholds_and_suppresses_overlaps():
+    output = raw_output([
+        (50, 50, 20, 20, 1, 0.9),
+        (51, 50, 20, 20, 1, 0.8),   # overlaps the first box, same class
+        (51, 50, 20, 20, 2, 0.7),   # same place, other class: kept
+        (150, 150, 10, 10, 0, 0.3)  # under the threshold
+    ])
+
+    boxes, confidences, classes = _ExportedBackend.decode(output, 0.5, 20)[0]
+
+    assert confidences.tolist() == pytest.approx([0.9, 0.7])
+    assert classes.tolist() == [1, 2]
+    assert boxes[0].tolist() == pytest.approx([40, 40, 60, 60])
+
+
+def test_decode_empty():
+    boxes, confidences, classes = _ExportedBackend.decode(raw_output([(5, 5, 2, 2, 0, 0.1)]), 0.5, 20)[0]
+
+    assert boxes.shape == (0, 4) and len(confidences) == len(classes) == 0
+
+
+def test_decode_class_filter():
+    output = raw_output([(50, 50, 20, 20, 1, 0.9), (150, 150, 20, 20, 2, 0.9)])
+
+    _, _, classes = _ExportedBackend.decode(output, 0.5, 20, [2])[0]
+
+    assert classes.tolist() == [2]
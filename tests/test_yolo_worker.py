@@ -0,0 +1,118 @@
+"""
+YOLO Worker Tests (worker loop on a thread, stub inference backend)
+اختبارات عملية YOLO المنفصلة باستخدام نموذج بديل
+"""
+
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from detectors import yolo_backends
+from detectors.yolo_worker import YoloWorker
+
+# Same worker loop and shared memory, but in a thread so the stub backend is visible to it
+THREAD_CONTEXT = SimpleNamespace(Queue=queue.Queue, Process=threading.Thread)
+
+
+class StubBackend:
+    """Reports the image's first pixel as its confidence; can be held back per call"""
+
+    names = {67: 'cell phone'}
+
+    def __init__(self):
+        self.hold = threading.Event()
+        self.hold.set()
+
+    def predict(self, images, conf, max_det, classes=None):
+        self.hold.wait(5.0)
+        return [
+            (np.array([[0, 0, 10, 10]], dtype=np.float32), np.array([image[0, 0, 0] / 100], dtype=np.float32),
+             np.array([67]))
+            for image in images
+        ]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = StubBackend()
+    monkeypatch.setattr(yolo_backends, 'create_backend', lambda *args, **kwargs: backend)
+    return backend
+
+
+@pytest.fixture
+def worker(backend):
+    worker = YoloWorker('stub.pt', img_size=32, num_slots=2, mp_context=THREAD_CONTEXT)
+    yield worker
+    backend.hold.set()
+    worker.close()
+
+
+def image(value):
+    return np.full((32, 32, 3), value, dtype=np.uint8)
+
+
+def wait_for_poll(worker, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = worker.poll()
+        if result:
+            return result
+        time.sleep(0.005)
+    return None
+
+
+def test_run_returns_its_own_result(worker):
+    result = worker.run(image(50), 1, 0.5, meta='meta')
+
+    assert result['frame_id'] == 1 and result['timestamp'] == 0.5 and result['meta'] == 'meta'
+    assert result['confidences'][0] == pytest.approx(0.5)
+    assert worker.names == {67: 'cell phone'}
+
+
+def test_submit_poll_and_saturation(worker, backend):
+    backend.hold.clear()
+    assert worker.submit(image(10), 1, 0.1)
+    assert worker.submit(image(20), 2, 0.2)
+    assert not worker.submit(image(30), 3, 0.3)  # both slots in flight
+
+    backend.hold.set()
+    results = [wait_for_poll(worker)]
+    if results[0]['frame_id'] == 1:
+        results.append(wait_for_poll(worker))
+
+    assert results[-1]['frame_id'] == 2
+    assert worker.get_stats() == {'submitted': 2, 'skipped': 1, 'completed': 2, 'in_flight': 0, 'errors': 0}
+
+
+def test_run_keeps_earlier_results_for_poll(worker):
+    worker.submit(image(10), 1, 0.1)
+
+    result = worker.run(image(20), 2, 0.2)
+
+    assert result['frame_id'] == 2
+    assert wait_for_poll(worker)['frame_id'] == 1
+
+
+def test_late_result_after_timeout_is_dropped(worker, backend):
+    backend.hold.clear()
+    assert worker.run(image(10), 1, 0.1, timeout=0.1) is None
+
+    backend.hold.set()
+    result = worker.run(image(20), 2, 0.2)
+
+    assert result['frame_id'] == 2
+    assert worker.poll() is None  # frame 1 arrived late and was not reported as fresh
+    assert worker.get_stats()['in_flight'] == 0 and worker.get_stats()['errors'] == 1
+
+
+def test_run_returns_promptly_when_worker_died(worker):
+    worker.requests.put(None)  # worker loop exits
+    worker.process.join(2.0)
+
+    start = time.monotonic()
+    assert worker.run(image(10), 1, 0.1) is None
+    assert time.monotonic() - start < 0.5
@@ -5,6 +5,11 @@ Utils module
 
 from .logger import setup_logger
 from .alerts import AlertManager
+from .frame_packet import FramePacket
+from .metrics import LatencyTracker
+from .ring_buffer import RingBuffer
+from . import clock
+from . import landmarks
 
-__all__ = ['setup_logger', 'AlertManager']
+__all__ = ['setup_logger', 'AlertManager', 'FramePacket', 'LatencyTracker', 'RingBuffer', 'clock', 'landmarks']
 
@@ -3,10 +3,12 @@ Alert Management System
 نظام إدارة التنبيهات
 """
 
-import time
 from datetime import datetime
 from collections import deque
 
+from . import clock
+from .evidence import ObjectEvidence
+
 
 class AlertManager:
     """Manages alerts and cheating score"""
@@ -17,7 +19,8 @@ class AlertManager:
         self.cheating_score = 0
         self.alerts = []
         self.alert_history = deque(maxlen=10)
-        self.last_alert_time = 0
+        self.alert_log = []  # Every accepted alert of the session (structured)
+        self.last_alert_time = float('-inf')  # the first alert is never in cooldown
         self.alert_cooldown = 5  # seconds
         
         # Load score penalties
@@ -54,21 +57,33 @@ class AlertManager:
         
         # Incidents
         self.cheating_incidents = []
+        
+        # Object detections must build up evidence before they alert
+        self.object_evidence = ObjectEvidence(
+            config.OBJECT_EVIDENCE_WINDOW if config else 5,
+            config.OBJECT_EVIDENCE_ON if config else 0.4,
+            config.OBJECT_EVIDENCE_OFF if config else 0.1
+        )
     
-    def add_alert(self, message, alert_type, notification_system=None):
-        """Add alert and update score"""
-        current_time = time.time()
+    def add_alert(self, message, alert_type, notification_system=None, force=False):
+        """Add alert and update score (force skips the cooldown for already rate-limited events)"""
+        current_time = clock.now()
         
         # Cooldown check
-        if current_time - self.last_alert_time < self.alert_cooldown:
+        if not force and current_time - self.last_alert_time < self.alert_cooldown:
             return
         
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = datetime.fromtimestamp(clock.now()).strftime("%H:%M:%S")
         alert = f"[{timestamp}] {message}"
         
         if alert not in self.alert_history:
             self.alerts.append(alert)
             self.alert_history.append(alert)
+            self.alert_log.append({
+                'timestamp': timestamp,
+                'type': alert_type,
+                'message': message
+            })
             
             # Update score
             if alert_type in self.SCORE_PENALTIES:
@@ -103,15 +118,15 @@ class AlertManager:
             return True
         return False
     
-    def add_object_alert(self, objects_detected, notification_system=None):
+    def add_object_alert(self, objects_detected, notification_system=None, force=False):
         """Add alert for detected objects"""
         for obj in objects_detected:
             message = f"Unauthorized object: {obj['name']} (Confidence: {obj['confidence']:.2f})"
-            self.add_alert(message, "forbidden_object", notification_system)
+            self.add_alert(message, "forbidden_object", notification_system, force)
             
             # Log incident
             incident = {
-                'timestamp': datetime.now().strftime("%H:%M:%S"),
+                'timestamp': datetime.fromtimestamp(clock.now()).strftime("%H:%M:%S"),
                 'type': 'forbidden_object',
                 'object': obj['name'],
                 'confidence': obj['confidence'],
@@ -120,6 +135,24 @@ class AlertManager:
             }
             self.cheating_incidents.append(incident)
     
+    def update_object_evidence(self, objects_detected, notification_system=None, timestamp=None):
+        """Feed one detection run; alert once when an object is confirmed, log when it is gone"""
+        timestamp = clock.now() if timestamp is None else timestamp
+        events = self.object_evidence.update(objects_detected, timestamp)
+        
+        for event in events:
+            if event['event'] == 'appeared':
+                # Fires once per confirmed object, so the global cooldown must not swallow it
+                self.add_object_alert([event['object']], notification_system, force=True)
+            else:
+                self.alert_log.append({
+                    'timestamp': datetime.fromtimestamp(clock.now()).strftime("%H:%M:%S"),
+                    'type': 'object_removed',
+                    'message': f"{event['name']} no longer visible (after {event['duration']:.1f}s)"
+                })
+        
+        return events
+    
     def _update_metrics(self, alert_type):
         """Update metrics based on alert type"""
         if alert_type == "face_movement":
@@ -137,13 +170,13 @@ class AlertManager:
         """Start exam termination countdown"""
         if not self.exam_termination_countdown:
             self.exam_termination_countdown = self.exam_termination_duration
-            self.exam_termination_start = time.time()
+            self.exam_termination_start = clock.now()
             print("🚨 EXAM TERMINATION INITIATED! Cheating score reached 100!")
     
     def update_exam_termination(self):
         """Update termination countdown"""
         if self.exam_termination_countdown and self.exam_termination_countdown > 0:
-            elapsed = time.time() - self.exam_termination_start
+            elapsed = clock.now() - self.exam_termination_start
             self.exam_termination_countdown = max(0, self.exam_termination_duration - elapsed)
             return self.exam_termination_countdown > 0
         return False
@@ -0,0 +1,58 @@
+"""
+Injectable Clock
+ساعة قابلة للاستبدال (للتشغيل المسجل)
+
+Detectors read the time through clock.now() instead of time.time(), so a
+recorded video can be replayed with simulated, deterministic timestamps.
+"""
+
+import time
+
+
+class SystemClock:
+    """Wall clock (default)"""
+
+    def now(self):
+        """Current time in seconds"""
+        return time.time()
+
+
+class ReplayClock:
+    """Simulated clock advanced explicitly by the replay loop"""
+
+    def __init__(self, start=0.0):
+        """Initialize clock at start (seconds)"""
+        self.current = start
+
+    def now(self):
+        """Current simulated time in seconds"""
+        return self.current
+
+    def advance(self, seconds):
+        """Move the clock forward"""
+        self.current += seconds
+
+    def set(self, timestamp):
+        """Jump to an absolute timestamp"""
+        self.current = timestamp
+
+
+_clock = SystemClock()
+
+
+def now():
+    """Current time from the active clock"""
+    return _clock.now()
+
+
+def set_clock(clock):
+    """Install a clock and return the previous one"""
+    global _clock
+    previous = _clock
+    _clock = clock
+    return previous
+
+
+def get_clock():
+    """Return the active clock"""
+    return _clock
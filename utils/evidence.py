@@ -0,0 +1,59 @@
+"""
+Temporal Evidence Accumulation
+تجميع الأدلة عبر الزمن قبل إطلاق تنبيه الأجسام
+"""
+
+from collections import deque
+
+
+class ObjectEvidence:
+    """Confidence-weighted votes per object class over the last N detection runs
+
+    An object is confirmed once its evidence (mean of the best confidence per
+    run, 0 when absent) reaches on_threshold, and released when it falls to
+    off_threshold. The gap between the two keeps one flickering detection
+    from producing a stream of events.
+    """
+
+    def __init__(self, window=5, on_threshold=0.4, off_threshold=0.1):
+        """Initialize accumulator"""
+        self.window = window
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+
+        self.votes = {}  # name -> deque of confidences, one per detection run
+        self.active = {}  # name -> {'since', 'object', 'evidence'}
+
+    def update(self, objects, timestamp):
+        """Add one detection run; returns the 'appeared'/'disappeared' events it caused"""
+        best = {}
+        for obj in objects:
+            if obj['name'] not in best or obj['confidence'] > best[obj['name']]['confidence']:
+                best[obj['name']] = obj
+
+        events = []
+        for name in list(self.votes.keys() | best.keys()):
+            votes = self.votes.setdefault(name, deque(maxlen=self.window))
+            votes.append(best[name]['confidence'] if name in best else 0.0)
+            evidence = sum(votes) / self.window
+
+            if name not in self.active and evidence >= self.on_threshold:
+                self.active[name] = {'since': timestamp, 'object': best[name], 'evidence': evidence}
+                events.append({'event': 'appeared', 'name': name, 'evidence': evidence, 'object': best[name]})
+            elif name in self.active and evidence <= self.off_threshold:
+                info = self.active.pop(name)
+                events.append({
+                    'event': 'disappeared',
+                    'name': name,
+                    'evidence': evidence,
+                    'duration': timestamp - info['since']
+                })
+
+            if name not in self.active and not any(votes):
+                del self.votes[name]
+
+        return events
+
+    def get_active(self):
+        """Currently confirmed object classes"""
+        return list(self.active)
@@ -0,0 +1,110 @@
+"""
+Shared Frame Packet
+حزمة الإطار المشتركة بين الكواشف
+"""
+
+import cv2
+import numpy as np
+
+from . import clock
+
+
+class FramePacket:
+    """Per-frame container whose derived views are computed once, on first use"""
+
+    def __init__(self, frame, timestamp=None, frame_id=0):
+        """Initialize packet around a BGR frame"""
+        self.bgr = frame
+        self.timestamp = timestamp if timestamp is not None else clock.now()
+        self.frame_id = frame_id
+        self.shape = frame.shape
+
+        # Derived views, filled lazily
+        self._views = {}
+
+    @classmethod
+    def wrap(cls, frame):
+        """Return frame as a FramePacket (no-op if it already is one)"""
+        if isinstance(frame, cls):
+            return frame
+        return cls(frame)
+
+    def _view(self, key, build):
+        """Return cached view, building it the first time"""
+        view = self._views.get(key)
+        if view is None:
+            view = build()
+            self._views[key] = view
+        return view
+
+    @property
+    def rgb(self):
+        """Full resolution RGB view (read-only, as MediaPipe expects)"""
+        def build():
+            rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+            rgb.flags.writeable = False
+            return rgb
+        return self._view('rgb', build)
+
+    def analysis_rgb(self, width=None):
+        """RGB view downscaled to width (aspect ratio kept) for the MediaPipe graphs
+
+        MediaPipe returns normalized coordinates, so its results apply to the
+        full frame as they are. Full resolution when width is 0/None or not smaller.
+        """
+        if not width or width >= self.shape[1]:
+            return self.rgb
+
+        def build():
+            # Start from the half view when it is big enough (often already built for gating)
+            source = self.half if width <= self.shape[1] // 2 else self.bgr
+            if source.shape[1] != width:
+                height = max(1, round(self.shape[0] * width / self.shape[1]))
+                # INTER_AREA is only needed against aliasing from 2x down, and is slow at fractional ratios
+                interpolation = cv2.INTER_AREA if source.shape[1] >= 2 * width else cv2.INTER_LINEAR
+                source = cv2.resize(source, (width, height), interpolation=interpolation)
+            rgb = cv2.cvtColor(source, cv2.COLOR_BGR2RGB)
+            rgb.flags.writeable = False
+            return rgb
+        return self._view(('analysis', width), build)
+
+    @property
+    def half(self):
+        """Half resolution BGR view"""
+        return self._view('half', lambda: cv2.resize(
+            self.bgr, (self.shape[1] // 2, self.shape[0] // 2), interpolation=cv2.INTER_AREA
+        ))
+
+    @property
+    def gray(self):
+        """Half resolution grayscale view"""
+        return self._view('gray', lambda: cv2.cvtColor(self.half, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def tiny(self):
+        """64 px wide grayscale view (motion and brightness checks)"""
+        def build():
+            h, w = self.gray.shape
+            return cv2.resize(self.gray, (64, max(1, h * 64 // w)), interpolation=cv2.INTER_AREA)
+        return self._view('tiny', build)
+
+    def letterbox(self, size, roi=None):
+        """Letterboxed square BGR view for YOLO: returns (image, scale, (pad_x, pad_y))
+
+        roi: optional (x1, y1, x2, y2) crop; the returned pad then includes the
+             crop origin, so frame = (box - pad) / scale holds either way
+        """
+        def build():
+            x1, y1 = (roi[0], roi[1]) if roi else (0, 0)
+            source = self.bgr[roi[1]:roi[3], roi[0]:roi[2]] if roi else self.bgr
+            h, w = source.shape[:2]
+            scale = min(size / w, size / h)
+            new_w, new_h = int(round(w * scale)), int(round(h * scale))
+            pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+            canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+            canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+                source, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+            )
+            return canvas, scale, (pad_x - x1 * scale, pad_y - y1 * scale)
+        return self._view(('letterbox', size, roi), build)
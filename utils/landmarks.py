@@ -0,0 +1,152 @@
+"""
+Landmark Arrays
+تحويل معالم MediaPipe إلى مصفوفات NumPy مرة واحدة لكل إطار
+"""
+
+from functools import lru_cache
+from operator import attrgetter
+
+import numpy as np
+
+
+# Landmark counts per model (FaceMesh with refine_landmarks adds 10 iris points)
+FACE_POINTS = 468
+POSE_POINTS = 33
+HAND_POINTS = 21
+
+
+# NormalizedLandmark fields in wire order; a message with its first k fields set
+# serializes as 0x0A <5k> then k times <field tag> <little-endian float32>
+_FIELDS = ('x', 'y', 'z', 'visibility', 'presence')
+
+
+@lru_cache(maxsize=None)
+def _wire_layout(fields, width):
+    """Expected tag bytes, their columns and the value byte columns of one serialized landmark"""
+    header = np.array([0x0A, 5 * fields] + [(field << 3) | 5 for field in range(1, fields + 1)], dtype=np.uint8)
+    tag_columns = np.array([0, 1] + [2 + 5 * field for field in range(fields)])
+    value_columns = np.array([3 + 5 * field + byte for field in range(width) for byte in range(4)])
+    return header, tag_columns, value_columns
+
+
+def _wire_array(landmark_list, count, width):
+    """Bulk copy of a serialized landmark list -> (count, width) float32, None if the layout differs"""
+    serialize = getattr(landmark_list, 'SerializeToString', None)
+    if serialize is None or not count:
+        return None
+    data = np.frombuffer(serialize(), dtype=np.uint8)
+    size = len(data) // count
+    fields = (size - 2) // 5
+    if len(data) != count * size or size != 2 + 5 * fields or not width <= fields <= len(_FIELDS):
+        return None
+
+    rows = data.reshape(count, size)
+    header, tag_columns, value_columns = _wire_layout(fields, width)
+    if not (rows[:, tag_columns] == header).all():
+        return None
+    return np.ascontiguousarray(rows[:, value_columns]).view('<f4').astype(np.float32, copy=False)
+
+
+def _landmark_array(landmark_list, width):
+    """Landmark list -> contiguous (count, width) float32 array of the first width fields"""
+    points = landmark_list.landmark
+    array = _wire_array(landmark_list, len(points), width)
+    if array is None:
+        # Plain objects or unexpected layouts: read the attributes one by one
+        fields = attrgetter(*_FIELDS[:width])
+        array = np.fromiter(
+            (v for lm in points for v in fields(lm)), dtype=np.float32, count=len(points) * width
+        ).reshape(len(points), width)
+    return array
+
+
+def face_array(face_landmarks):
+    """Face landmarks -> (468 or 478, 3) x, y, z array; arrays and None pass through"""
+    if face_landmarks is None or isinstance(face_landmarks, np.ndarray):
+        return face_landmarks
+    return _landmark_array(face_landmarks, 3)
+
+
+def pose_array(pose_landmarks):
+    """Pose landmarks -> (33, 4) x, y, z, visibility array; arrays and None pass through"""
+    if pose_landmarks is None or isinstance(pose_landmarks, np.ndarray):
+        return pose_landmarks
+    return _landmark_array(pose_landmarks, 4)
+
+
+def hand_arrays(hand_results):
+    """Hands result -> (hands, 21, 3) x, y, z array, empty when no hand; arrays pass through"""
+    if isinstance(hand_results, np.ndarray):
+        return hand_results
+    if hand_results is None or not hand_results.multi_hand_landmarks:
+        return np.empty((0, HAND_POINTS, 3), dtype=np.float32)
+    return np.stack([_landmark_array(hand, 3) for hand in hand_results.multi_hand_landmarks])
+
+
+def benchmark(repeats=2000):
+    """Landmark work per frame: protobuf walking vs. one shared array conversion"""
+    import timeit
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(0)
+    coordinates = rng.random((478, 3))
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        face = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in coordinates:
+            face.landmark.add(x=x, y=y, z=z)
+        source = 'MediaPipe protobuf'
+    except ImportError:
+        face = SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in coordinates.tolist()])
+        source = 'plain objects (MediaPipe not installed, attribute fallback)'
+
+    eyes = np.array([
+        33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246,
+        362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398
+    ])
+    eye_lists = [eyes[:16].tolist(), eyes[16:].tolist()]
+    size = np.array([1280, 720])
+
+    def protobuf_geometry():
+        # Eye tracker, emotion and face movement features attribute by attribute
+        lm = face.landmark
+        centers = [
+            (sum(lm[i].x for i in eye) / len(eye), sum(lm[i].y for i in eye) / len(eye))
+            for eye in eye_lists
+        ]
+        openness = (abs(lm[159].y - lm[145].y) + abs(lm[386].y - lm[374].y)) / 2
+        nose = (int(lm[4].x * size[0]), int(lm[4].y * size[1]))
+        return centers, openness, abs(lm[13].y - lm[14].y), (lm[66].y + lm[296].y) / 2, nose
+
+    def array_geometry(points):
+        # Same features the way the detectors compute them on the shared array
+        center = points[eyes, :2].mean(axis=0)
+        openness = (abs(points[159, 1] - points[145, 1]) + abs(points[386, 1] - points[374, 1])) / 2
+        nose = (int(points[4, 0] * size[0]), int(points[4, 1] * size[1]))
+        return center, openness, abs(points[13, 1] - points[14, 1]), (points[66, 1] + points[296, 1]) / 2, nose
+
+    def protobuf_frame():
+        # Detectors walk the protobuf, the overlay converts it again to draw the mesh
+        protobuf_geometry()
+        pixels = np.array([(lm.x, lm.y) for lm in face.landmark], dtype=np.float32)
+        return (pixels * size).astype(np.int32)
+
+    def array_frame():
+        points = face_array(face)
+        array_geometry(points)
+        return (points[:, :2] * size).astype(np.int32)
+
+    assert np.allclose(face_array(face), coordinates, atol=1e-6)
+    points = face_array(face)
+    timings = {
+        'face_array conversion': timeit.timeit(lambda: face_array(face), number=repeats),
+        'protobuf geometry': timeit.timeit(protobuf_geometry, number=repeats),
+        'array geometry': timeit.timeit(lambda: array_geometry(points), number=repeats),
+        'protobuf frame': timeit.timeit(protobuf_frame, number=repeats),
+        'array frame': timeit.timeit(array_frame, number=repeats)
+    }
+
+    print(f"📏 Face landmark work on {source}, {repeats} runs (µs per frame):")
+    for name, seconds in timings.items():
+        print(f"   {name:<24} {seconds / repeats * 1e6:>8.1f}")
+    print(f"   frame speedup with overlay: {timings['protobuf frame'] / timings['array frame']:.2f}x")
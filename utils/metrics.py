@@ -0,0 +1,68 @@
+"""
+Latency Metrics
+مقاييس زمن المعالجة
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class LatencyTracker:
+    """Rolling latency samples per name with percentile queries"""
+
+    def __init__(self, window=1000):
+        """Initialize tracker keeping the last `window` samples per name"""
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+
+    def record(self, name, seconds):
+        """Record one latency sample in seconds"""
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+            self.counts[name] = 0
+        self.samples[name].append(seconds)
+        self.counts[name] += 1
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and record it under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def percentiles(self, name, quantiles=(50, 95, 99)):
+        """Return {quantile: milliseconds} for one name (empty if no samples)"""
+        samples = self.samples.get(name)
+        if not samples:
+            return {}
+        values = np.percentile(np.fromiter(samples, dtype=np.float64), quantiles) * 1000.0
+        return dict(zip(quantiles, values.tolist()))
+
+    def summary(self):
+        """Return per-name latency statistics in milliseconds"""
+        summary = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.fromiter(samples, dtype=np.float64) * 1000.0
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)).tolist()
+            summary[name] = {
+                'count': self.counts[name],
+                'mean_ms': float(values.mean()),
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': float(values.max())
+            }
+        return summary
+
+    def reset(self):
+        """Drop all samples"""
+        self.samples.clear()
+        self.counts.clear()
@@ -0,0 +1,99 @@
+"""
+Array-Backed Ring Buffer
+مخزن دائري لسجلات الكواشف قائم على مصفوفات NumPy
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity history in a preallocated numpy structured array
+
+    Every row has a 'timestamp' column plus the declared fields. append() is
+    O(1) and overwrites the oldest row once full (like deque(maxlen=...)).
+    Window queries run on the columns directly: count(), mean() and max()
+    do not depend on row order and never copy; window() returns rows in
+    chronological order.
+    """
+
+    def __init__(self, capacity, fields=()):
+        """fields: names (float64 columns), (name, dtype) pairs or (name, dtype, shape) for array rows"""
+        columns = [('timestamp', np.float64)]
+        for field in fields:
+            columns.append((field, np.float64) if isinstance(field, str) else tuple(field))
+
+        self.capacity = capacity
+        self.fields = tuple(column[0] for column in columns[1:])
+        self.data = np.zeros(capacity, dtype=columns)
+        self.head = 0  # next row to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, timestamp, *values):
+        """Add one row (values in field order)"""
+        self.data[self.head] = (timestamp, *values)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def clear(self):
+        """Drop all rows (storage is kept)"""
+        self.head = 0
+        self.size = 0
+
+    def _filled(self):
+        """Valid rows in storage order (a view, no copy)"""
+        return self.data if self.size == self.capacity else self.data[:self.size]
+
+    def _index(self, position):
+        """Storage index of the row at chronological position (negative counts from the newest)"""
+        if position < 0:
+            position += self.size
+        return (self.head - self.size + position) % self.capacity
+
+    def first(self, field='timestamp'):
+        """Oldest value of field, or None when empty"""
+        return self.data[field][self._index(0)].item() if self.size else None
+
+    def last(self, field='timestamp'):
+        """Newest value of field, or None when empty"""
+        return self.data[field][self._index(-1)].item() if self.size else None
+
+    def _mask(self, rows, newer_than):
+        """Rows whose timestamp is strictly after newer_than (all rows when None)"""
+        return None if newer_than is None else rows['timestamp'] > newer_than
+
+    def count(self, newer_than=None):
+        """Number of rows, optionally only those after newer_than"""
+        rows = self._filled()
+        mask = self._mask(rows, newer_than)
+        return self.size if mask is None else int(np.count_nonzero(mask))
+
+    def mean(self, field, newer_than=None):
+        """Mean of field over the window, or None when it is empty"""
+        values = self._column(field, newer_than)
+        return float(values.mean()) if len(values) else None
+
+    def max(self, field, newer_than=None):
+        """Maximum of field over the window, or None when it is empty"""
+        values = self._column(field, newer_than)
+        return values.max().item() if len(values) else None
+
+    def _column(self, field, newer_than):
+        """Field values of the window in storage order"""
+        rows = self._filled()
+        mask = self._mask(rows, newer_than)
+        return rows[field] if mask is None else rows[field][mask]
+
+    def window(self, field=None, newer_than=None, last=None):
+        """Rows (or one field) in chronological order: the newest `last` rows and/or those after newer_than"""
+        count = self.size if last is None else min(last, self.size)
+        start = self.head - count
+        if start >= 0:
+            rows = self.data[start:self.head]
+        else:
+            rows = np.concatenate((self.data[start:], self.data[:self.head]))
+        if newer_than is not None:
+            rows = rows[rows['timestamp'] > newer_than]
+        return rows if field is None else rows[field]